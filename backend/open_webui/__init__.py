@@ -99,5 +99,62 @@ def dev(
     )
 
 
+@app.command()
+def rebuild_usage():
+    """Rebuild the daily usage rollups shown in the admin dashboard."""
+    from open_webui.models.usage import Usage
+
+    if not Usage.rebuild_usage():
+        typer.echo("Failed to rebuild usage rollups, see logs for details.")
+        raise typer.Exit(code=1)
+    typer.echo("Usage rollups rebuilt.")
+
+
+@app.command()
+def rebuild_search_index():
+    """Rebuild the chat full-text search index (SQLite only, e.g. after a VACUUM)."""
+    from open_webui.models.chats import Chats
+
+    if not Chats.rebuild_search_index():
+        typer.echo("Failed to rebuild the search index, see logs for details.")
+        raise typer.Exit(code=1)
+    typer.echo("Search index rebuilt.")
+
+
+@app.command()
+def measure_storage(
+    full: Annotated[
+        bool, typer.Option(help="Measure all users, not only changed ones")
+    ] = False,
+):
+    """Measure the storage used by each user, as shown in the admin dashboard."""
+    from open_webui.utils.storage_usage import run_storage_accounting
+
+    try:
+        count = run_storage_accounting(full=full)
+    except Exception as e:
+        typer.echo(f"Failed to measure storage: {e}")
+        raise typer.Exit(code=1)
+    typer.echo(f"Measured storage of {count} users.")
+
+
+@app.command()
+def move_chats_to_cold_storage(
+    days: Annotated[
+        Optional[int],
+        typer.Option(help="Days without updates, defaults to CHAT_COLD_STORAGE_DAYS"),
+    ] = None,
+):
+    """Move the chats not updated for a number of days to compressed storage."""
+    from open_webui.env import CHAT_COLD_STORAGE_DAYS
+    from open_webui.utils.cold_storage import run_chat_cold_storage
+
+    days = CHAT_COLD_STORAGE_DAYS if days is None else days
+    if days <= 0:
+        typer.echo("Set --days or CHAT_COLD_STORAGE_DAYS to a positive number.")
+        raise typer.Exit(code=1)
+    typer.echo(f"Moved {run_chat_cold_storage(days)} chats to cold storage.")
+
+
 if __name__ == "__main__":
     app()
@@ -318,6 +318,22 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed message updates are buffered and written once this many seconds have
+# passed or this many updates were merged, whichever comes first
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+
+try:
+    REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+except Exception:
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+REALTIME_CHAT_SAVE_MAX_UPDATES = os.environ.get("REALTIME_CHAT_SAVE_MAX_UPDATES", "100")
+
+try:
+    REALTIME_CHAT_SAVE_MAX_UPDATES = int(REALTIME_CHAT_SAVE_MAX_UPDATES)
+except Exception:
+    REALTIME_CHAT_SAVE_MAX_UPDATES = 100
+
 ####################################
 # REDIS
 ####################################
@@ -326,6 +342,61 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+####################################
+# DASHBOARD
+####################################
+
+# Seconds a cached dashboard snapshot is served as fresh
+DASHBOARD_CACHE_TTL = os.environ.get("DASHBOARD_CACHE_TTL", "60")
+try:
+    DASHBOARD_CACHE_TTL = int(DASHBOARD_CACHE_TTL)
+except ValueError:
+    DASHBOARD_CACHE_TTL = 60
+
+# Seconds an expired snapshot may still be served while it is refreshed in the background
+DASHBOARD_CACHE_STALE_TTL = os.environ.get("DASHBOARD_CACHE_STALE_TTL", "600")
+try:
+    DASHBOARD_CACHE_STALE_TTL = int(DASHBOARD_CACHE_STALE_TTL)
+except ValueError:
+    DASHBOARD_CACHE_STALE_TTL = 600
+
+# Dashboard snapshots kept in process per worker, the least recently used are dropped
+DASHBOARD_CACHE_MAX_SNAPSHOTS = os.environ.get("DASHBOARD_CACHE_MAX_SNAPSHOTS", "1000")
+try:
+    DASHBOARD_CACHE_MAX_SNAPSHOTS = int(DASHBOARD_CACHE_MAX_SNAPSHOTS)
+except ValueError:
+    DASHBOARD_CACHE_MAX_SNAPSHOTS = 1000
+
+# Seconds between storage accounting passes, 0 disables the background job
+STORAGE_ACCOUNTING_INTERVAL = os.environ.get("STORAGE_ACCOUNTING_INTERVAL", "3600")
+try:
+    STORAGE_ACCOUNTING_INTERVAL = int(STORAGE_ACCOUNTING_INTERVAL)
+except ValueError:
+    STORAGE_ACCOUNTING_INTERVAL = 3600
+
+# Chats not updated for this many days are moved to cold storage, 0 disables it
+CHAT_COLD_STORAGE_DAYS = os.environ.get("CHAT_COLD_STORAGE_DAYS", "0")
+try:
+    CHAT_COLD_STORAGE_DAYS = int(CHAT_COLD_STORAGE_DAYS)
+except ValueError:
+    CHAT_COLD_STORAGE_DAYS = 0
+
+# Seconds between passes moving chats to cold storage
+CHAT_COLD_STORAGE_INTERVAL = os.environ.get("CHAT_COLD_STORAGE_INTERVAL", "3600")
+try:
+    CHAT_COLD_STORAGE_INTERVAL = int(CHAT_COLD_STORAGE_INTERVAL)
+except ValueError:
+    CHAT_COLD_STORAGE_INTERVAL = 3600
+
+# Bytes a chat may take up in a bulk import, longer lines are rejected
+CHAT_IMPORT_MAX_LINE_SIZE = os.environ.get(
+    "CHAT_IMPORT_MAX_LINE_SIZE", str(16 * 1024 * 1024)
+)
+try:
+    CHAT_IMPORT_MAX_LINE_SIZE = int(CHAT_IMPORT_MAX_LINE_SIZE)
+except ValueError:
+    CHAT_IMPORT_MAX_LINE_SIZE = 16 * 1024 * 1024
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -399,6 +470,36 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Sessions receiving chat:completion content as deltas get the full content again
+# every this many events, so that they resync if a delta was lost
+WEBSOCKET_CHAT_SNAPSHOT_INTERVAL = os.environ.get(
+    "WEBSOCKET_CHAT_SNAPSHOT_INTERVAL", "50"
+)
+
+try:
+    WEBSOCKET_CHAT_SNAPSHOT_INTERVAL = int(WEBSOCKET_CHAT_SNAPSHOT_INTERVAL)
+except Exception:
+    WEBSOCKET_CHAT_SNAPSHOT_INTERVAL = 50
+
+# Streamed chat:completion events are coalesced and sent once this many seconds
+# have passed or this many characters of content were added, whichever comes
+# first. An interval of 0 sends every event as it comes.
+WEBSOCKET_EVENT_COALESCE_INTERVAL = os.environ.get(
+    "WEBSOCKET_EVENT_COALESCE_INTERVAL", "0.04"
+)
+
+try:
+    WEBSOCKET_EVENT_COALESCE_INTERVAL = float(WEBSOCKET_EVENT_COALESCE_INTERVAL)
+except Exception:
+    WEBSOCKET_EVENT_COALESCE_INTERVAL = 0.04
+
+WEBSOCKET_EVENT_COALESCE_SIZE = os.environ.get("WEBSOCKET_EVENT_COALESCE_SIZE", "4096")
+
+try:
+    WEBSOCKET_EVENT_COALESCE_SIZE = int(WEBSOCKET_EVENT_COALESCE_SIZE)
+except Exception:
+    WEBSOCKET_EVENT_COALESCE_SIZE = 4096
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -362,7 +362,7 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import AccessControlMiddleware, has_access
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -373,6 +373,12 @@ from open_webui.utils.auth import (
 )
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
+from open_webui.utils.storage_usage import periodic_storage_accounting
+from open_webui.utils.cold_storage import periodic_chat_cold_storage
+from open_webui.utils.message_buffer import (
+    message_buffer,
+    periodic_message_buffer_flush,
+)
 
 from open_webui.tasks import (
     list_task_ids_by_chat_id,
@@ -434,8 +440,14 @@ async def lifespan(app: FastAPI):
         get_license_data(app, LICENSE_KEY)
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_storage_accounting())
+    asyncio.create_task(periodic_message_buffer_flush())
+    asyncio.create_task(periodic_chat_cold_storage())
     yield
 
+    # Save the message updates of in-flight streams before exiting
+    message_buffer.flush()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -883,6 +895,7 @@ class RedirectMiddleware(BaseHTTPMiddleware):
 # Add the middleware to the app
 app.add_middleware(RedirectMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(AccessControlMiddleware)
 
 
 @app.middleware("http")
@@ -0,0 +1,143 @@
+"""Add usage_daily table
+
+Revision ID: 02de5f615862
+Revises: 3781e22d8b01
+Create Date: 2025-05-02 03:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "02de5f615862"
+down_revision = "3781e22d8b01"
+branch_labels = None
+depends_on = None
+
+DAY = 24 * 60 * 60
+IMAGE_CONTENT_TYPES = ["image/png", "image/jpeg", "image/gif", "image/webp"]
+
+
+def upgrade():
+    usage_daily = op.create_table(
+        "usage_daily",
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("day", sa.BigInteger(), nullable=False),
+        sa.Column("chats_created", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("files_uploaded", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("images_uploaded", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("knowledge_created", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("messages_sent", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("bytes_stored", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id", "day", name="pk_usage_daily_user_id_day"),
+    )
+    op.create_index("usage_daily_day_idx", "usage_daily", ["day"])
+
+    # Backfill the rollups from the existing rows
+    chat = table(
+        "chat",
+        column("id", sa.String()),
+        column("user_id", sa.String()),
+        column("created_at", sa.BigInteger()),
+    )
+    file = table(
+        "file",
+        column("id", sa.String()),
+        column("user_id", sa.String()),
+        column("meta", sa.JSON()),
+        column("created_at", sa.BigInteger()),
+    )
+    knowledge = table(
+        "knowledge",
+        column("id", sa.Text()),
+        column("user_id", sa.Text()),
+        column("created_at", sa.BigInteger()),
+    )
+    message = table(
+        "message",
+        column("id", sa.Text()),
+        column("user_id", sa.Text()),
+        column("created_at", sa.BigInteger()),  # time_ns
+    )
+
+    conn = op.get_bind()
+    rows = {}
+
+    def collect(query, counters):
+        for user_id, day, *values in conn.execute(query):
+            row = rows.setdefault((user_id, day), {"user_id": user_id, "day": day})
+            for counter, value in zip(counters, values):
+                row[counter] = int(value or 0)
+
+    day = ((chat.c.created_at // DAY) * DAY).label("day")
+    collect(
+        sa.select(chat.c.user_id, day, sa.func.count(chat.c.id))
+        .where(~chat.c.user_id.like("shared-%"))
+        .group_by(chat.c.user_id, day),
+        ["chats_created"],
+    )
+
+    day = ((file.c.created_at // DAY) * DAY).label("day")
+    collect(
+        sa.select(
+            file.c.user_id,
+            day,
+            sa.func.count(file.c.id),
+            sa.func.sum(
+                sa.case(
+                    (
+                        file.c.meta["content_type"]
+                        .as_string()
+                        .in_(IMAGE_CONTENT_TYPES),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ),
+            sa.func.sum(file.c.meta["size"].as_float()),
+        ).group_by(file.c.user_id, day),
+        ["files_uploaded", "images_uploaded", "bytes_stored"],
+    )
+
+    day = ((knowledge.c.created_at // DAY) * DAY).label("day")
+    collect(
+        sa.select(knowledge.c.user_id, day, sa.func.count(knowledge.c.id)).group_by(
+            knowledge.c.user_id, day
+        ),
+        ["knowledge_created"],
+    )
+
+    day = ((message.c.created_at // 1_000_000_000 // DAY) * DAY).label("day")
+    collect(
+        sa.select(message.c.user_id, day, sa.func.count(message.c.id)).group_by(
+            message.c.user_id, day
+        ),
+        ["messages_sent"],
+    )
+
+    counters = [
+        "chats_created",
+        "files_uploaded",
+        "images_uploaded",
+        "knowledge_created",
+        "messages_sent",
+        "bytes_stored",
+    ]
+    now = int(time.time())
+    op.bulk_insert(
+        usage_daily,
+        [
+            {**{c: 0 for c in counters}, **row, "updated_at": now}
+            for row in rows.values()
+            if row["user_id"] is not None and row["day"] is not None
+        ],
+    )
+
+
+def downgrade():
+    op.drop_index("usage_daily_day_idx", table_name="usage_daily")
+    op.drop_table("usage_daily")
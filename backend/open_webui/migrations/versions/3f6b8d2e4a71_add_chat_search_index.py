@@ -0,0 +1,80 @@
+"""Add full-text search index over chat titles and messages
+
+Revision ID: 3f6b8d2e4a71
+Revises: 9a3e7c5d1f80
+Create Date: 2025-05-10 03:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "3f6b8d2e4a71"
+down_revision = "9a3e7c5d1f80"
+branch_labels = None
+depends_on = None
+
+# (FTS table, source table, indexed column)
+SQLITE_INDEXES = [
+    ("chat_message_fts", "chat_message", "content"),
+    ("chat_title_fts", "chat", "title"),
+]
+
+# (index name, table, indexed column)
+POSTGRESQL_INDEXES = [
+    ("chat_message_content_fts_idx", "chat_message", "content"),
+    ("chat_title_fts_idx", "chat", "title"),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        # External content FTS5 tables, kept in sync by triggers on the source
+        for fts, source, column in SQLITE_INDEXES:
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"{column}, content='{source}', content_rowid='rowid', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.rowid, new.{column}); "
+                "END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) "
+                f"VALUES ('delete', old.rowid, old.{column}); "
+                "END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column} ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) "
+                f"VALUES ('delete', old.rowid, old.{column}); "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.rowid, new.{column}); "
+                "END"
+            )
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    elif dialect == "postgresql":
+        # Expression indexes, maintained by PostgreSQL itself
+        for name, table, column in POSTGRESQL_INDEXES:
+            op.execute(
+                f"CREATE INDEX {name} ON {table} "
+                f"USING GIN (to_tsvector('simple', coalesce({column}, '')))"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        for fts, _, _ in SQLITE_INDEXES:
+            for trigger in ["ai", "ad", "au"]:
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+
+    elif dialect == "postgresql":
+        for name, table, _ in POSTGRESQL_INDEXES:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,54 @@
+"""Add group_member table
+
+Revision ID: 4d8f3a6b2c15
+Revises: e5a91c3f0b27
+Create Date: 2025-05-08 03:00:00.000000
+
+"""
+
+import json
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "4d8f3a6b2c15"
+down_revision = "e5a91c3f0b27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    group_member = op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id", name="pk_group_member"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    # Backfill the memberships from the user_ids JSON column
+    group = table(
+        "group",
+        column("id", sa.Text()),
+        column("user_ids", sa.JSON()),
+    )
+
+    conn = op.get_bind()
+    now = int(time.time())
+    rows = []
+    for id, user_ids in conn.execute(sa.select(group.c.id, group.c.user_ids)):
+        if isinstance(user_ids, str):
+            user_ids = json.loads(user_ids)
+        for user_id in dict.fromkeys(user_ids or []):
+            rows.append({"group_id": id, "user_id": user_id, "created_at": now})
+
+    if rows:
+        op.bulk_insert(group_member, rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
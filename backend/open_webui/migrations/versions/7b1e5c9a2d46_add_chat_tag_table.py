@@ -0,0 +1,73 @@
+"""Add chat_tag table
+
+Revision ID: 7b1e5c9a2d46
+Revises: c2d9e4f7a815
+Create Date: 2025-05-12 03:00:00.000000
+
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "7b1e5c9a2d46"
+down_revision = "c2d9e4f7a815"
+branch_labels = None
+depends_on = None
+
+# Chats read per round trip
+BATCH_SIZE = 1000
+
+chat = table(
+    "chat",
+    column("id", sa.Text()),
+    column("user_id", sa.Text()),
+    column("meta", sa.JSON()),
+)
+
+
+def upgrade():
+    chat_tag = op.create_table(
+        "chat_tag",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("tag_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("chat_id", "tag_id", name="pk_chat_tag"),
+    )
+
+    # Copy the tags out of chat.meta, which keeps them as well
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(chat.c.id, chat.c.user_id, chat.c.meta).order_by(chat.c.id)
+        if last_id is not None:
+            query = query.where(chat.c.id > last_id)
+        batch = conn.execute(query.limit(BATCH_SIZE)).all()
+        if not batch:
+            break
+
+        rows = []
+        for id, user_id, meta in batch:
+            if isinstance(meta, str):
+                meta = json.loads(meta)
+            tags = (meta or {}).get("tags")
+            if not isinstance(tags, list):
+                continue
+            rows.extend(
+                {"chat_id": id, "tag_id": tag, "user_id": user_id or ""}
+                for tag in dict.fromkeys(tags)
+                if isinstance(tag, str)
+            )
+
+        if rows:
+            op.bulk_insert(chat_tag, rows)
+        last_id = batch[-1][0]
+
+    op.create_index("chat_tag_user_id_tag_id_idx", "chat_tag", ["user_id", "tag_id"])
+
+
+def downgrade():
+    op.drop_index("chat_tag_user_id_tag_id_idx", table_name="chat_tag")
+    op.drop_table("chat_tag")
@@ -0,0 +1,32 @@
+"""Add storage_usage table
+
+Revision ID: 7c4e2b9a1d63
+Revises: b81b392f7e88
+Create Date: 2025-05-06 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "7c4e2b9a1d63"
+down_revision = "b81b392f7e88"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by the first storage accounting pass, see open_webui.utils.storage_usage
+    op.create_table(
+        "storage_usage",
+        sa.Column("user_id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("chat_bytes", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("message_bytes", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("file_bytes", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("vector_bytes", sa.BigInteger(), nullable=False, default=0),
+        sa.Column("measured_at", sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("storage_usage")
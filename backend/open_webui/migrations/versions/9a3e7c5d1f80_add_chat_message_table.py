@@ -0,0 +1,162 @@
+"""Add chat_message table
+
+Revision ID: 9a3e7c5d1f80
+Revises: 4d8f3a6b2c15
+Create Date: 2025-05-09 03:00:00.000000
+
+"""
+
+import json
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "9a3e7c5d1f80"
+down_revision = "4d8f3a6b2c15"
+branch_labels = None
+depends_on = None
+
+# Chats converted per round trip
+BATCH_SIZE = 100
+
+COLUMN_FIELDS = {"id", "parentId", "role", "content", "model"}
+
+chat = table(
+    "chat",
+    column("id", sa.Text()),
+    column("chat", sa.JSON()),
+)
+
+
+def iter_chats(conn):
+    last_id = None
+    while True:
+        query = sa.select(chat.c.id, chat.c.chat).order_by(chat.c.id)
+        if last_id is not None:
+            query = query.where(chat.c.id > last_id)
+        batch = conn.execute(query.limit(BATCH_SIZE)).all()
+        if not batch:
+            return
+
+        for id, document in batch:
+            if isinstance(document, str):
+                document = json.loads(document)
+            yield id, document or {}
+        last_id = batch[-1][0]
+
+
+def get_branch(messages, message_id):
+    branch = []
+    message = messages.get(message_id) if message_id else None
+    while message and len(branch) < len(messages):
+        branch.insert(0, message)
+        parent_id = message.get("parentId")
+        message = messages.get(parent_id) if parent_id else None
+    return branch
+
+
+def upgrade():
+    chat_message = op.create_table(
+        "chat_message",
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("parent_id", sa.Text(), nullable=True),
+        sa.Column("role", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("model", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id", name="pk_chat_message"),
+    )
+
+    # Move the history messages out of the chat JSON, one row per message
+    conn = op.get_bind()
+    now = int(time.time())
+    for id, document in iter_chats(conn):
+        history = document.get("history")
+        if not isinstance(history, dict) or not isinstance(
+            history.get("messages"), dict
+        ):
+            continue
+
+        rows = []
+        for message_id, message in history["messages"].items():
+            message = message or {}
+            content = message.get("content")
+            data = {k: v for k, v in message.items() if k not in COLUMN_FIELDS}
+            if content is not None and not isinstance(content, str):
+                data["content"] = content
+                content = None
+            try:
+                created_at = int(message.get("timestamp") or now)
+            except (TypeError, ValueError):
+                created_at = now
+
+            rows.append(
+                {
+                    "id": message_id,
+                    "chat_id": id,
+                    "parent_id": message.get("parentId"),
+                    "role": message.get("role"),
+                    "content": content,
+                    "model": message.get("model"),
+                    "data": data,
+                    "created_at": created_at,
+                    "updated_at": now,
+                }
+            )
+
+        if rows:
+            op.bulk_insert(chat_message, rows)
+
+        document = {k: v for k, v in document.items() if k != "messages"}
+        document["history"] = {k: v for k, v in history.items() if k != "messages"}
+        conn.execute(sa.update(chat).where(chat.c.id == id).values(chat=document))
+
+
+def downgrade():
+    chat_message = table(
+        "chat_message",
+        column("id", sa.Text()),
+        column("chat_id", sa.Text()),
+        column("parent_id", sa.Text()),
+        column("role", sa.Text()),
+        column("content", sa.Text()),
+        column("model", sa.Text()),
+        column("data", sa.JSON()),
+        column("created_at", sa.BigInteger()),
+    )
+
+    # Embed the messages back into the chat JSON
+    conn = op.get_bind()
+    for id, document in iter_chats(conn):
+        history = document.get("history")
+        if not isinstance(history, dict):
+            continue
+
+        messages = {}
+        for row in conn.execute(
+            sa.select(chat_message)
+            .where(chat_message.c.chat_id == id)
+            .order_by(chat_message.c.created_at)
+        ):
+            data = row.data
+            if isinstance(data, str):
+                data = json.loads(data)
+            message = {"id": row.id, "parentId": row.parent_id, **(data or {})}
+            for key in ["role", "content", "model"]:
+                if getattr(row, key) is not None:
+                    message[key] = getattr(row, key)
+            messages[row.id] = message
+
+        document = {
+            **document,
+            "history": {**history, "messages": messages},
+            "messages": get_branch(messages, history.get("currentId")),
+        }
+        conn.execute(sa.update(chat).where(chat.c.id == id).values(chat=document))
+
+    op.drop_table("chat_message")
@@ -0,0 +1,85 @@
+"""Add cold_chat table
+
+Revision ID: a4c8e2f6b913
+Revises: 7b1e5c9a2d46
+Create Date: 2025-05-13 03:00:00.000000
+
+"""
+
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "a4c8e2f6b913"
+down_revision = "7b1e5c9a2d46"
+branch_labels = None
+depends_on = None
+
+# Cold chats moved back per round trip on downgrade
+BATCH_SIZE = 100
+
+
+def upgrade():
+    op.create_table(
+        "cold_chat",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("codec", sa.Text(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id"),
+    )
+
+
+def downgrade():
+    chat = table("chat", column("id", sa.Text()), column("chat", sa.JSON()))
+    chat_message = table(
+        "chat_message",
+        column("id", sa.Text()),
+        column("chat_id", sa.Text()),
+        column("parent_id", sa.Text()),
+        column("role", sa.Text()),
+        column("content", sa.Text()),
+        column("model", sa.Text()),
+        column("data", sa.JSON()),
+        column("created_at", sa.BigInteger()),
+        column("updated_at", sa.BigInteger()),
+    )
+    cold_chat = table(
+        "cold_chat",
+        column("chat_id", sa.Text()),
+        column("codec", sa.Text()),
+        column("data", sa.LargeBinary()),
+    )
+
+    # Move the cold chats back to the hot tables
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(cold_chat).order_by(cold_chat.c.chat_id)
+        if last_id is not None:
+            query = query.where(cold_chat.c.chat_id > last_id)
+        batch = conn.execute(query.limit(BATCH_SIZE)).all()
+        if not batch:
+            break
+
+        for chat_id, codec, data in batch:
+            if codec == "zstd":
+                import zstandard
+
+                data = zstandard.ZstdDecompressor().decompress(data)
+            else:
+                data = zlib.decompress(data)
+
+            payload = json.loads(data)
+            if payload["messages"]:
+                conn.execute(sa.insert(chat_message), payload["messages"])
+            conn.execute(
+                sa.update(chat).where(chat.c.id == chat_id).values(chat=payload["chat"])
+            )
+        last_id = batch[-1][0]
+
+    op.drop_table("cold_chat")
@@ -0,0 +1,45 @@
+"""Add content_type and size columns to file table
+
+Revision ID: b81b392f7e88
+Revises: 02de5f615862
+Create Date: 2025-05-05 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "b81b392f7e88"
+down_revision = "02de5f615862"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("file", sa.Column("content_type", sa.Text(), nullable=True))
+    op.add_column("file", sa.Column("size", sa.BigInteger(), nullable=True))
+
+    # Backfill both columns from the meta JSON in a single statement
+    file = table(
+        "file",
+        column("meta", sa.JSON()),
+        column("content_type", sa.Text()),
+        column("size", sa.BigInteger()),
+    )
+    op.execute(
+        sa.update(file).values(
+            content_type=file.c.meta["content_type"].as_string(),
+            size=sa.cast(file.c.meta["size"].as_float(), sa.BigInteger()),
+        )
+    )
+
+    op.create_index("ix_file_content_type", "file", ["content_type"])
+    op.create_index("ix_file_size", "file", ["size"])
+
+
+def downgrade():
+    op.drop_index("ix_file_size", table_name="file")
+    op.drop_index("ix_file_content_type", table_name="file")
+    op.drop_column("file", "size")
+    op.drop_column("file", "content_type")
@@ -0,0 +1,32 @@
+"""Add index for keyset pagination of chat lists
+
+Revision ID: c2d9e4f7a815
+Revises: 3f6b8d2e4a71
+Create Date: 2025-05-11 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "c2d9e4f7a815"
+down_revision = "3f6b8d2e4a71"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Unpinned chats are listed with pinned = false, which older rows left unset
+    chat = table("chat", column("pinned", sa.Boolean()))
+    op.execute(sa.update(chat).where(chat.c.pinned.is_(None)).values(pinned=sa.false()))
+
+    op.create_index(
+        "chat_user_id_list_idx",
+        "chat",
+        ["user_id", "archived", "pinned", "folder_id", "updated_at", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("chat_user_id_list_idx", table_name="chat")
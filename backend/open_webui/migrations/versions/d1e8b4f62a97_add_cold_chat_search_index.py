@@ -0,0 +1,118 @@
+"""Add full-text search index over cold chat messages
+
+Revision ID: d1e8b4f62a97
+Revises: a4c8e2f6b913
+Create Date: 2025-05-14 03:00:00.000000
+
+"""
+
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "d1e8b4f62a97"
+down_revision = "a4c8e2f6b913"
+branch_labels = None
+depends_on = None
+
+# Cold chats read per round trip
+BATCH_SIZE = 100
+
+FTS = "cold_chat_fts"
+POSTGRESQL_INDEX = "cold_chat_content_fts_idx"
+
+
+def get_content(codec, data):
+    if codec == "zstd":
+        import zstandard
+
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = zlib.decompress(data)
+
+    return "\n".join(
+        message["content"]
+        for message in json.loads(data)["messages"]
+        if isinstance(message.get("content"), str)
+    )
+
+
+def upgrade():
+    op.add_column("cold_chat", sa.Column("content", sa.Text(), nullable=True))
+
+    # Keep the message text of the chats already in cold storage searchable
+    cold_chat = table(
+        "cold_chat",
+        column("chat_id", sa.Text()),
+        column("codec", sa.Text()),
+        column("data", sa.LargeBinary()),
+        column("content", sa.Text()),
+    )
+    conn = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(cold_chat.c.chat_id, cold_chat.c.codec, cold_chat.c.data)
+        if last_id is not None:
+            query = query.where(cold_chat.c.chat_id > last_id)
+        batch = conn.execute(query.order_by(cold_chat.c.chat_id).limit(BATCH_SIZE)).all()
+        if not batch:
+            break
+
+        for chat_id, codec, data in batch:
+            conn.execute(
+                sa.update(cold_chat)
+                .where(cold_chat.c.chat_id == chat_id)
+                .values(content=get_content(codec, data))
+            )
+        last_id = batch[-1][0]
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        # Same external content FTS5 setup as the chat_message_fts table
+        op.execute(
+            f"CREATE VIRTUAL TABLE {FTS} USING fts5("
+            "content, content='cold_chat', content_rowid='rowid', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {FTS}_ai AFTER INSERT ON cold_chat BEGIN "
+            f"INSERT INTO {FTS}(rowid, content) VALUES (new.rowid, new.content); "
+            "END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {FTS}_ad AFTER DELETE ON cold_chat BEGIN "
+            f"INSERT INTO {FTS}({FTS}, rowid, content) "
+            "VALUES ('delete', old.rowid, old.content); "
+            "END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {FTS}_au AFTER UPDATE OF content ON cold_chat BEGIN "
+            f"INSERT INTO {FTS}({FTS}, rowid, content) "
+            "VALUES ('delete', old.rowid, old.content); "
+            f"INSERT INTO {FTS}(rowid, content) VALUES (new.rowid, new.content); "
+            "END"
+        )
+        op.execute(f"INSERT INTO {FTS}({FTS}) VALUES ('rebuild')")
+
+    elif dialect == "postgresql":
+        op.execute(
+            f"CREATE INDEX {POSTGRESQL_INDEX} ON cold_chat "
+            "USING GIN (to_tsvector('simple', coalesce(content, '')))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        for trigger in ["ai", "ad", "au"]:
+            op.execute(f"DROP TRIGGER IF EXISTS {FTS}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS}")
+
+    elif dialect == "postgresql":
+        op.drop_index(POSTGRESQL_INDEX, table_name="cold_chat")
+
+    op.drop_column("cold_chat", "content")
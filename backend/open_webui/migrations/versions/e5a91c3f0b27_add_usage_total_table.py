@@ -0,0 +1,99 @@
+"""Add usage_total table and dashboard sort indexes
+
+Revision ID: e5a91c3f0b27
+Revises: 7c4e2b9a1d63
+Create Date: 2025-05-07 03:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "e5a91c3f0b27"
+down_revision = "7c4e2b9a1d63"
+branch_labels = None
+depends_on = None
+
+COUNTERS = [
+    "chats_created",
+    "files_uploaded",
+    "images_uploaded",
+    "knowledge_created",
+    "messages_sent",
+    "bytes_stored",
+]
+MEASURES = ["chat_bytes", "message_bytes", "file_bytes", "vector_bytes"]
+
+
+def upgrade():
+    op.create_table(
+        "usage_total",
+        sa.Column("user_id", sa.Text(), nullable=False, primary_key=True),
+        *[
+            sa.Column(counter, sa.BigInteger(), nullable=False, default=0)
+            for counter in COUNTERS
+        ],
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "usage_total_chats_created_idx", "usage_total", ["chats_created", "user_id"]
+    )
+    op.create_index(
+        "usage_total_messages_sent_idx", "usage_total", ["messages_sent", "user_id"]
+    )
+
+    # Backfill the totals from the daily rollups in a single statement
+    usage_daily = table(
+        "usage_daily",
+        column("user_id", sa.Text()),
+        *[column(counter, sa.BigInteger()) for counter in COUNTERS],
+    )
+    usage_total = table(
+        "usage_total",
+        column("user_id", sa.Text()),
+        *[column(counter, sa.BigInteger()) for counter in COUNTERS],
+        column("updated_at", sa.BigInteger()),
+    )
+    op.execute(
+        usage_total.insert().from_select(
+            ["user_id", *COUNTERS, "updated_at"],
+            sa.select(
+                usage_daily.c.user_id,
+                *[sa.func.sum(usage_daily.c[counter]) for counter in COUNTERS],
+                sa.literal(int(time.time()), sa.BigInteger()),
+            ).group_by(usage_daily.c.user_id),
+        )
+    )
+
+    op.add_column(
+        "storage_usage",
+        sa.Column("total_bytes", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    storage_usage = table(
+        "storage_usage",
+        *[column(measure, sa.BigInteger()) for measure in [*MEASURES, "total_bytes"]],
+    )
+    op.execute(
+        sa.update(storage_usage).values(
+            total_bytes=sum(storage_usage.c[measure] for measure in MEASURES)
+        )
+    )
+    op.create_index(
+        "storage_usage_total_bytes_idx", "storage_usage", ["total_bytes", "user_id"]
+    )
+
+    op.create_index("user_last_active_at_idx", "user", ["last_active_at", "id"])
+
+
+def downgrade():
+    op.drop_index("user_last_active_at_idx", table_name="user")
+
+    op.drop_index("storage_usage_total_bytes_idx", table_name="storage_usage")
+    op.drop_column("storage_usage", "total_bytes")
+
+    op.drop_index("usage_total_messages_sent_idx", table_name="usage_total")
+    op.drop_index("usage_total_chats_created_idx", table_name="usage_total")
+    op.drop_table("usage_total")
@@ -0,0 +1,397 @@
+import json
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    JSON,
+    PrimaryKeyConstraint,
+    Text,
+    cast,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Chat ids per IN (...) query when loading the messages of many chats
+BATCH_SIZE = 500
+
+####################
+# Chat Message DB Schema
+#
+# One row per message of a chat's history tree. The `chat.chat` JSON keeps the
+# rest of the document (title, models, params, history.currentId, ...) while
+# `history.messages` and the flat `messages` list are assembled from these rows
+# when a chat is read, see `hydrate_chat`.
+#
+# A chat can also be read with only one branch of its tree loaded, see
+# `get_chat_branch`. Its history is then marked as partial and lists the
+# sibling ids of each loaded message, so clients can load the other branches
+# on demand. Saving a partial history back only writes the messages it holds.
+####################
+
+# History keys that are only present in responses and never stored
+RESPONSE_HISTORY_KEYS = {"messages", "partial", "siblingIds"}
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    # Message ids are generated by the client and are copied along with shared
+    # chats, so they are only unique within a chat
+    id = Column(Text, nullable=False)
+    chat_id = Column(Text, nullable=False)
+
+    parent_id = Column(Text, nullable=True)
+    role = Column(Text)
+    content = Column(Text)
+    model = Column(Text, nullable=True)
+
+    # Every other message field (childrenIds, timestamp, files, statusHistory, ...)
+    data = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    # The primary key leads with chat_id and doubles as its index
+    __table_args__ = (PrimaryKeyConstraint("chat_id", "id", name="pk_chat_message"),)
+
+
+class ChatMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    chat_id: str
+
+    parent_id: Optional[str] = None
+    role: Optional[str] = None
+    content: Optional[str] = None
+    model: Optional[str] = None
+    data: Optional[dict] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+####################
+# Conversions
+####################
+
+COLUMN_FIELDS = {"id", "parentId", "role", "content", "model"}
+
+
+def _get_timestamp(message: dict, default: int) -> int:
+    try:
+        return int(message.get("timestamp") or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def message_to_row(chat_id: str, id: str, message: dict, now: int) -> dict:
+    content = message.get("content")
+    data = {k: v for k, v in message.items() if k not in COLUMN_FIELDS}
+    if content is not None and not isinstance(content, str):
+        data["content"] = content
+        content = None
+
+    return {
+        "id": id,
+        "chat_id": chat_id,
+        "parent_id": message.get("parentId"),
+        "role": message.get("role"),
+        "content": content,
+        "model": message.get("model"),
+        "data": data,
+        "created_at": _get_timestamp(message, now),
+        "updated_at": now,
+    }
+
+
+def row_to_message(row: ChatMessage) -> dict:
+    message = {"id": row.id, "parentId": row.parent_id, **(row.data or {})}
+    if row.role is not None:
+        message["role"] = row.role
+    if row.content is not None:
+        message["content"] = row.content
+    if row.model is not None:
+        message["model"] = row.model
+    return message
+
+
+def split_chat(chat: dict) -> tuple[dict, Optional[dict]]:
+    """
+    Separate the history messages from a chat document. Returns the document to
+    store in `chat.chat` and the messages keyed by id, or None when the document
+    has no history (legacy chats are stored unchanged).
+    """
+    history = chat.get("history")
+    if not isinstance(history, dict) or not isinstance(history.get("messages"), dict):
+        return chat, None
+
+    chat = {k: v for k, v in chat.items() if k != "messages"}
+    chat["history"] = {
+        k: v for k, v in history.items() if k not in RESPONSE_HISTORY_KEYS
+    }
+    return chat, history["messages"]
+
+
+def is_partial_chat(chat: dict) -> bool:
+    """Whether the history of a chat document holds only some of its messages."""
+    history = chat.get("history")
+    return isinstance(history, dict) and bool(history.get("partial"))
+
+
+def get_branch(messages: dict, message_id: Optional[str]) -> list[dict]:
+    """Messages from the root of the tree down to `message_id`."""
+    branch = []
+    message = messages.get(message_id) if message_id else None
+    while message and len(branch) < len(messages):
+        branch.insert(0, message)
+        parent_id = message.get("parentId")
+        message = messages.get(parent_id) if parent_id else None
+    return branch
+
+
+def hydrate_chat(
+    chat: dict,
+    messages: dict,
+    sibling_ids: Optional[dict] = None,
+    current_id: Optional[str] = None,
+) -> dict:
+    """
+    Inverse of `split_chat`: the document in the shape clients expect. With
+    `sibling_ids`, `messages` is a single branch and the history is partial.
+    """
+    history = chat.get("history")
+    if not isinstance(history, dict):
+        return chat
+
+    history = {**history, "messages": messages}
+    if current_id is not None:
+        history["currentId"] = current_id
+    if sibling_ids is not None:
+        history["partial"] = True
+        history["siblingIds"] = sibling_ids
+
+    return {
+        **chat,
+        "history": history,
+        "messages": get_branch(messages, history.get("currentId")),
+    }
+
+
+####################
+# Queries
+#
+# These take the caller's session so that chat and message writes are committed
+# together.
+####################
+
+
+def get_chat_messages(db: Session, chat_ids: list[str]) -> dict[str, dict]:
+    """Messages keyed by id for each of `chat_ids`, in creation order."""
+    messages: dict[str, dict] = {chat_id: {} for chat_id in chat_ids}
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        for row in (
+            db.query(ChatMessage)
+            .filter(ChatMessage.chat_id.in_(chat_ids[i : i + BATCH_SIZE]))
+            .order_by(ChatMessage.chat_id, ChatMessage.created_at)
+            .all()
+        ):
+            messages[row.chat_id][row.id] = row_to_message(row)
+    return messages
+
+
+def get_chat_branch(
+    db: Session, chat_id: str, message_id: Optional[str], to_leaf: bool = False
+) -> tuple[dict, dict]:
+    """
+    The messages from the root of the tree down to `message_id` (and on to its
+    latest leaf with `to_leaf`), and the sibling ids of each of them. Only the
+    ids and parent ids of the other messages are read.
+    """
+    tree = (
+        db.query(ChatMessage.id, ChatMessage.parent_id)
+        .filter(ChatMessage.chat_id == chat_id)
+        .order_by(ChatMessage.created_at)
+        .all()
+    )
+    parent_ids = {id: parent_id for id, parent_id in tree}
+    children_ids: dict[Optional[str], list[str]] = {}
+    for id, parent_id in tree:
+        children_ids.setdefault(
+            parent_id if parent_id in parent_ids else None, []
+        ).append(id)
+
+    path = []
+    id = message_id
+    while id in parent_ids and len(path) < len(tree):
+        path.insert(0, id)
+        id = parent_ids[id]
+
+    if to_leaf:
+        while path and children_ids.get(path[-1]) and len(path) < len(tree):
+            path.append(children_ids[path[-1]][-1])
+
+    rows = {}
+    for i in range(0, len(path), BATCH_SIZE):
+        for row in db.query(ChatMessage).filter(
+            ChatMessage.chat_id == chat_id,
+            ChatMessage.id.in_(path[i : i + BATCH_SIZE]),
+        ):
+            rows[row.id] = row
+
+    messages = {id: row_to_message(rows[id]) for id in path if id in rows}
+    sibling_ids = {
+        id: children_ids.get(
+            parent_ids[id] if parent_ids[id] in parent_ids else None, []
+        )
+        for id in messages
+    }
+    return messages, sibling_ids
+
+
+def get_chat_message(db: Session, chat_id: str, id: str) -> Optional[ChatMessage]:
+    return db.get(ChatMessage, (chat_id, id))
+
+
+def set_chat_message(db: Session, chat_id: str, id: str, message: dict):
+    """Insert or replace a single message."""
+    db.merge(ChatMessage(**message_to_row(chat_id, id, message, int(time.time()))))
+
+
+def set_chat_messages(db: Session, chat_id: str, messages: dict, partial: bool = False):
+    """
+    Make the stored messages of a chat equal to `messages`, writing only the
+    rows that were added, changed or removed. With `partial`, messages missing
+    from `messages` are kept.
+    """
+    now = int(time.time())
+    query = db.query(ChatMessage).filter(ChatMessage.chat_id == chat_id)
+    if partial:
+        rows = {}
+        ids = list(messages)
+        for i in range(0, len(ids), BATCH_SIZE):
+            for row in query.filter(ChatMessage.id.in_(ids[i : i + BATCH_SIZE])):
+                rows[row.id] = row
+    else:
+        rows = {row.id: row for row in query.all()}
+
+    for id, message in messages.items():
+        row = rows.pop(id, None)
+        values = message_to_row(chat_id, id, message, now)
+        if row is None:
+            db.add(ChatMessage(**values))
+        elif row_to_message(row) != row_to_message(ChatMessage(**values)):
+            for key, value in values.items():
+                if key != "created_at":
+                    setattr(row, key, value)
+
+    if rows:
+        delete_chat_messages(db, [chat_id], message_ids=list(rows))
+
+
+def _append_status_history(db: Session, statuses: list[dict]):
+    """`data` with `statuses` appended to its statusHistory list, in SQL."""
+    if db.bind.dialect.name == "sqlite":
+        return func.json_set(
+            func.coalesce(ChatMessage.data, literal_column("'{}'")),
+            "$.statusHistory",
+            func.json_insert(
+                func.coalesce(
+                    func.json_extract(ChatMessage.data, "$.statusHistory"), "[]"
+                ),
+                *[
+                    arg
+                    for status in statuses
+                    for arg in ("$[#]", func.json(json.dumps(status)))
+                ],
+            ),
+        )
+    elif db.bind.dialect.name == "postgresql":
+        data = cast(ChatMessage.data, JSONB)
+        return cast(
+            func.jsonb_set(
+                func.coalesce(data, literal_column("'{}'::jsonb")),
+                literal_column("'{statusHistory}'"),
+                func.coalesce(data["statusHistory"], literal_column("'[]'::jsonb")).op(
+                    "||"
+                )(cast(literal(json.dumps(statuses)), JSONB)),
+            ),
+            JSON,
+        )
+    else:
+        raise NotImplementedError(f"Unsupported dialect: {db.bind.dialect.name}")
+
+
+def append_chat_message(
+    db: Session,
+    chat_id: str,
+    id: str,
+    content: str = "",
+    statuses: Optional[list[dict]] = None,
+) -> bool:
+    """
+    Append to the content and statusHistory of a message with a single UPDATE,
+    without reading it. Returns False if the message does not exist.
+    """
+    values = {"updated_at": int(time.time())}
+    if content:
+        values["content"] = func.coalesce(ChatMessage.content, "") + content
+    if statuses:
+        values["data"] = _append_status_history(db, statuses)
+
+    result = db.execute(
+        update(ChatMessage)
+        .where(ChatMessage.chat_id == chat_id, ChatMessage.id == id)
+        .values(**values)
+    )
+    return result.rowcount > 0
+
+
+def copy_chat_messages(db: Session, from_chat_id: str, to_chat_id: str):
+    """Replace the messages of `to_chat_id` with copies of `from_chat_id`'s."""
+    delete_chat_messages(db, [to_chat_id])
+
+    columns = [column.name for column in ChatMessage.__table__.columns]
+    db.execute(
+        insert(ChatMessage).from_select(
+            columns,
+            select(
+                *[
+                    (
+                        literal(to_chat_id).label(column)
+                        if column == "chat_id"
+                        else getattr(ChatMessage, column)
+                    )
+                    for column in columns
+                ]
+            ).where(ChatMessage.chat_id == from_chat_id),
+        )
+    )
+
+
+def delete_chat_messages(
+    db: Session, chat_ids: list[str], message_ids: Optional[list[str]] = None
+):
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        query = db.query(ChatMessage).filter(
+            ChatMessage.chat_id.in_(chat_ids[i : i + BATCH_SIZE])
+        )
+        if message_ids is not None:
+            query = query.filter(ChatMessage.id.in_(message_ids))
+        query.delete(synchronize_session=False)
@@ -0,0 +1,73 @@
+from open_webui.internal.db import Base
+
+from sqlalchemy import Column, Index, PrimaryKeyConstraint, Text, exists, insert
+from sqlalchemy.orm import Session
+
+# Chat ids per IN (...) query when deleting the tags of many chats
+BATCH_SIZE = 500
+
+####################
+# Chat Tag DB Schema
+#
+# One row per tag of a chat, mirroring the `tags` list of `chat.meta` so that
+# filtering and counting chats by tag are index lookups instead of scans of the
+# meta JSON. `chat.meta.tags` stays the list returned to clients; both are
+# written together by `set_chat_tags`.
+####################
+
+
+class ChatTag(Base):
+    __tablename__ = "chat_tag"
+
+    chat_id = Column(Text, nullable=False)
+    tag_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "tag_id", name="pk_chat_tag"),
+        Index("chat_tag_user_id_tag_id_idx", "user_id", "tag_id"),
+    )
+
+
+def get_tag_ids(meta: dict) -> list[str]:
+    """The distinct tag ids in the `tags` list of a chat's meta."""
+    tags = (meta or {}).get("tags")
+    if not isinstance(tags, list):
+        return []
+    return list(dict.fromkeys(tag for tag in tags if isinstance(tag, str)))
+
+
+def has_chat_tag(chat_id, tag_id=None):
+    """Filter for chats (by their `chat_id` column) having `tag_id`, or any tag."""
+    query = exists().where(ChatTag.chat_id == chat_id)
+    if tag_id is not None:
+        query = query.where(ChatTag.tag_id == tag_id)
+    return query
+
+
+def set_chat_tags(db: Session, chat_id: str, user_id: str, tag_ids: list[str]):
+    """Make the tag rows of a chat equal to `tag_ids`."""
+    existing = {
+        tag_id
+        for (tag_id,) in db.query(ChatTag.tag_id).filter(ChatTag.chat_id == chat_id)
+    }
+    removed = existing - set(tag_ids)
+    if removed:
+        db.query(ChatTag).filter(
+            ChatTag.chat_id == chat_id, ChatTag.tag_id.in_(removed)
+        ).delete(synchronize_session=False)
+
+    rows = [
+        {"chat_id": chat_id, "tag_id": tag_id, "user_id": user_id}
+        for tag_id in dict.fromkeys(tag_ids)
+        if tag_id not in existing
+    ]
+    if rows:
+        db.execute(insert(ChatTag), rows)
+
+
+def delete_chat_tags(db: Session, chat_ids: list[str]):
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        db.query(ChatTag).filter(
+            ChatTag.chat_id.in_(chat_ids[i : i + BATCH_SIZE])
+        ).delete(synchronize_session=False)
@@ -1,16 +1,51 @@
+import html
 import logging
 import json
+import re
 import time
 import uuid
-from typing import Optional
+from typing import Iterator, Optional
 
 from open_webui.internal.db import Base, get_db
+from open_webui.models.chat_messages import (
+    ChatMessage,
+    append_chat_message,
+    copy_chat_messages,
+    delete_chat_messages,
+    get_chat_branch,
+    get_chat_message,
+    get_chat_messages,
+    hydrate_chat,
+    is_partial_chat,
+    message_to_row,
+    row_to_message,
+    set_chat_message,
+    set_chat_messages,
+    split_chat,
+)
+from open_webui.models.chat_tags import (
+    ChatTag,
+    delete_chat_tags,
+    get_tag_ids,
+    has_chat_tag,
+    set_chat_tags,
+)
+from open_webui.models.cold_chats import (
+    ColdChat,
+    delete_cold_chats,
+    freeze_chats,
+    get_cold_chat,
+    get_cold_chats,
+    is_cold_chat,
+    thaw_chat,
+)
 from open_webui.models.tags import TagModel, Tag, Tags
+from open_webui.models.usage import Usage
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import BigInteger, Boolean, Column, Float, Index, String, Text, JSON
+from sqlalchemy import or_, func, select, and_, text, bindparam, insert, tuple_
 from sqlalchemy.sql import exists
 
 ####################
@@ -20,6 +55,15 @@ from sqlalchemy.sql import exists
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
+# Chats read per round trip when streaming exports
+EXPORT_BATCH_SIZE = 100
+
+# Chats written per transaction by bulk imports
+IMPORT_BATCH_SIZE = 100
+
+# Chats moved per transaction to cold storage
+COLD_STORAGE_BATCH_SIZE = 100
+
 
 class Chat(Base):
     __tablename__ = "chat"
@@ -39,6 +83,19 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    # Keyset pagination of the chat lists, newest first
+    __table_args__ = (
+        Index(
+            "chat_user_id_list_idx",
+            "user_id",
+            "archived",
+            "pinned",
+            "folder_id",
+            "updated_at",
+            "id",
+        ),
+    )
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -74,6 +131,10 @@ class ChatImportForm(ChatForm):
     folder_id: Optional[str] = None
 
 
+class ChatBulkImportForm(ChatImportForm):
+    folder: Optional[str] = None  # name of a top-level folder, created if missing
+
+
 class ChatTitleMessagesForm(BaseModel):
     title: str
     messages: list[dict]
@@ -104,7 +165,222 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+class ChatSearchResponse(ChatTitleIdResponse):
+    # Excerpt of the best matching message, with the matches wrapped in <mark>
+    snippet: Optional[str] = None
+
+
+####################
+# Full-text search
+#
+# Chat titles and message contents are indexed by the chat_title_fts and
+# chat_message_fts FTS5 tables on SQLite and by GIN indexes over
+# to_tsvector('simple', ...) on PostgreSQL. Both are kept in sync by the
+# database on every chat and message write. The messages of cold chats are
+# searched through the `content` of their cold_chat row (cold_chat_fts).
+####################
+
+# Title matches rank above message matches of the same relevance
+SEARCH_TITLE_WEIGHT = 2
+
+SEARCH_SNIPPET_WORDS = 24
+
+# Delimiters of the matches in snippets, replaced once the snippet is escaped
+SEARCH_MATCH_START = "\x02"
+SEARCH_MATCH_END = "\x03"
+
+
+def get_search_query(db, search_text: str) -> Optional[str]:
+    """Full-text query for chats containing every word of `search_text` as a prefix."""
+    terms = re.findall(r"\w+", search_text)
+    if not terms:
+        return None
+
+    if db.bind.dialect.name == "sqlite":
+        return " ".join(f'"{term}"*' for term in terms)
+    elif db.bind.dialect.name == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    else:
+        raise NotImplementedError(f"Unsupported dialect: {db.bind.dialect.name}")
+
+
+def _get_search_matches(db, search_query: str):
+    """(chat_id, rank) of every matching title and message, lower ranks first."""
+    if db.bind.dialect.name == "sqlite":
+        sql = f"""
+            SELECT chat_message.chat_id AS chat_id, bm25(chat_message_fts) AS rank
+            FROM chat_message_fts
+            JOIN chat_message ON chat_message.rowid = chat_message_fts.rowid
+            WHERE chat_message_fts MATCH :search_query
+            UNION ALL
+            SELECT cold_chat.chat_id AS chat_id, bm25(cold_chat_fts) AS rank
+            FROM cold_chat_fts
+            JOIN cold_chat ON cold_chat.rowid = cold_chat_fts.rowid
+            WHERE cold_chat_fts MATCH :search_query
+            UNION ALL
+            SELECT chat.id AS chat_id,
+                {SEARCH_TITLE_WEIGHT} * bm25(chat_title_fts) AS rank
+            FROM chat_title_fts
+            JOIN chat ON chat.rowid = chat_title_fts.rowid
+            WHERE chat_title_fts MATCH :search_query
+            """
+    elif db.bind.dialect.name == "postgresql":
+        sql = f"""
+            SELECT chat_id,
+                -ts_rank(to_tsvector('simple', coalesce(content, '')), query) AS rank
+            FROM chat_message, to_tsquery('simple', :search_query) AS query
+            WHERE to_tsvector('simple', coalesce(content, '')) @@ query
+            UNION ALL
+            SELECT chat_id,
+                -ts_rank(to_tsvector('simple', coalesce(content, '')), query) AS rank
+            FROM cold_chat, to_tsquery('simple', :search_query) AS query
+            WHERE to_tsvector('simple', coalesce(content, '')) @@ query
+            UNION ALL
+            SELECT id AS chat_id,
+                -{SEARCH_TITLE_WEIGHT}
+                * ts_rank(to_tsvector('simple', coalesce(title, '')), query) AS rank
+            FROM chat, to_tsquery('simple', :search_query) AS query
+            WHERE to_tsvector('simple', coalesce(title, '')) @@ query
+            """
+    else:
+        raise NotImplementedError(f"Unsupported dialect: {db.bind.dialect.name}")
+
+    return (
+        text(sql)
+        .bindparams(search_query=search_query)
+        .columns(chat_id=Text, rank=Float)
+        .subquery()
+    )
+
+
+def _get_search_snippets(db, search_query: str, chat_ids: list[str]) -> dict[str, str]:
+    """Highlighted excerpt of the best matching message of each of `chat_ids`."""
+    if db.bind.dialect.name == "sqlite":
+        sql = """
+            SELECT chat_message.chat_id AS chat_id, bm25(chat_message_fts) AS rank,
+                snippet(chat_message_fts, 0, :start, :end, '…', :words) AS snippet
+            FROM chat_message_fts
+            JOIN chat_message ON chat_message.rowid = chat_message_fts.rowid
+            WHERE chat_message_fts MATCH :search_query
+                AND chat_message.chat_id IN :chat_ids
+            UNION ALL
+            SELECT cold_chat.chat_id AS chat_id, bm25(cold_chat_fts) AS rank,
+                snippet(cold_chat_fts, 0, :start, :end, '…', :words) AS snippet
+            FROM cold_chat_fts
+            JOIN cold_chat ON cold_chat.rowid = cold_chat_fts.rowid
+            WHERE cold_chat_fts MATCH :search_query
+                AND cold_chat.chat_id IN :chat_ids
+            """
+    elif db.bind.dialect.name == "postgresql":
+        # Only the best message of each chat is highlighted
+        sql = """
+            SELECT chat_id, rank, ts_headline(
+                'simple', content, query,
+                'StartSel=' || :start || ', StopSel=' || :end
+                    || ', MaxWords=' || :words || ', MinWords=' || (:words / 2)
+            ) AS snippet
+            FROM (
+                SELECT DISTINCT ON (chat_id) chat_id, content, query,
+                    -ts_rank(to_tsvector('simple', coalesce(content, '')), query) AS rank
+                FROM (
+                    SELECT chat_id, content FROM chat_message
+                    WHERE chat_id IN :chat_ids
+                    UNION ALL
+                    SELECT chat_id, content FROM cold_chat
+                    WHERE chat_id IN :chat_ids
+                ) AS message, to_tsquery('simple', :search_query) AS query
+                WHERE to_tsvector('simple', coalesce(content, '')) @@ query
+                ORDER BY chat_id, rank
+            ) AS best
+            """
+    else:
+        raise NotImplementedError(f"Unsupported dialect: {db.bind.dialect.name}")
+
+    rows = db.execute(
+        text(sql).bindparams(bindparam("chat_ids", expanding=True)),
+        {
+            "search_query": search_query,
+            "chat_ids": chat_ids,
+            "start": SEARCH_MATCH_START,
+            "end": SEARCH_MATCH_END,
+            "words": SEARCH_SNIPPET_WORDS,
+        },
+    ).all()
+
+    snippets = {}
+    for chat_id, _, snippet in sorted(rows, key=lambda row: row.rank):
+        if chat_id not in snippets and snippet:
+            snippets[chat_id] = (
+                html.escape(snippet)
+                .replace(SEARCH_MATCH_START, "<mark>")
+                .replace(SEARCH_MATCH_END, "</mark>")
+            )
+    return snippets
+
+
 class ChatTable:
+    def _to_chat_models(self, db, chats: list[Chat]) -> list[ChatModel]:
+        """
+        Validate chats with their history messages loaded from `chat_message`,
+        or from cold storage for cold chats.
+        """
+        cold_chats = get_cold_chats(
+            db, [chat.id for chat in chats if is_cold_chat(chat.chat)]
+        )
+        messages = get_chat_messages(
+            db, [chat.id for chat in chats if chat.id not in cold_chats]
+        )
+        return [
+            ChatModel.model_validate(
+                {
+                    **{
+                        column.name: getattr(chat, column.name)
+                        for column in Chat.__table__.columns
+                    },
+                    "chat": (
+                        hydrate_chat(*cold_chats[chat.id])
+                        if chat.id in cold_chats
+                        else hydrate_chat(chat.chat, messages[chat.id])
+                    ),
+                }
+            )
+            for chat in chats
+        ]
+
+    def _to_chat_model(self, db, chat: Chat) -> ChatModel:
+        return self._to_chat_models(db, [chat])[0]
+
+    def _get_hot_chat(self, db, chat: Optional[Chat]) -> Optional[Chat]:
+        """
+        `chat`, locked and moved back from cold storage first if it was there.
+        Only for writes, reads of cold chats decompress them in memory. The lock
+        is held until the caller commits its write, so a concurrent freeze
+        cannot move the chat in between.
+        """
+        if chat is not None:
+            db.refresh(chat, with_for_update=True)
+            if is_cold_chat(chat.chat):
+                thaw_chat(db, chat)
+        return chat
+
+    def _paginate(self, query, cursor: Optional[tuple[int, str]] = None):
+        """Order `query` newest first, starting after `cursor` (updated_at, id)."""
+        if cursor is not None:
+            query = query.filter(tuple_(Chat.updated_at, Chat.id) < tuple_(*cursor))
+        return query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+    def _insert_chat(self, db, chat: ChatModel) -> Chat:
+        document, messages = split_chat(chat.chat)
+        result = Chat(**{**chat.model_dump(), "chat": document})
+        db.add(result)
+        if messages is not None:
+            set_chat_messages(db, chat.id, messages)
+        if get_tag_ids(chat.meta):
+            set_chat_tags(db, chat.id, chat.user_id, get_tag_ids(chat.meta))
+        db.commit()
+        db.refresh(result)
+        return result
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -123,11 +399,10 @@ class ChatTable:
                 }
             )
 
-            result = Chat(**chat.model_dump())
-            db.add(result)
-            db.commit()
-            db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            result = self._insert_chat(db, chat)
+
+            Usage.record_usage(user_id, chat.created_at, chats_created=1)
+            return self._to_chat_model(db, result) if result else None
 
     def import_chat(
         self, user_id: str, form_data: ChatImportForm
@@ -145,42 +420,127 @@ class ChatTable:
                     ),
                     "chat": form_data.chat,
                     "meta": form_data.meta,
-                    "pinned": form_data.pinned,
+                    "pinned": bool(form_data.pinned),
                     "folder_id": form_data.folder_id,
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
                 }
             )
 
-            result = Chat(**chat.model_dump())
-            db.add(result)
+            result = self._insert_chat(db, chat)
+
+            Usage.record_usage(user_id, chat.created_at, chats_created=1)
+            return self._to_chat_model(db, result) if result else None
+
+    def import_chats(
+        self, user_id: str, forms: list[ChatImportForm]
+    ) -> list[Optional[str]]:
+        """
+        Insert `forms` as new chats with one multi-row INSERT per table. If the
+        batch fails, its chats are inserted one at a time so that a bad record
+        only fails itself. Returns the new chat ids, None for failed records.
+        """
+        now = int(time.time())
+        chats: list[Optional[dict]] = []
+        messages: list[list[dict]] = []
+        for form_data in forms:
+            try:
+                id = str(uuid.uuid4())
+                document, chat_messages = split_chat(form_data.chat)
+                chat = ChatModel(
+                    **{
+                        "id": id,
+                        "user_id": user_id,
+                        "title": (
+                            form_data.chat["title"]
+                            if "title" in form_data.chat
+                            else "New Chat"
+                        ),
+                        "chat": document,
+                        "meta": form_data.meta or {},
+                        "pinned": bool(form_data.pinned),
+                        "folder_id": form_data.folder_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+                chats.append(chat.model_dump())
+                messages.append(
+                    [
+                        message_to_row(id, message_id, message, now)
+                        for message_id, message in (chat_messages or {}).items()
+                    ]
+                )
+            except Exception as e:
+                log.warning(f"Invalid chat in import: {e}")
+                chats.append(None)
+                messages.append([])
+
+        def insert_chats(db, indexes: list[int]):
+            db.execute(insert(Chat), [chats[i] for i in indexes])
+            rows = [row for i in indexes for row in messages[i]]
+            if rows:
+                db.execute(insert(ChatMessage), rows)
+            rows = [
+                {"chat_id": chats[i]["id"], "tag_id": tag_id, "user_id": user_id}
+                for i in indexes
+                for tag_id in get_tag_ids(chats[i]["meta"])
+            ]
+            if rows:
+                db.execute(insert(ChatTag), rows)
             db.commit()
-            db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+
+        ids = [chat["id"] if chat else None for chat in chats]
+        indexes = [i for i, id in enumerate(ids) if id]
+        if not indexes:
+            return ids
+
+        with get_db() as db:
+            try:
+                insert_chats(db, indexes)
+            except Exception as e:
+                log.warning(f"Retrying chat import one at a time: {e}")
+                db.rollback()
+                for i in indexes:
+                    try:
+                        insert_chats(db, [i])
+                    except Exception as e:
+                        log.exception(f"Error importing chat: {e}")
+                        db.rollback()
+                        ids[i] = None
+
+        Usage.record_usage(user_id, now, chats_created=len([id for id in ids if id]))
+        return ids
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat_item = db.get(Chat, id)
-                chat_item.chat = chat
+                chat_item = self._get_hot_chat(db, db.get(Chat, id))
+                chat_item.chat, messages = split_chat(chat)
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                if messages is not None:
+                    set_chat_messages(db, id, messages, partial=is_partial_chat(chat))
                 db.commit()
                 db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_model(db, chat_item)
         except Exception:
             return None
 
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        chat["title"] = title
+        try:
+            with get_db() as db:
+                chat_item = self._get_hot_chat(db, db.get(Chat, id))
+                chat_item.chat = {**chat_item.chat, "title": title}
+                chat_item.title = title
+                chat_item.updated_at = int(time.time())
+                db.commit()
+                db.refresh(chat_item)
 
-        return self.update_chat_by_id(id, chat)
+                return self._to_chat_model(db, chat_item)
+        except Exception:
+            return None
 
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
@@ -203,73 +563,110 @@ class ChatTable:
         return self.get_chat_by_id(id)
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.query(Chat.chat).filter_by(id=id).first()
+            if chat is None:
+                return None
 
-        return chat.chat.get("title", "New Chat")
+            return chat.chat.get("title", "New Chat")
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.query(Chat.chat).filter_by(id=id).first()
+            if chat is None:
+                return None
 
-        return chat.chat.get("history", {}).get("messages", {}) or {}
+            if is_cold_chat(chat.chat):
+                cold_chat = get_cold_chat(db, id)
+                return cold_chat[1] if cold_chat else {}
+            return get_chat_messages(db, [id])[id]
 
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.query(Chat.chat).filter_by(id=id).first()
+            if chat is None:
+                return None
+
+            if is_cold_chat(chat.chat):
+                cold_chat = get_cold_chat(db, id)
+                return cold_chat[1].get(message_id, {}) if cold_chat else {}
+            row = get_chat_message(db, id, message_id)
+            return row_to_message(row) if row else {}
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+    # Message writes touch the message's own row and the small `chat.chat`
+    # document only, never the rest of the history.
 
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+    ) -> Optional[dict]:
+        """Merge `message` into the stored message and make it the current one."""
+        try:
+            with get_db() as db:
+                chat_item = self._get_hot_chat(db, db.get(Chat, id))
+                if chat_item is None:
+                    return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
+                row = get_chat_message(db, id, message_id)
+                if row:
+                    message = {**row_to_message(row), **message}
+                set_chat_message(db, id, message_id, message)
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+                history = chat_item.chat.get("history", {})
+                if history.get("currentId") != message_id:
+                    chat_item.chat = {
+                        **chat_item.chat,
+                        "history": {**history, "currentId": message_id},
+                    }
+                chat_item.updated_at = int(time.time())
+                db.commit()
 
-        history["currentId"] = message_id
+                return message
+        except Exception as e:
+            log.exception(f"Error saving message {message_id} of chat {id}: {e}")
+            return None
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    def append_to_message_by_id_and_message_id(
+        self,
+        id: str,
+        message_id: str,
+        content: str = "",
+        statuses: Optional[list[dict]] = None,
+    ) -> bool:
+        """
+        Append `content` to the message content and `statuses` to its
+        statusHistory in a single statement, moving a cold chat back from cold
+        storage first. Returns False if the message does not exist.
+        """
+        try:
+            with get_db() as db:
+                appended = append_chat_message(db, id, message_id, content, statuses)
+                if not appended:
+                    # The message may be in cold storage, move it back and retry
+                    chat = db.get(Chat, id)
+                    if chat is not None and is_cold_chat(chat.chat):
+                        self._get_hot_chat(db, chat)
+                        appended = append_chat_message(
+                            db, id, message_id, content, statuses
+                        )
+                db.commit()
+                return appended
+        except Exception as e:
+            log.exception(f"Error appending to message {message_id}: {e}")
+            return False
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    ) -> bool:
+        return self.append_to_message_by_id_and_message_id(
+            id, message_id, statuses=[status]
+        )
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
-            chat = db.get(Chat, chat_id)
+            chat = self._get_hot_chat(db, db.get(Chat, chat_id))
             # Check if the chat is already shared
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
@@ -286,6 +683,7 @@ class ChatTable:
             )
             shared_result = Chat(**shared_chat.model_dump())
             db.add(shared_result)
+            copy_chat_messages(db, chat_id, shared_chat.id)
             db.commit()
             db.refresh(shared_result)
 
@@ -296,12 +694,15 @@ class ChatTable:
                 .update({"share_id": shared_chat.id})
             )
             db.commit()
-            return shared_chat if (shared_result and result) else None
+            return (
+                self._to_chat_model(db, shared_result)
+                if (shared_result and result)
+                else None
+            )
 
     def update_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat = db.get(Chat, chat_id)
                 shared_chat = (
                     db.query(Chat).filter_by(user_id=f"shared-{chat_id}").first()
                 )
@@ -309,20 +710,31 @@ class ChatTable:
                 if shared_chat is None:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
+                chat = self._get_hot_chat(db, db.get(Chat, chat_id))
+
                 shared_chat.title = chat.title
                 shared_chat.chat = chat.chat
+                copy_chat_messages(db, chat_id, shared_chat.id)
 
                 shared_chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(shared_chat)
 
-                return ChatModel.model_validate(shared_chat)
+                return self._to_chat_model(db, shared_chat)
         except Exception:
             return None
 
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
+                shared_chat_ids = [
+                    id
+                    for (id,) in db.query(Chat.id)
+                    .filter_by(user_id=f"shared-{chat_id}")
+                    .all()
+                ]
+                delete_chat_messages(db, shared_chat_ids)
+                delete_cold_chats(db, shared_chat_ids)
                 db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
                 db.commit()
 
@@ -339,7 +751,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -351,7 +763,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -363,7 +775,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -387,7 +799,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -395,13 +807,14 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 50,
+        cursor: Optional[tuple[int, str]] = None,
     ) -> list[ChatModel]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc())
+            query = self._paginate(query, cursor)
 
             if skip:
                 query = query.offset(skip)
@@ -409,7 +822,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -417,15 +830,17 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
-            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
+            # Unpinned chats have pinned = false, letting the list index serve the order
+            query = query.filter(Chat.pinned == False)
 
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
+            query = self._paginate(query, cursor).with_entities(
                 Chat.id, Chat.title, Chat.updated_at, Chat.created_at
             )
 
@@ -460,13 +875,13 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -488,7 +903,48 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
+        except Exception:
+            return None
+
+    def get_chat_branch_by_id_and_user_id(
+        self, id: str, user_id: str, message_id: Optional[str] = None
+    ) -> Optional[ChatModel]:
+        """
+        The chat with a single branch of its history loaded: the active one
+        (up to history.currentId) by default, or the one through `message_id`
+        down to its latest leaf, which becomes the current message.
+        """
+        try:
+            with get_db() as db:
+                chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
+                history = chat.chat.get("history")
+                if not isinstance(history, dict) or is_cold_chat(chat.chat):
+                    # Cold chats are read whole from their blob
+                    return self._to_chat_model(db, chat)
+
+                messages, sibling_ids = get_chat_branch(
+                    db,
+                    id,
+                    message_id or history.get("currentId"),
+                    to_leaf=message_id is not None,
+                )
+                return ChatModel.model_validate(
+                    {
+                        **{
+                            column.name: getattr(chat, column.name)
+                            for column in Chat.__table__.columns
+                        },
+                        "chat": hydrate_chat(
+                            chat.chat,
+                            messages,
+                            sibling_ids,
+                            current_id=(
+                                next(reversed(messages), None) if message_id else None
+                            ),
+                        ),
+                    }
+                )
         except Exception:
             return None
 
@@ -497,9 +953,9 @@ class ChatTable:
             all_chats = (
                 db.query(Chat)
                 # .limit(limit).offset(skip)
-                .order_by(Chat.updated_at.desc())
+                .order_by(Chat.updated_at.desc()).all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -507,8 +963,9 @@ class ChatTable:
                 db.query(Chat)
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
+                .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -516,8 +973,9 @@ class ChatTable:
                 db.query(Chat)
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
+                .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -525,8 +983,29 @@ class ChatTable:
                 db.query(Chat)
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
+                .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def iter_chats(
+        self, user_id: Optional[str] = None, archived: Optional[bool] = None
+    ) -> Iterator[ChatModel]:
+        """
+        Stream chats newest first through a server-side cursor, loading their
+        messages one batch at a time, so memory use does not grow with the
+        number of chats.
+        """
+        query = select(Chat)
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        if archived is not None:
+            query = query.filter_by(archived=archived)
+        query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+        with get_db() as db:
+            result = db.scalars(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            for chats in result.partitions():
+                yield from self._to_chat_models(db, chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -535,15 +1014,12 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatSearchResponse]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Full-text search over the titles and messages of a user's chats, best
+        matches first, allowing pagination using skip and limit.
         """
         search_text = search_text.lower().strip()
-
-        if not search_text:
-            return self.get_chat_list_by_user_id(user_id, include_archived, skip, limit)
-
         search_text_words = search_text.split(" ")
 
         # search_text might contain 'tag:tag_name' format so we need to extract the tag_name, split the search_text and remove the tags
@@ -560,115 +1036,33 @@ class ChatTable:
         search_text = " ".join(search_text_words)
 
         with get_db() as db:
-            query = db.query(Chat).filter(Chat.user_id == user_id)
+            query = db.query(
+                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
+            ).filter(Chat.user_id == user_id)
 
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
-
-            # Check if the database dialect is either 'sqlite' or 'postgresql'
-            dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1 
-                                FROM json_each(Chat.chat, '$.messages') AS message 
-                                WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+            search_query = get_search_query(db, search_text)
+            if search_query:
+                matches = _get_search_matches(db, search_query)
+                ranks = (
+                    select(matches.c.chat_id, func.min(matches.c.rank).label("rank"))
+                    .group_by(matches.c.chat_id)
+                    .subquery()
                 )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_each(Chat.meta, '$.tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_each(Chat.meta, '$.tags') AS tag
-                                        WHERE tag.value = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
-
-            elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1
-                                FROM json_array_elements(Chat.chat->'messages') AS message
-                                WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+                query = query.join(ranks, ranks.c.chat_id == Chat.id).order_by(
+                    ranks.c.rank, Chat.updated_at.desc()
                 )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                                        WHERE tag = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
             else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
+                query = query.order_by(Chat.updated_at.desc())
+
+            # Chats must have all the tags, or none at all for "tag:none"
+            if "none" in tag_ids:
+                query = query.filter(~has_chat_tag(Chat.id))
+            elif tag_ids:
+                query = query.filter(
+                    *[has_chat_tag(Chat.id, tag_id) for tag_id in tag_ids]
                 )
 
             # Perform pagination at the SQL level
@@ -676,8 +1070,21 @@ class ChatTable:
 
             log.info(f"The number of chats: {len(all_chats)}")
 
-            # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            snippets = (
+                _get_search_snippets(db, search_query, [chat.id for chat in all_chats])
+                if search_query and all_chats
+                else {}
+            )
+            return [
+                ChatSearchResponse(
+                    id=chat.id,
+                    title=chat.title,
+                    updated_at=chat.updated_at,
+                    created_at=chat.created_at,
+                    snippet=snippets.get(chat.id),
+                )
+                for chat in all_chats
+            ]
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -690,7 +1097,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -705,7 +1112,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -718,7 +1125,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -732,32 +1139,14 @@ class ChatTable:
         self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
     ) -> list[ChatModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
-
-            log.info(f"DB dialect name: {db.bind.dialect.name}")
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 querying for tags within the meta JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSON query for tags within the meta JSON field (for `json` type)
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
-
-            all_chats = query.all()
-            log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = (
+                db.query(Chat)
+                .join(ChatTag, ChatTag.chat_id == Chat.id)
+                .filter(ChatTag.user_id == user_id, ChatTag.tag_id == tag_id)
+                .all()
+            )
+            return self._to_chat_models(db, all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -775,48 +1164,29 @@ class ChatTable:
                         **chat.meta,
                         "tags": list(set(chat.meta.get("tags", []) + [tag_id])),
                     }
+                    set_chat_tags(db, chat.id, chat.user_id, get_tag_ids(chat.meta))
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
     def count_chats_by_tag_name_and_user_id(self, tag_name: str, user_id: str) -> int:
-        with get_db() as db:  # Assuming `get_db()` returns a session object
-            query = db.query(Chat).filter_by(user_id=user_id, archived=False)
-
+        with get_db() as db:
             # Normalize the tag_name for consistency
             tag_id = tag_name.replace(" ", "_").lower()
 
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSONB support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
+            return (
+                db.query(func.count(ChatTag.chat_id))
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id == tag_id,
+                    Chat.archived == False,
                 )
-
-            # Get the count of matching records
-            count = query.count()
-
-            # Debugging output for inspection
-            log.info(f"Count of chats for tag '{tag_name}': {count}")
-
-            return count
+                .scalar()
+            )
 
     def delete_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -832,6 +1202,7 @@ class ChatTable:
                     **chat.meta,
                     "tags": list(set(tags)),
                 }
+                set_chat_tags(db, chat.id, chat.user_id, get_tag_ids(chat.meta))
                 db.commit()
                 return True
         except Exception:
@@ -845,6 +1216,7 @@ class ChatTable:
                     **chat.meta,
                     "tags": [],
                 }
+                delete_chat_tags(db, [chat.id])
                 db.commit()
 
                 return True
@@ -854,9 +1226,16 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                chat = db.query(Chat.user_id, Chat.created_at).filter_by(id=id).first()
+                delete_chat_messages(db, [id])
+                delete_chat_tags(db, [id])
+                delete_cold_chats(db, [id])
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
+                if chat:
+                    Usage.record_usage(chat.user_id, chat.created_at, chats_created=-1)
+
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
@@ -864,9 +1243,21 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
+                chat = (
+                    db.query(Chat.user_id, Chat.created_at)
+                    .filter_by(id=id, user_id=user_id)
+                    .first()
+                )
+                if chat:
+                    delete_chat_messages(db, [id])
+                    delete_chat_tags(db, [id])
+                    delete_cold_chats(db, [id])
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
                 db.commit()
 
+                if chat:
+                    Usage.record_usage(chat.user_id, chat.created_at, chats_created=-1)
+
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
@@ -876,9 +1267,16 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                chat_ids = [
+                    id for (id,) in db.query(Chat.id).filter_by(user_id=user_id)
+                ]
+                delete_chat_messages(db, chat_ids)
+                delete_chat_tags(db, chat_ids)
+                delete_cold_chats(db, chat_ids)
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
+                Usage.rebuild_usage(user_ids=[user_id])
                 return True
         except Exception:
             return False
@@ -888,9 +1286,19 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                chat_ids = [
+                    id
+                    for (id,) in db.query(Chat.id).filter_by(
+                        user_id=user_id, folder_id=folder_id
+                    )
+                ]
+                delete_chat_messages(db, chat_ids)
+                delete_chat_tags(db, chat_ids)
+                delete_cold_chats(db, chat_ids)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
+                Usage.rebuild_usage(user_ids=[user_id])
                 return True
         except Exception:
             return False
@@ -901,6 +1309,14 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
+                chat_ids = [
+                    id
+                    for (id,) in db.query(Chat.id).filter(
+                        Chat.user_id.in_(shared_chat_ids)
+                    )
+                ]
+                delete_chat_messages(db, chat_ids)
+                delete_cold_chats(db, chat_ids)
                 db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
                 db.commit()
 
@@ -908,5 +1324,53 @@ class ChatTable:
         except Exception:
             return False
 
+    def move_chats_to_cold_storage(self, updated_before: int) -> int:
+        """
+        Move the unpinned chats last updated before `updated_before` to cold
+        storage, in batches. Returns the number of chats moved.
+        """
+        count = 0
+        try:
+            with get_db() as db:
+                while True:
+                    chats = (
+                        db.query(Chat)
+                        .filter(
+                            Chat.updated_at < updated_before,
+                            Chat.pinned == False,
+                            ~exists().where(ColdChat.chat_id == Chat.id),
+                        )
+                        .order_by(Chat.id)
+                        .limit(COLD_STORAGE_BATCH_SIZE)
+                        .with_for_update()
+                        .all()
+                    )
+                    if not chats:
+                        return count
+
+                    freeze_chats(db, chats)
+                    db.commit()
+                    count += len(chats)
+        except Exception as e:
+            log.exception(f"Error moving chats to cold storage: {e}")
+            return count
+
+    def rebuild_search_index(self) -> bool:
+        """
+        Rebuild the SQLite full-text index from the chat, chat_message and
+        cold_chat tables, needed after a VACUUM as it may renumber their rowids.
+        PostgreSQL maintains its indexes itself.
+        """
+        try:
+            with get_db() as db:
+                if db.bind.dialect.name == "sqlite":
+                    for fts in ["chat_title_fts", "chat_message_fts", "cold_chat_fts"]:
+                        db.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                    db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error rebuilding chat search index: {e}")
+            return False
+
 
 Chats = ChatTable()
@@ -0,0 +1,198 @@
+import json
+import time
+import zlib
+from typing import Optional
+
+from open_webui.internal.db import Base
+from open_webui.models.chat_messages import (
+    ChatMessage,
+    delete_chat_messages,
+    row_to_message,
+)
+
+from sqlalchemy import BigInteger, Column, LargeBinary, Text, insert
+from sqlalchemy.orm import Session
+
+# Chat ids per IN (...) query when reading or deleting many cold chats
+BATCH_SIZE = 500
+
+####################
+# Cold Chat DB Schema
+#
+# Chats that have not been updated for a while can be moved to cold storage:
+# their document and message rows are serialized, compressed into a single
+# `cold_chat` row, and the `chat` row is left with a stub document (see
+# `COLD_CHAT_KEY`) while keeping its title, meta, flags and timestamps, so chat
+# lists and tag filters are unaffected. The text of its messages is kept
+# uncompressed in `content`, indexed for full-text search like the
+# chat_message rows, so cold chats are still found by their messages.
+#
+# Reads of a cold chat decompress it in memory, so reading one is not a write.
+# Writing to one through `Chats` moves it back to the hot tables first with
+# `thaw_chat`.
+#
+# Blobs are compressed with zstd when the optional `zstandard` package is
+# installed, and with zlib otherwise. The codec is stored with each blob.
+####################
+
+# Key marking the stub document of a cold chat
+COLD_CHAT_KEY = "cold"
+
+
+class ColdChat(Base):
+    __tablename__ = "cold_chat"
+
+    chat_id = Column(Text, primary_key=True)
+
+    codec = Column(Text, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(BigInteger)  # uncompressed bytes
+    content = Column(Text, nullable=True)  # message text, for search
+
+    created_at = Column(BigInteger)
+
+
+####################
+# Compression
+####################
+
+
+def _get_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress(data: bytes) -> tuple[str, bytes]:
+    """The name of the codec used and the compressed `data`."""
+    zstd = _get_zstd()
+    if zstd is not None:
+        return "zstd", zstd.ZstdCompressor().compress(data)
+    return "zlib", zlib.compress(data)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        zstd = _get_zstd()
+        if zstd is None:
+            raise RuntimeError("Reading this chat requires the zstandard package")
+        return zstd.ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+####################
+# Queries
+#
+# These take the caller's session and `Chat` rows, so that the chat and its
+# cold copy are committed together.
+####################
+
+
+def is_cold_chat(chat: dict) -> bool:
+    return isinstance(chat, dict) and chat.get(COLD_CHAT_KEY) is True
+
+
+def _load(row: ColdChat) -> dict:
+    return json.loads(decompress(row.codec, row.data))
+
+
+def _get_messages(rows: list[dict]) -> dict:
+    return {row["id"]: row_to_message(ChatMessage(**row)) for row in rows}
+
+
+def get_cold_chats(db: Session, chat_ids: list[str]) -> dict[str, tuple[dict, dict]]:
+    """The stored document and messages keyed by id of each cold chat."""
+    chats = {}
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        for row in db.query(ColdChat).filter(
+            ColdChat.chat_id.in_(chat_ids[i : i + BATCH_SIZE])
+        ):
+            payload = _load(row)
+            chats[row.chat_id] = (payload["chat"], _get_messages(payload["messages"]))
+    return chats
+
+
+def get_search_content(messages: list[dict]) -> str:
+    """The text of the message rows of a cold chat, as indexed for search."""
+    return "\n".join(
+        message["content"]
+        for message in messages
+        if isinstance(message.get("content"), str)
+    )
+
+
+def freeze_chats(db: Session, chats: list):
+    """
+    Move `chats` (hot `Chat` rows, locked by the caller) to cold storage. Their
+    message rows are locked as they are read, so that writes to them finish
+    before, or find them gone and thaw the chat after.
+    """
+    columns = [column.name for column in ChatMessage.__table__.columns]
+    messages: dict[str, list[dict]] = {chat.id: [] for chat in chats}
+    for row in (
+        db.query(ChatMessage)
+        .filter(ChatMessage.chat_id.in_(list(messages)))
+        .order_by(ChatMessage.chat_id, ChatMessage.created_at)
+        .with_for_update()
+    ):
+        messages[row.chat_id].append({name: getattr(row, name) for name in columns})
+
+    now = int(time.time())
+    for chat in chats:
+        data = json.dumps({"chat": chat.chat, "messages": messages[chat.id]}).encode(
+            "utf-8"
+        )
+        codec, blob = compress(data)
+        db.add(
+            ColdChat(
+                chat_id=chat.id,
+                codec=codec,
+                data=blob,
+                size=len(data),
+                content=get_search_content(messages[chat.id]),
+                created_at=now,
+            )
+        )
+        chat.chat = {"title": chat.title, COLD_CHAT_KEY: True}
+
+    delete_chat_messages(db, list(messages))
+
+
+def get_cold_chat(db: Session, chat_id: str) -> Optional[tuple[dict, dict]]:
+    """The stored document and messages of a cold chat, None if it is not cold."""
+    return get_cold_chats(db, [chat_id]).get(chat_id)
+
+
+def thaw_chat(db: Session, chat):
+    """
+    Move a cold `Chat` row back to the hot tables. The cold row is locked
+    first, so that of concurrent thaws of a chat only the first moves it; the
+    others find the row gone and reload `chat` as that one left it.
+    """
+    row = (
+        db.query(ColdChat)
+        .filter(ColdChat.chat_id == chat.id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+    if row is None:
+        db.refresh(chat)
+        return
+
+    payload = _load(row)
+    if payload["messages"]:
+        db.execute(insert(ChatMessage), payload["messages"])
+    chat.chat = payload["chat"]
+    db.delete(row)
+
+
+def delete_cold_chats(db: Session, chat_ids: list[str]):
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        db.query(ColdChat).filter(
+            ColdChat.chat_id.in_(chat_ids[i : i + BATCH_SIZE])
+        ).delete(synchronize_session=False)
@@ -3,9 +3,10 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.models.usage import DAY, IMAGE_CONTENT_TYPES, Usage, get_file_usage
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, case, func
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -27,6 +28,10 @@ class File(Base):
     data = Column(JSON, nullable=True)
     meta = Column(JSON, nullable=True)
 
+    # Promoted from `meta` so they can be counted and summed without reading it
+    content_type = Column(Text, nullable=True, index=True)
+    size = Column(BigInteger, nullable=True, index=True)
+
     access_control = Column(JSON, nullable=True)
 
     created_at = Column(BigInteger)
@@ -46,6 +51,9 @@ class FileModel(BaseModel):
     data: Optional[dict] = None
     meta: Optional[dict] = None
 
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+
     access_control: Optional[dict] = None
 
     created_at: Optional[int]  # timestamp in epoch
@@ -97,12 +105,23 @@ class FileForm(BaseModel):
     access_control: Optional[dict] = None
 
 
+def get_file_columns(meta: Optional[dict]) -> dict:
+    meta = meta if isinstance(meta, dict) else {}
+    try:
+        size = int(meta["size"]) if meta.get("size") is not None else None
+    except (TypeError, ValueError):
+        size = None
+
+    return {"content_type": meta.get("content_type"), "size": size}
+
+
 class FilesTable:
     def insert_new_file(self, user_id: str, form_data: FileForm) -> Optional[FileModel]:
         with get_db() as db:
             file = FileModel(
                 **{
                     **form_data.model_dump(),
+                    **get_file_columns(form_data.meta),
                     "user_id": user_id,
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
@@ -114,6 +133,12 @@ class FilesTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+
+                Usage.record_usage(
+                    user_id,
+                    file.created_at,
+                    **get_file_usage(file.content_type, file.size),
+                )
                 if result:
                     return FileModel.model_validate(result)
                 else:
@@ -206,6 +231,9 @@ class FilesTable:
             try:
                 file = db.query(File).filter_by(id=id).first()
                 file.meta = {**(file.meta if file.meta else {}), **meta}
+                for key, value in get_file_columns(meta).items():
+                    if key in meta:
+                        setattr(file, key, value)
                 db.commit()
                 return FileModel.model_validate(file)
             except Exception:
@@ -214,9 +242,28 @@ class FilesTable:
     def delete_file_by_id(self, id: str) -> bool:
         with get_db() as db:
             try:
+                file = (
+                    db.query(
+                        File.user_id, File.created_at, File.content_type, File.size
+                    )
+                    .filter_by(id=id)
+                    .first()
+                )
                 db.query(File).filter_by(id=id).delete()
                 db.commit()
 
+                if file:
+                    Usage.record_usage(
+                        file.user_id,
+                        file.created_at,
+                        **{
+                            k: -v
+                            for k, v in get_file_usage(
+                                file.content_type, file.size
+                            ).items()
+                        },
+                    )
+
                 return True
             except Exception:
                 return False
@@ -224,9 +271,42 @@ class FilesTable:
     def delete_all_files(self) -> bool:
         with get_db() as db:
             try:
+                # What the deleted files added to each user's daily rollups
+                day = ((File.created_at // DAY) * DAY).label("day")
+                usages = (
+                    db.query(
+                        File.user_id,
+                        day,
+                        func.count(File.id),
+                        func.sum(
+                            case(
+                                (File.content_type.in_(IMAGE_CONTENT_TYPES), 1),
+                                else_=0,
+                            )
+                        ),
+                        func.sum(File.size),
+                    )
+                    .group_by(File.user_id, day)
+                    .all()
+                )
                 db.query(File).delete()
                 db.commit()
 
+                Usage.record_usages(
+                    [
+                        (
+                            user_id,
+                            day,
+                            {
+                                "files_uploaded": -int(files or 0),
+                                "images_uploaded": -int(images or 0),
+                                "bytes_stored": -int(size or 0),
+                            },
+                        )
+                        for user_id, day, files, images, size in usages
+                        if day is not None
+                    ]
+                )
                 return True
             except Exception:
                 return False
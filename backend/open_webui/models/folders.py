@@ -8,7 +8,7 @@ from open_webui.models.chats import Chats
 
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Text, JSON, Boolean
+from sqlalchemy import BigInteger, Column, Text, JSON, Boolean, func, insert
 from open_webui.utils.access_control import get_permissions
 
 
@@ -87,6 +87,46 @@ class FolderTable:
                 log.exception(f"Error inserting a new folder: {e}")
                 return None
 
+    def insert_new_folders(self, user_id: str, names: list[str]) -> dict[str, str]:
+        """
+        Ids of the user's top-level folders named `names` (compared case
+        insensitively), inserting the missing ones with a single statement.
+        """
+        folder_ids = {}
+        try:
+            with get_db() as db:
+                lower_names = {name.lower(): name for name in names}
+                for id, name in db.query(Folder.id, Folder.name).filter(
+                    Folder.parent_id.is_(None),
+                    Folder.user_id == user_id,
+                    func.lower(Folder.name).in_(list(lower_names)),
+                ):
+                    folder_ids.setdefault(name.lower(), id)
+
+                now = int(time.time())
+                rows = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "name": name,
+                        "parent_id": None,
+                        "is_expanded": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for lower_name, name in lower_names.items()
+                    if lower_name not in folder_ids
+                ]
+                if rows:
+                    db.execute(insert(Folder), rows)
+                db.commit()
+
+                folder_ids.update({row["name"].lower(): row["id"] for row in rows})
+                return {name: folder_ids[name.lower()] for name in names}
+        except Exception as e:
+            log.exception(f"Error inserting new folders: {e}")
+            return {}
+
     def get_folder_by_id_and_user_id(
         self, id: str, user_id: str
     ) -> Optional[FolderModel]:
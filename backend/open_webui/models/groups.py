@@ -1,6 +1,7 @@
 import json
 import logging
 import time
+from contextvars import ContextVar
 from typing import Optional
 import uuid
 
@@ -11,12 +12,24 @@ from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
-
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    PrimaryKeyConstraint,
+    Text,
+    JSON,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
+# Group ids by member id, memoized while a request scope is active (see
+# `open_webui.utils.access_control.AccessControlMiddleware`)
+member_group_ids: ContextVar[Optional[dict[str, list[str]]]] = ContextVar(
+    "member_group_ids", default=None
+)
+
 ####################
 # UserGroup DB Schema
 ####################
@@ -41,6 +54,22 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    """Normalized copy of `Group.user_ids`, kept in sync by `GroupTable`."""
+
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id", name="pk_group_member"),
+        Index("group_member_user_id_idx", "user_id"),
+    )
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -88,6 +117,21 @@ class GroupUpdateForm(GroupForm):
 
 
 class GroupTable:
+    def _clear_member_group_ids(self):
+        cache = member_group_ids.get()
+        if cache is not None:
+            cache.clear()
+
+    def _set_members(self, db, id: str, user_ids: list[str]):
+        db.query(GroupMember).filter_by(group_id=id).delete()
+        now = int(time.time())
+        db.add_all(
+            [
+                GroupMember(group_id=id, user_id=user_id, created_at=now)
+                for user_id in dict.fromkeys(user_ids)
+            ]
+        )
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -127,16 +171,29 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> list[str]:
+        cache = member_group_ids.get()
+        if cache is not None and user_id in cache:
+            return cache[user_id]
+
+        with get_db() as db:
+            group_ids = [
+                group_id
+                for (group_id,) in db.query(GroupMember.group_id)
+                .filter(GroupMember.user_id == user_id)
+                .all()
+            ]
+
+        if cache is not None:
+            cache[user_id] = group_ids
+        return group_ids
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -145,12 +202,14 @@ class GroupTable:
         except Exception:
             return None
 
-    def get_group_user_ids_by_id(self, id: str) -> Optional[str]:
-        group = self.get_group_by_id(id)
-        if group:
-            return group.user_ids
-        else:
-            return None
+    def get_group_user_ids_by_id(self, id: str) -> Optional[list[str]]:
+        with get_db() as db:
+            return [
+                user_id
+                for (user_id,) in db.query(GroupMember.user_id)
+                .filter(GroupMember.group_id == id)
+                .all()
+            ]
 
     def update_group_by_id(
         self, id: str, form_data: GroupUpdateForm, overwrite: bool = False
@@ -163,7 +222,10 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_members(db, id, form_data.user_ids)
                 db.commit()
+                self._clear_member_group_ids()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -173,7 +235,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
+                self._clear_member_group_ids()
                 return True
         except Exception:
             return False
@@ -182,7 +246,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                self._clear_member_group_ids()
 
                 return True
             except Exception:
@@ -194,14 +260,16 @@ class GroupTable:
                 groups = self.get_groups_by_member_id(user_id)
 
                 for group in groups:
-                    group.user_ids.remove(user_id)
+                    group.user_ids = [id for id in group.user_ids if id != user_id]
                     db.query(Group).filter_by(id=group.id).update(
                         {
                             "user_ids": group.user_ids,
                             "updated_at": int(time.time()),
                         }
                     )
-                    db.commit()
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                self._clear_member_group_ids()
 
                 return True
             except Exception:
@@ -9,10 +9,11 @@ from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
 from open_webui.models.users import Users, UserResponse
+from open_webui.models.usage import DAY, Usage
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, func
 
 from open_webui.utils.access_control import has_access
 
@@ -119,6 +120,8 @@ class KnowledgeTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+
+                Usage.record_usage(user_id, knowledge.created_at, knowledge_created=1)
                 if result:
                     return KnowledgeModel.model_validate(result)
                 else:
@@ -201,8 +204,18 @@ class KnowledgeTable:
     def delete_knowledge_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                knowledge = (
+                    db.query(Knowledge.user_id, Knowledge.created_at)
+                    .filter_by(id=id)
+                    .first()
+                )
                 db.query(Knowledge).filter_by(id=id).delete()
                 db.commit()
+
+                if knowledge:
+                    Usage.record_usage(
+                        knowledge.user_id, knowledge.created_at, knowledge_created=-1
+                    )
                 return True
         except Exception:
             return False
@@ -210,9 +223,23 @@ class KnowledgeTable:
     def delete_all_knowledge(self) -> bool:
         with get_db() as db:
             try:
+                # What the deleted knowledge bases added to the daily rollups
+                day = ((Knowledge.created_at // DAY) * DAY).label("day")
+                usages = (
+                    db.query(Knowledge.user_id, day, func.count(Knowledge.id))
+                    .group_by(Knowledge.user_id, day)
+                    .all()
+                )
                 db.query(Knowledge).delete()
                 db.commit()
 
+                Usage.record_usages(
+                    [
+                        (user_id, day, {"knowledge_created": -count})
+                        for user_id, day, count in usages
+                        if day is not None
+                    ]
+                )
                 return True
             except Exception:
                 return False
@@ -5,6 +5,7 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
+from open_webui.models.usage import Usage
 
 
 from pydantic import BaseModel, ConfigDict
@@ -120,6 +121,8 @@ class MessageTable:
             db.add(result)
             db.commit()
             db.refresh(result)
+
+            Usage.record_usage(user_id, ts // 1_000_000_000, messages_sent=1)
             return MessageModel.model_validate(result) if result else None
 
     def get_message_by_id(self, id: str) -> Optional[MessageResponse]:
@@ -261,18 +264,38 @@ class MessageTable:
 
     def delete_replies_by_id(self, id: str) -> bool:
         with get_db() as db:
+            replies = (
+                db.query(Message.user_id, Message.created_at)
+                .filter_by(parent_id=id)
+                .all()
+            )
             db.query(Message).filter_by(parent_id=id).delete()
             db.commit()
+
+            for reply in replies:
+                Usage.record_usage(
+                    reply.user_id, reply.created_at // 1_000_000_000, messages_sent=-1
+                )
             return True
 
     def delete_message_by_id(self, id: str) -> bool:
         with get_db() as db:
+            message = (
+                db.query(Message.user_id, Message.created_at).filter_by(id=id).first()
+            )
             db.query(Message).filter_by(id=id).delete()
 
             # Delete all reactions to this message
             db.query(MessageReaction).filter_by(message_id=id).delete()
 
             db.commit()
+
+            if message:
+                Usage.record_usage(
+                    message.user_id,
+                    message.created_at // 1_000_000_000,
+                    messages_sent=-1,
+                )
             return True
 
 
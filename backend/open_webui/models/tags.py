@@ -8,7 +8,7 @@ from open_webui.internal.db import Base, get_db
 
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, JSON, PrimaryKeyConstraint
+from sqlalchemy import BigInteger, Column, String, JSON, PrimaryKeyConstraint, insert
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -64,6 +64,34 @@ class TagTable:
                 log.exception(f"Error inserting a new tag: {e}")
                 return None
 
+    def insert_new_tags(self, names: list[str], user_id: str) -> bool:
+        """Insert the tags named `names` that the user does not have yet."""
+        tags = {name.replace(" ", "_").lower(): name for name in names}
+        tags.pop("none", None)
+        if not tags:
+            return True
+
+        try:
+            with get_db() as db:
+                existing = {
+                    id
+                    for (id,) in db.query(Tag.id).filter(
+                        Tag.id.in_(list(tags)), Tag.user_id == user_id
+                    )
+                }
+                rows = [
+                    {"id": id, "name": name, "user_id": user_id}
+                    for id, name in tags.items()
+                    if id not in existing
+                ]
+                if rows:
+                    db.execute(insert(Tag), rows)
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error inserting new tags: {e}")
+            return False
+
     def get_tag_by_name_and_user_id(
         self, name: str, user_id: str
     ) -> Optional[TagModel]:
@@ -0,0 +1,451 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    PrimaryKeyConstraint,
+    Text,
+    case,
+    func,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+IMAGE_CONTENT_TYPES = ["image/png", "image/jpeg", "image/gif", "image/webp"]
+
+DAY = 24 * 60 * 60
+
+USAGE_COUNTERS = [
+    "chats_created",
+    "files_uploaded",
+    "images_uploaded",
+    "knowledge_created",
+    "messages_sent",
+    "bytes_stored",
+]
+
+STORAGE_MEASURES = [
+    "chat_bytes",
+    "message_bytes",
+    "file_bytes",
+    "vector_bytes",
+]
+
+####################
+# Usage DB Schema
+####################
+
+
+class UsageDaily(Base):
+    __tablename__ = "usage_daily"
+
+    user_id = Column(Text, nullable=False)
+    day = Column(BigInteger, nullable=False)  # epoch of the UTC day start
+
+    chats_created = Column(BigInteger, nullable=False, default=0)
+    files_uploaded = Column(BigInteger, nullable=False, default=0)
+    images_uploaded = Column(BigInteger, nullable=False, default=0)
+    knowledge_created = Column(BigInteger, nullable=False, default=0)
+    messages_sent = Column(BigInteger, nullable=False, default=0)
+    bytes_stored = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "day", name="pk_usage_daily_user_id_day"),
+        Index("usage_daily_day_idx", "day"),
+    )
+
+
+class UsageTotal(Base):
+    """All-time sums of the `usage_daily` rollups, one row per user."""
+
+    __tablename__ = "usage_total"
+
+    user_id = Column(Text, primary_key=True)
+
+    chats_created = Column(BigInteger, nullable=False, default=0)
+    files_uploaded = Column(BigInteger, nullable=False, default=0)
+    images_uploaded = Column(BigInteger, nullable=False, default=0)
+    knowledge_created = Column(BigInteger, nullable=False, default=0)
+    messages_sent = Column(BigInteger, nullable=False, default=0)
+    bytes_stored = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(BigInteger)
+
+    # Keyset pagination of the dashboard user listings
+    __table_args__ = (
+        Index("usage_total_chats_created_idx", "chats_created", "user_id"),
+        Index("usage_total_messages_sent_idx", "messages_sent", "user_id"),
+    )
+
+
+class StorageUsage(Base):
+    __tablename__ = "storage_usage"
+
+    user_id = Column(Text, primary_key=True)
+
+    chat_bytes = Column(BigInteger, nullable=False, default=0)
+    message_bytes = Column(BigInteger, nullable=False, default=0)
+    file_bytes = Column(BigInteger, nullable=False, default=0)
+    vector_bytes = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+
+    measured_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (Index("storage_usage_total_bytes_idx", "total_bytes", "user_id"),)
+
+
+class UsageDailyModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: str
+    day: int  # timestamp in epoch
+
+    chats_created: int = 0
+    files_uploaded: int = 0
+    images_uploaded: int = 0
+    knowledge_created: int = 0
+    messages_sent: int = 0
+    bytes_stored: int = 0
+
+    updated_at: Optional[int] = None
+
+
+class StorageUsageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: str
+
+    chat_bytes: int = 0
+    message_bytes: int = 0
+    file_bytes: int = 0
+    vector_bytes: int = 0
+
+    measured_at: int  # timestamp in epoch
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(getattr(self, measure) for measure in STORAGE_MEASURES)
+
+
+def get_day(timestamp: int) -> int:
+    return timestamp - timestamp % DAY
+
+
+def get_file_usage(content_type: Optional[str], size: Optional[int]) -> dict:
+    return {
+        "files_uploaded": 1,
+        "images_uploaded": int(content_type in IMAGE_CONTENT_TYPES),
+        "bytes_stored": size or 0,
+    }
+
+
+def _insert(db, table):
+    """INSERT supporting ON CONFLICT, None on databases without it (e.g. MySQL)."""
+    if db.bind.dialect.name == "sqlite":
+        return sqlite_insert(table)
+    elif db.bind.dialect.name == "postgresql":
+        return postgresql_insert(table)
+    return None
+
+
+def _merge(db, table, rows: list[dict], columns: list[str], increment: bool):
+    """
+    Upsert of `rows` by reading each row first, for databases without ON
+    CONFLICT. Concurrent first writes of a row may conflict; `rebuild_usage`
+    repairs the rollups then.
+    """
+    for row in rows:
+        existing = db.get(
+            table,
+            {column.name: row[column.name] for column in table.__table__.primary_key},
+        )
+        if existing is None:
+            db.add(table(**row))
+            continue
+
+        for column in columns:
+            setattr(
+                existing,
+                column,
+                getattr(table, column) + row[column] if increment else row[column],
+            )
+        if "updated_at" in row:
+            existing.updated_at = row["updated_at"]
+
+
+class UsageTable:
+    def _upsert(self, db, table, rows: list[dict], increment: bool = True):
+        stmt = _insert(db, table)
+        if stmt is None:
+            _merge(db, table, rows, USAGE_COUNTERS, increment)
+            return
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                column.name for column in table.__table__.primary_key.columns
+            ],
+            set_={
+                **{
+                    counter: (
+                        getattr(table, counter) + stmt.excluded[counter]
+                        if increment
+                        else stmt.excluded[counter]
+                    )
+                    for counter in USAGE_COUNTERS
+                },
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt, rows)
+
+    def record_usage(self, user_id: str, timestamp: int, **counters) -> bool:
+        """
+        Add `counters` (which may be negative) to the rollup row of the UTC day
+        containing `timestamp` and to the user's totals, creating them if needed.
+        """
+        return self.record_usages([(user_id, timestamp, counters)])
+
+    def record_usages(self, usages: list[tuple[str, int, dict]]) -> bool:
+        """`record_usage` for many (user_id, timestamp, counters) in one transaction."""
+        now = int(time.time())
+        daily: dict[tuple[str, int], dict] = {}
+        totals: dict[str, dict] = {}
+        for user_id, timestamp, counters in usages:
+            if not user_id or not any(counters.values()):
+                continue
+
+            for row in [
+                daily.setdefault(
+                    (user_id, get_day(timestamp)),
+                    {"user_id": user_id, "day": get_day(timestamp)},
+                ),
+                totals.setdefault(user_id, {"user_id": user_id}),
+            ]:
+                for counter in USAGE_COUNTERS:
+                    row[counter] = row.get(counter, 0) + int(counters.get(counter, 0))
+                row["updated_at"] = now
+
+        if not daily:
+            return True
+
+        try:
+            with get_db() as db:
+                self._upsert(db, UsageDaily, list(daily.values()))
+                self._upsert(db, UsageTotal, list(totals.values()))
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error recording usage for users {list(totals)}: {e}")
+            return False
+
+    def get_usage(
+        self,
+        user_id: Optional[str] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[UsageDailyModel]:
+        with get_db() as db:
+            query = db.query(UsageDaily)
+            if user_id:
+                query = query.filter(UsageDaily.user_id == user_id)
+            if start is not None:
+                query = query.filter(UsageDaily.day >= get_day(start))
+            if end is not None:
+                query = query.filter(UsageDaily.day < end)
+            return [
+                UsageDailyModel.model_validate(usage)
+                for usage in query.order_by(UsageDaily.day).all()
+            ]
+
+    def rebuild_usage(self, user_ids: Optional[list[str]] = None) -> bool:
+        """
+        Recompute the rollups from the source tables, for all users or only for
+        `user_ids`. Used for the initial backfill and to repair drift after bulk
+        deletes.
+        """
+        # Imported here as the source models record their usage through this module
+        from open_webui.models.chats import Chat
+        from open_webui.models.files import File
+        from open_webui.models.knowledge import Knowledge
+        from open_webui.models.messages import Message
+
+        try:
+            with get_db() as db:
+                rows: dict[tuple[str, int], dict] = {}
+
+                def collect(query, user_id_column, counters: list[str]):
+                    if user_ids is not None:
+                        query = query.filter(user_id_column.in_(user_ids))
+
+                    for user_id, day, *values in query.group_by(
+                        user_id_column, "day"
+                    ).all():
+                        if user_id is None or day is None:
+                            continue
+
+                        row = rows.setdefault(
+                            (user_id, day),
+                            {"user_id": user_id, "day": day},
+                        )
+                        for counter, value in zip(counters, values):
+                            row[counter] = int(value or 0)
+
+                collect(
+                    db.query(
+                        Chat.user_id,
+                        ((Chat.created_at // DAY) * DAY).label("day"),
+                        func.count(Chat.id),
+                    ).filter(~Chat.user_id.like("shared-%")),
+                    Chat.user_id,
+                    ["chats_created"],
+                )
+
+                collect(
+                    db.query(
+                        File.user_id,
+                        ((File.created_at // DAY) * DAY).label("day"),
+                        func.count(File.id),
+                        func.sum(
+                            case(
+                                (File.content_type.in_(IMAGE_CONTENT_TYPES), 1),
+                                else_=0,
+                            )
+                        ),
+                        func.sum(File.size),
+                    ),
+                    File.user_id,
+                    ["files_uploaded", "images_uploaded", "bytes_stored"],
+                )
+
+                collect(
+                    db.query(
+                        Knowledge.user_id,
+                        ((Knowledge.created_at // DAY) * DAY).label("day"),
+                        func.count(Knowledge.id),
+                    ),
+                    Knowledge.user_id,
+                    ["knowledge_created"],
+                )
+
+                # Message timestamps are in nanoseconds
+                collect(
+                    db.query(
+                        Message.user_id,
+                        ((Message.created_at // 1_000_000_000 // DAY) * DAY).label(
+                            "day"
+                        ),
+                        func.count(Message.id),
+                    ),
+                    Message.user_id,
+                    ["messages_sent"],
+                )
+
+                for table in [UsageDaily, UsageTotal]:
+                    query = db.query(table)
+                    if user_ids is not None:
+                        query = query.filter(table.user_id.in_(user_ids))
+                    query.delete(synchronize_session=False)
+
+                now = int(time.time())
+                totals: dict[str, dict] = {}
+                for row in rows.values():
+                    total = totals.setdefault(
+                        row["user_id"],
+                        {"user_id": row["user_id"], **{c: 0 for c in USAGE_COUNTERS}},
+                    )
+                    for counter in USAGE_COUNTERS:
+                        total[counter] += row.get(counter, 0)
+
+                if rows:
+                    self._upsert(
+                        db,
+                        UsageDaily,
+                        [
+                            {
+                                **{c: 0 for c in USAGE_COUNTERS},
+                                **row,
+                                "updated_at": now,
+                            }
+                            for row in rows.values()
+                        ],
+                        increment=False,
+                    )
+                    self._upsert(
+                        db,
+                        UsageTotal,
+                        [{**total, "updated_at": now} for total in totals.values()],
+                        increment=False,
+                    )
+                db.commit()
+
+                log.info(f"Rebuilt {len(rows)} usage rollup rows")
+                return True
+        except Exception as e:
+            log.exception(f"Error rebuilding usage rollups: {e}")
+            return False
+
+    def get_storage_usage(
+        self, user_ids: Optional[list[str]] = None
+    ) -> list[StorageUsageModel]:
+        with get_db() as db:
+            query = db.query(StorageUsage)
+            if user_ids is not None:
+                query = query.filter(StorageUsage.user_id.in_(user_ids))
+            return [StorageUsageModel.model_validate(usage) for usage in query.all()]
+
+    def get_storage_measured_at(self) -> Optional[int]:
+        """Start time of the latest storage accounting pass, if any has run."""
+        with get_db() as db:
+            return db.query(func.max(StorageUsage.measured_at)).scalar()
+
+    def upsert_storage_usage(self, rows: list[StorageUsageModel]) -> bool:
+        if not rows:
+            return True
+
+        try:
+            with get_db() as db:
+                rows = [
+                    {**row.model_dump(), "total_bytes": row.total_bytes}
+                    for row in rows
+                ]
+                stmt = _insert(db, StorageUsage)
+                if stmt is None:
+                    _merge(
+                        db,
+                        StorageUsage,
+                        rows,
+                        [*STORAGE_MEASURES, "total_bytes", "measured_at"],
+                        increment=False,
+                    )
+                    db.commit()
+                    return True
+
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["user_id"],
+                    set_={
+                        column: stmt.excluded[column]
+                        for column in [*STORAGE_MEASURES, "total_bytes", "measured_at"]
+                    },
+                )
+                db.execute(stmt, rows)
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error saving storage usage: {e}")
+            return False
+
+
+Usage = UsageTable()
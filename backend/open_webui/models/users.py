@@ -9,7 +9,7 @@ from open_webui.models.groups import Groups
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text
+from sqlalchemy import BigInteger, Column, Index, String, Text
 
 ####################
 # User DB Schema
@@ -35,6 +35,9 @@ class User(Base):
 
     oauth_sub = Column(Text, unique=True)
 
+    # Keyset pagination of the dashboard user listings
+    __table_args__ = (Index("user_last_active_at_idx", "last_active_at", "id"),)
+
 
 class UserSettings(BaseModel):
     ui: Optional[dict] = {}
@@ -1,13 +1,18 @@
+import asyncio
 import json
 import logging
+import zlib
 from typing import Optional
 
 
 from open_webui.socket.main import get_event_emitter
 from open_webui.models.chats import (
+    IMPORT_BATCH_SIZE,
+    ChatBulkImportForm,
     ChatForm,
     ChatImportForm,
     ChatResponse,
+    ChatSearchResponse,
     Chats,
     ChatTitleIdResponse,
 )
@@ -16,13 +21,16 @@ from open_webui.models.folders import Folders
 
 from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
+from open_webui.env import CHAT_IMPORT_MAX_LINE_SIZE, SRC_LOG_LEVELS
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_permission
+from open_webui.utils.export import DOCUMENT_EXPORT_FORMATS, iter_document_export
+from open_webui.utils.misc import decode_cursor, encode_cursor
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -34,18 +42,46 @@ router = APIRouter()
 ############################
 
 
+def get_page_cursor(cursor: Optional[str]) -> Optional[tuple[int, str]]:
+    try:
+        return decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def set_next_cursor(response: Response, chats: list, limit: Optional[int]):
+    """Return the cursor of the next page in the X-Next-Cursor header."""
+    if limit and len(chats) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            chats[-1].updated_at, chats[-1].id
+        )
+
+
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    response: Response,
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
 ):
-    if page is not None:
+    """
+    Chats newest first. Pass `limit` to get the first page and the
+    X-Next-Cursor response header, then `cursor` to get the following pages.
+    `page` (60 chats per page, by offset) is kept for older clients.
+    """
+    if page is not None and cursor is None:
         limit = 60
         skip = (page - 1) * limit
 
         return Chats.get_chat_title_id_list_by_user_id(user.id, skip=skip, limit=limit)
     else:
-        return Chats.get_chat_title_id_list_by_user_id(user.id)
+        chats = Chats.get_chat_title_id_list_by_user_id(
+            user.id, limit=limit, cursor=get_page_cursor(cursor)
+        )
+        set_next_cursor(response, chats, limit)
+        return chats
 
 
 ############################
@@ -76,18 +112,26 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 @router.get("/list/user/{user_id}", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_user_id(
     user_id: str,
+    response: Response,
     user=Depends(get_admin_user),
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
 ):
     if not ENABLE_ADMIN_CHAT_ACCESS:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, skip=skip, limit=limit
+    chats = Chats.get_chat_list_by_user_id(
+        user_id,
+        include_archived=True,
+        skip=skip,
+        limit=limit,
+        cursor=get_page_cursor(cursor),
     )
+    set_next_cursor(response, chats, limit)
+    return chats
 
 
 ############################
@@ -135,12 +179,147 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
         )
 
 
+############################
+# ImportChats
+############################
+
+
+class ChatImportStatus(BaseModel):
+    line: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+async def iter_request_lines(request: Request, max_line_size: int):
+    """
+    Lines of a request body as it is received, gzip-decoded if needed. A line
+    over `max_line_size` bytes is rejected with a 413 before it is read whole.
+    """
+    decompressor = None
+    if request.headers.get("content-encoding") == "gzip":
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    buffer = b""
+    line = 0
+
+    def split(data: bytes) -> list[bytes]:
+        nonlocal buffer, line
+        *lines, buffer = (buffer + data).split(b"\n")
+        for i, part in enumerate(lines + [buffer]):
+            if len(part) > max_line_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=ERROR_MESSAGES.DEFAULT(
+                        f"Line {line + i + 1} is over {max_line_size} bytes"
+                    ),
+                )
+        line += len(lines)
+        return lines
+
+    async for chunk in request.stream():
+        if not decompressor:
+            for data in split(chunk):
+                yield data
+            continue
+
+        # Inflate at most a line's worth at a time, so a small compressed body
+        # cannot expand into memory before the size check
+        while chunk:
+            output = decompressor.decompress(chunk, max_line_size + 1)
+            chunk = decompressor.unconsumed_tail
+            for data in split(output):
+                yield data
+
+    if decompressor:
+        for data in split(decompressor.flush()):
+            yield data
+    if buffer:
+        yield buffer
+
+
+def import_chat_batch(
+    user_id: str, batch: list[tuple[int, ChatBulkImportForm]]
+) -> list[ChatImportStatus]:
+    forms = [form_data for _, form_data in batch]
+
+    tag_ids = [
+        tag.replace(" ", "_").lower()
+        for form_data in forms
+        for tag in (form_data.meta or {}).get("tags", [])
+        if isinstance(tag, str)
+    ]
+    Tags.insert_new_tags(
+        [" ".join([word.capitalize() for word in id.split("_")]) for id in tag_ids],
+        user_id,
+    )
+
+    folder_ids = Folders.insert_new_folders(
+        user_id, list({form_data.folder for form_data in forms if form_data.folder})
+    )
+
+    # Chats whose folder could not be created are reported, not imported
+    # without it
+    report = []
+    imports = []
+    for line, form_data in batch:
+        if form_data.folder:
+            form_data.folder_id = folder_ids.get(form_data.folder)
+            if form_data.folder_id is None:
+                report.append(
+                    ChatImportStatus(
+                        line=line,
+                        error=f"Could not create folder '{form_data.folder}'",
+                    )
+                )
+                continue
+        imports.append((line, form_data))
+
+    ids = Chats.import_chats(user_id, [form_data for _, form_data in imports])
+    return report + [
+        ChatImportStatus(
+            line=line, id=id, error=None if id else ERROR_MESSAGES.DEFAULT()
+        )
+        for (line, _), id in zip(imports, ids)
+    ]
+
+
+@router.post("/import/bulk", response_model=list[ChatImportStatus])
+async def import_chats(request: Request, user=Depends(get_verified_user)):
+    """
+    Import chats from an NDJSON body (optionally gzip-encoded), one chat per
+    line in the shape of `ChatBulkImportForm`, written in batched transactions.
+    Returns the status of each line, or a 413 for a line over
+    CHAT_IMPORT_MAX_LINE_SIZE bytes.
+    """
+    report = []
+    batch = []
+    line = 0
+    async for data in iter_request_lines(request, CHAT_IMPORT_MAX_LINE_SIZE):
+        line += 1
+        if not data.strip():
+            continue
+
+        try:
+            batch.append((line, ChatBulkImportForm.model_validate_json(data)))
+        except ValidationError as e:
+            report.append(ChatImportStatus(line=line, error=e.errors()[0]["msg"]))
+            continue
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            report.extend(await asyncio.to_thread(import_chat_batch, user.id, batch))
+            batch = []
+
+    if batch:
+        report.extend(await asyncio.to_thread(import_chat_batch, user.id, batch))
+    return sorted(report, key=lambda result: result.line)
+
+
 ############################
 # GetChats
 ############################
 
 
-@router.get("/search", response_model=list[ChatTitleIdResponse])
+@router.get("/search", response_model=list[ChatSearchResponse])
 async def search_user_chats(
     text: str, page: Optional[int] = None, user=Depends(get_verified_user)
 ):
@@ -150,12 +329,9 @@ async def search_user_chats(
     limit = 60
     skip = (page - 1) * limit
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id_and_search_text(
-            user.id, text, skip=skip, limit=limit
-        )
-    ]
+    chat_list = Chats.get_chats_by_user_id_and_search_text(
+        user.id, text, skip=skip, limit=limit
+    )
 
     # Delete tag if no chat is found
     words = text.strip().split(" ")
@@ -207,12 +383,59 @@ async def get_user_pinned_chats(user=Depends(get_verified_user)):
 ############################
 
 
-@router.get("/all", response_model=list[ChatResponse])
-async def get_user_chats(user=Depends(get_verified_user)):
-    return [
-        ChatResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id(user.id)
-    ]
+# Exports are streamed rather than validated against a response model; the
+# media types they are sent as are documented here
+EXPORT_RESPONSES = {
+    200: {
+        "model": list[ChatResponse],
+        "description": "The chats as a JSON array, or one chat per line with "
+        "format=ndjson, gzip-compressed with gzip=true",
+        "content": {
+            "application/x-ndjson": {"schema": {"type": "string"}},
+            "application/gzip": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+def export_chats(
+    filename: str,
+    format: str,
+    gzip: bool,
+    user_id: Optional[str] = None,
+    archived: Optional[bool] = None,
+) -> StreamingResponse:
+    """Stream chats as a JSON array or NDJSON without loading them all at once."""
+    if format not in DOCUMENT_EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid format. Use json or ndjson",
+        )
+
+    media_type, extension = DOCUMENT_EXPORT_FORMATS[format]
+    if gzip:
+        media_type, extension = "application/gzip", f"{extension}.gz"
+
+    chats = (
+        ChatResponse(**chat.model_dump()).model_dump()
+        for chat in Chats.iter_chats(user_id=user_id, archived=archived)
+    )
+    return StreamingResponse(
+        iter_document_export(format, chats, gzip=gzip),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{extension}"'
+        },
+    )
+
+
+@router.get("/all", responses=EXPORT_RESPONSES)
+async def get_user_chats(
+    format: str = "json",  # json, ndjson
+    gzip: bool = False,
+    user=Depends(get_verified_user),
+):
+    return export_chats("chats", format, gzip, user_id=user.id)
 
 
 ############################
@@ -220,12 +443,13 @@ async def get_user_chats(user=Depends(get_verified_user)):
 ############################
 
 
-@router.get("/all/archived", response_model=list[ChatResponse])
-async def get_user_archived_chats(user=Depends(get_verified_user)):
-    return [
-        ChatResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chats_by_user_id(user.id)
-    ]
+@router.get("/all/archived", responses=EXPORT_RESPONSES)
+async def get_user_archived_chats(
+    format: str = "json",  # json, ndjson
+    gzip: bool = False,
+    user=Depends(get_verified_user),
+):
+    return export_chats("archived-chats", format, gzip, user_id=user.id, archived=True)
 
 
 ############################
@@ -250,14 +474,18 @@ async def get_all_user_tags(user=Depends(get_verified_user)):
 ############################
 
 
-@router.get("/all/db", response_model=list[ChatResponse])
-async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
+@router.get("/all/db", responses=EXPORT_RESPONSES)
+async def get_all_user_chats_in_db(
+    format: str = "json",  # json, ndjson
+    gzip: bool = False,
+    user=Depends(get_admin_user),
+):
     if not ENABLE_ADMIN_EXPORT:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return [ChatResponse(**chat.model_dump()) for chat in Chats.get_chats()]
+    return export_chats("all-chats", format, gzip)
 
 
 ############################
@@ -341,8 +569,17 @@ async def get_user_chat_list_by_tag_name(
 
 
 @router.get("/{id}", response_model=Optional[ChatResponse])
-async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+async def get_chat_by_id(
+    id: str, active_branch: bool = False, user=Depends(get_verified_user)
+):
+    """
+    With `active_branch`, only the messages up to history.currentId are
+    returned, see GetChatBranchById for loading the other branches.
+    """
+    if active_branch:
+        chat = Chats.get_chat_branch_by_id_and_user_id(id, user.id)
+    else:
+        chat = Chats.get_chat_by_id_and_user_id(id, user.id)
 
     if chat:
         return ChatResponse(**chat.model_dump())
@@ -353,6 +590,26 @@ async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
         )
 
 
+############################
+# GetChatBranchById
+############################
+
+
+@router.get("/{id}/messages/{message_id}/branch", response_model=Optional[ChatResponse])
+async def get_chat_branch_by_id(
+    id: str, message_id: str, user=Depends(get_verified_user)
+):
+    chat = Chats.get_chat_branch_by_id_and_user_id(id, user.id, message_id)
+
+    if chat and chat.chat.get("history", {}).get("messages"):
+        return ChatResponse(**chat.model_dump())
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
+        )
+
+
 ############################
 # UpdateChatById
 ############################
@@ -399,13 +656,14 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
             "content": form_data.content,
         },
     )
+    chat = Chats.get_chat_by_id(id)
 
     event_emitter = get_event_emitter(
         {
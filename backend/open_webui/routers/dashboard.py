@@ -2,8 +2,11 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import func, and_, desc, text
 from sqlalchemy.orm import Session
@@ -14,14 +17,55 @@ from open_webui.models.files import Files, File
 from open_webui.models.groups import Groups, Group
 from open_webui.models.messages import Messages, Message
 from open_webui.models.knowledge import Knowledge, KnowledgeModel
+from open_webui.models.usage import Usage
 from open_webui.internal.db import get_db
 from open_webui.utils.auth import get_admin_user
+from open_webui.utils.dashboard import (
+    DAY_EXPORT_COLUMNS,
+    GROUP_EXPORT_COLUMNS,
+    GROUP_SORTS,
+    TIME_SERIES_GRANULARITIES,
+    USER_EXPORT_COLUMNS,
+    USER_SORTS,
+    ContentStats,
+    GroupContentStats,
+    SnapshotCache,
+    UserContentStats,
+    get_content_totals,
+    get_group_content_stats,
+    get_group_content_stats_page,
+    get_time_series,
+    get_user_content_stats_page,
+    iter_daily_usage_rows,
+    iter_group_usage_rows,
+    iter_user_usage_rows,
+)
+from open_webui.utils.export import EXPORT_FORMATS, has_pyarrow, iter_export
+from open_webui.utils.redis import get_sentinels_from_env
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    DASHBOARD_CACHE_MAX_SNAPSHOTS,
+    DASHBOARD_CACHE_STALE_TTL,
+    DASHBOARD_CACHE_TTL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
 
 log = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Dashboard responses are served from snapshots shared by all workers, see
+# DASHBOARD_CACHE_TTL, DASHBOARD_CACHE_STALE_TTL and DASHBOARD_CACHE_MAX_SNAPSHOTS
+snapshot_cache = SnapshotCache(
+    DASHBOARD_CACHE_TTL,
+    DASHBOARD_CACHE_STALE_TTL,
+    REDIS_URL,
+    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+    max_snapshots=DASHBOARD_CACHE_MAX_SNAPSHOTS,
+)
+
 ############################
 # Dashboard Models
 ############################
@@ -38,6 +82,10 @@ class UserStorageStats(BaseModel):
     storage_usage_mb: float
     last_active: int
 
+class UserStorageStatsPage(BaseModel):
+    items: List[UserStorageStats]
+    next_cursor: Optional[str] = None  # pass as `cursor` to get the next page
+
 class ContentTypeStats(BaseModel):
     content_type: str
     count: int
@@ -55,6 +103,10 @@ class GroupStats(BaseModel):
     total_messages: int
     storage_usage_mb: float
 
+class GroupStatsPage(BaseModel):
+    items: List[GroupStats]
+    next_cursor: Optional[str] = None  # pass as `cursor` to get the next page
+
 class DashboardOverview(BaseModel):
     total_users: int
     active_users_7d: int
@@ -71,12 +123,86 @@ class DashboardOverview(BaseModel):
 
 class TimeRangeStats(BaseModel):
     period: str
+    timestamp: Optional[int] = None  # bucket start in epoch
     chats_created: int
     files_uploaded: int
     images_generated: int
     messages_sent: int
     storage_used_mb: float
 
+############################
+# Helpers
+############################
+
+MAX_PAGE_SIZE = 1000
+
+def to_user_storage_stats(stats: UserContentStats) -> UserStorageStats:
+    return UserStorageStats(
+        user_id=stats.user_id,
+        user_name=stats.name,
+        user_email=stats.email,
+        total_chats=stats.chats,
+        total_files=stats.files,
+        total_images=stats.images,
+        total_knowledge=stats.knowledge,
+        total_messages=stats.messages,
+        storage_usage_mb=round(stats.storage_mb, 2),
+        last_active=stats.last_active_at,
+    )
+
+def to_group_stats(stats: GroupContentStats) -> GroupStats:
+    return GroupStats(
+        group_id=stats.group_id,
+        group_name=stats.name,
+        member_count=stats.member_count,
+        total_chats=stats.chats,
+        total_files=stats.files,
+        total_images=stats.images,
+        total_knowledge=stats.knowledge,
+        total_messages=stats.messages,
+        storage_usage_mb=round(stats.storage_mb, 2),
+    )
+
+def validate_page_params(limit: int, sort: str, sorts: List[str], order: str):
+    if sort not in sorts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort. Use {', '.join(sorts)}"
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid order. Use asc or desc"
+        )
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid limit. Use 1 to {MAX_PAGE_SIZE}"
+        )
+
+def get_content_type_breakdown(totals: ContentStats) -> List[ContentTypeStats]:
+    content_types = [
+        {"type": "chats", "count": totals.chats, "storage": totals.chats_storage_mb},
+        {"type": "files", "count": totals.files, "storage": totals.files_storage_mb},
+        {"type": "images", "count": totals.images, "storage": totals.files_storage_mb * 0.3},  # Estimate 30% of files are images
+        {"type": "knowledge", "count": totals.knowledge, "storage": totals.knowledge_storage_mb},
+        {"type": "messages", "count": totals.messages, "storage": totals.messages_storage_mb},
+    ]
+
+    total_content = sum(ct["count"] for ct in content_types)
+    content_type_stats = []
+
+    for ct in content_types:
+        percentage = (ct["count"] / total_content * 100) if total_content > 0 else 0
+        content_type_stats.append(ContentTypeStats(
+            content_type=ct["type"],
+            count=ct["count"],
+            percentage=round(percentage, 2),
+            total_size_mb=round(ct["storage"], 2)
+        ))
+
+    return content_type_stats
+
 ############################
 # Dashboard Endpoints
 ############################
@@ -84,7 +210,7 @@ class TimeRangeStats(BaseModel):
 @router.get("/overview", response_model=DashboardOverview)
 async def get_dashboard_overview(user=Depends(get_admin_user)):
     """Get comprehensive dashboard overview statistics"""
-    try:
+    def compute():
         with get_db() as db:
             # Get basic counts
             total_users = Users.get_num_users()
@@ -102,187 +228,36 @@ async def get_dashboard_overview(user=Depends(get_admin_user)):
                 User.last_active_at >= thirty_days_ago
             ).count()
             
-            # Get content counts
-            total_chats = db.query(Chat).count()
-            total_files = db.query(File).count()
-            total_knowledge = db.query(Knowledge).count()
-            total_messages = db.query(Message).count()
-            
-            # Count images (files with image content type)
-            # Using a more compatible approach for JSON field queries
-            total_images = 0
-            files = db.query(File).all()
-            for file in files:
-                if file.meta and isinstance(file.meta, dict):
-                    content_type = file.meta.get('content_type', '')
-                    if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                        total_images += 1
-            
-            # Calculate storage usage - FIXED: Use same logic as content types endpoint
-            total_storage_mb = 0
-            
-            # Calculate file storage
-            files_storage_mb = 0
-            for file in files:
-                if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                    files_storage_mb += file.meta['size'] / (1024 * 1024)  # Convert bytes to MB
-            
-            # Calculate storage for each type (same as content types endpoint)
-            knowledge_storage_mb = total_knowledge * 1  # Estimate 1MB per knowledge base
-            chats_storage_mb = total_chats * 0.1  # Estimate 0.1MB per chat
-            messages_storage_mb = total_messages * 0.01  # Estimate 0.01MB per message
-            
-            # Total storage is sum of all types
-            total_storage_mb = files_storage_mb + knowledge_storage_mb + chats_storage_mb + messages_storage_mb
-            
-            # Get content type breakdown with proper storage calculations
-            content_types = [
-                {"type": "chats", "count": total_chats, "storage": chats_storage_mb},
-                {"type": "files", "count": total_files, "storage": files_storage_mb},
-                {"type": "images", "count": total_images, "storage": files_storage_mb * 0.3},  # Estimate 30% of files are images
-                {"type": "knowledge", "count": total_knowledge, "storage": knowledge_storage_mb},
-                {"type": "messages", "count": total_messages, "storage": messages_storage_mb}
-            ]
-            
-            total_content = sum(ct["count"] for ct in content_types)
-            content_type_breakdown = []
-            
-            for ct in content_types:
-                percentage = (ct["count"] / total_content * 100) if total_content > 0 else 0
-                content_type_breakdown.append(ContentTypeStats(
-                    content_type=ct["type"],
-                    count=ct["count"],
-                    percentage=round(percentage, 2),
-                    total_size_mb=round(ct["storage"], 2)  # FIXED: Use actual calculated storage
-                ))
-            
-            # Get top users by storage
-            users = Users.get_users()
-            user_stats = []
-            
-            for user_obj in users:
-                user_chats = db.query(Chat).filter(Chat.user_id == user_obj.id).count()
-                user_files = db.query(File).filter(File.user_id == user_obj.id).count()
-                
-                # Count user images
-                user_images = 0
-                user_file_list = db.query(File).filter(File.user_id == user_obj.id).all()
-                for file in user_file_list:
-                    if file.meta and isinstance(file.meta, dict):
-                        content_type = file.meta.get('content_type', '')
-                        if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                            user_images += 1
-                
-                user_knowledge = db.query(Knowledge).filter(Knowledge.user_id == user_obj.id).count()
-                user_messages = db.query(Message).filter(Message.user_id == user_obj.id).count()
-                
-                # Calculate user storage - FIXED: Include all content types
-                user_storage_mb = 0
-                
-                # File storage
-                for file in user_file_list:
-                    if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                        user_storage_mb += file.meta['size'] / (1024 * 1024)
-                
-                # Add storage estimates for other content types (same as content types endpoint)
-                user_storage_mb += user_knowledge * 1  # Estimate 1MB per knowledge base
-                user_storage_mb += user_chats * 0.1  # Estimate 0.1MB per chat
-                user_storage_mb += user_messages * 0.01  # Estimate 0.01MB per message
-                
-                user_stats.append(UserStorageStats(
-                    user_id=user_obj.id,
-                    user_name=user_obj.name,
-                    user_email=user_obj.email,
-                    total_chats=user_chats,
-                    total_files=user_files,
-                    total_images=user_images,
-                    total_knowledge=user_knowledge,
-                    total_messages=user_messages,
-                    storage_usage_mb=round(user_storage_mb, 2),
-                    last_active=user_obj.last_active_at
-                ))
-            
-            # Sort users by storage usage
-            user_stats.sort(key=lambda x: x.storage_usage_mb, reverse=True)
-            top_users_by_storage = user_stats[:10]
-            
-            # Get top groups by activity
-            groups = Groups.get_groups()
-            group_stats = []
-            
-            for group in groups:
-                member_count = len(group.user_ids) if group.user_ids else 0
-                group_chats = 0
-                group_files = 0
-                group_images = 0
-                group_knowledge = 0
-                group_messages = 0
-                group_storage_mb = 0
-                
-                if group.user_ids:
-                    for user_id in group.user_ids:
-                        user_chats = db.query(Chat).filter(Chat.user_id == user_id).count()
-                        user_files = db.query(File).filter(File.user_id == user_id).count()
-                        
-                        # Count user images
-                        user_file_list = db.query(File).filter(File.user_id == user_id).all()
-                        user_images_count = 0
-                        for file in user_file_list:
-                            if file.meta and isinstance(file.meta, dict):
-                                content_type = file.meta.get('content_type', '')
-                                if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                                    user_images_count += 1
-                        
-                        user_knowledge = db.query(Knowledge).filter(Knowledge.user_id == user_id).count()
-                        user_messages = db.query(Message).filter(Message.user_id == user_id).count()
-                        
-                        group_chats += user_chats
-                        group_files += user_files
-                        group_images += user_images_count
-                        group_knowledge += user_knowledge
-                        group_messages += user_messages
-                        
-                        # Calculate group storage - FIXED: Include all content types
-                        for file in user_file_list:
-                            if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                                group_storage_mb += file.meta['size'] / (1024 * 1024)
-                        
-                        # Add storage estimates for other content types
-                        group_storage_mb += user_knowledge * 1  # Estimate 1MB per knowledge base
-                        group_storage_mb += user_chats * 0.1  # Estimate 0.1MB per chat
-                        group_storage_mb += user_messages * 0.01  # Estimate 0.01MB per message
-                
-                group_stats.append(GroupStats(
-                    group_id=group.id,
-                    group_name=group.name,
-                    member_count=member_count,
-                    total_chats=group_chats,
-                    total_files=group_files,
-                    total_images=group_images,
-                    total_knowledge=group_knowledge,
-                    total_messages=group_messages,
-                    storage_usage_mb=round(group_storage_mb, 2)
-                ))
-            
-            # Sort groups by total activity (chats + files + images + knowledge)
-            group_stats.sort(key=lambda x: x.total_chats + x.total_files + x.total_images + x.total_knowledge, reverse=True)
-            top_groups_by_activity = group_stats[:10]
+            # Get content counts and storage in a handful of aggregate queries
+            totals = get_content_totals(db)
+            content_type_breakdown = get_content_type_breakdown(totals)
+
+            # Top users are read through the storage index
+            user_stats, _ = get_user_content_stats_page(db, "storage", "desc", 10)
+            top_users_by_storage = [to_user_storage_stats(s) for s in user_stats]
+
+            # Group stats are summed in SQL through the group_member table
+            group_stats = get_group_content_stats(db, Groups.get_groups())
+            group_stats.sort(key=lambda x: x.activity, reverse=True)
+            top_groups_by_activity = [to_group_stats(s) for s in group_stats[:10]]
             
             return DashboardOverview(
                 total_users=total_users,
                 active_users_7d=active_users_7d,
                 active_users_30d=active_users_30d,
-                total_chats=total_chats,
-                total_files=total_files,
-                total_images=total_images,
-                total_knowledge=total_knowledge,
-                total_messages=total_messages,
-                total_storage_mb=round(total_storage_mb, 2),  # FIXED: Now includes all storage types
+                total_chats=totals.chats,
+                total_files=totals.files,
+                total_images=totals.images,
+                total_knowledge=totals.knowledge,
+                total_messages=totals.messages,
+                total_storage_mb=round(totals.storage_mb, 2),
                 content_type_breakdown=content_type_breakdown,
                 top_users_by_storage=top_users_by_storage,
                 top_groups_by_activity=top_groups_by_activity
             )
-            
+
+    try:
+        return await snapshot_cache.get("overview", compute)
     except Exception as e:
         log.error(f"Error getting dashboard overview: {e}")
         raise HTTPException(
@@ -290,63 +265,33 @@ async def get_dashboard_overview(user=Depends(get_admin_user)):
             detail="Failed to get dashboard overview"
         )
 
-@router.get("/users/storage", response_model=List[UserStorageStats])
+@router.get("/users/storage", response_model=UserStorageStatsPage)
 async def get_users_storage_stats(
-    limit: Optional[int] = 50,
+    limit: int = 50,
+    sort: str = "storage",  # storage, chats, messages, last_active
+    order: str = "desc",  # asc, desc
+    cursor: Optional[str] = None,  # next_cursor of the previous page
     user=Depends(get_admin_user)
 ):
-    """Get storage usage statistics for all users"""
-    try:
+    """Get a page of storage usage statistics for users"""
+    validate_page_params(limit, sort, USER_SORTS, order)
+
+    def compute():
         with get_db() as db:
-            users = Users.get_users(limit=limit)
-            user_stats = []
-            
-            for user_obj in users:
-                user_chats = db.query(Chat).filter(Chat.user_id == user_obj.id).count()
-                user_files = db.query(File).filter(File.user_id == user_obj.id).count()
-                
-                # Count user images
-                user_images = 0
-                user_file_list = db.query(File).filter(File.user_id == user_obj.id).all()
-                for file in user_file_list:
-                    if file.meta and isinstance(file.meta, dict):
-                        content_type = file.meta.get('content_type', '')
-                        if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                            user_images += 1
-                
-                user_knowledge = db.query(Knowledge).filter(Knowledge.user_id == user_obj.id).count()
-                user_messages = db.query(Message).filter(Message.user_id == user_obj.id).count()
-                
-                # Calculate user storage - FIXED: Include all content types
-                user_storage_mb = 0
-                
-                # File storage
-                for file in user_file_list:
-                    if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                        user_storage_mb += file.meta['size'] / (1024 * 1024)
-                
-                # Add storage estimates for other content types (same as content types endpoint)
-                user_storage_mb += user_knowledge * 1  # Estimate 1MB per knowledge base
-                user_storage_mb += user_chats * 0.1  # Estimate 0.1MB per chat
-                user_storage_mb += user_messages * 0.01  # Estimate 0.01MB per message
-                
-                user_stats.append(UserStorageStats(
-                    user_id=user_obj.id,
-                    user_name=user_obj.name,
-                    user_email=user_obj.email,
-                    total_chats=user_chats,
-                    total_files=user_files,
-                    total_images=user_images,
-                    total_knowledge=user_knowledge,
-                    total_messages=user_messages,
-                    storage_usage_mb=round(user_storage_mb, 2),
-                    last_active=user_obj.last_active_at
-                ))
-            
-            # Sort by storage usage
-            user_stats.sort(key=lambda x: x.storage_usage_mb, reverse=True)
-            return user_stats
-            
+            user_stats, next_cursor = get_user_content_stats_page(
+                db, sort, order, limit, cursor
+            )
+            return UserStorageStatsPage(
+                items=[to_user_storage_stats(s) for s in user_stats],
+                next_cursor=next_cursor,
+            )
+
+    try:
+        return await snapshot_cache.get(
+            f"users/storage:{sort}:{order}:{limit}:{cursor}", compute
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         log.error(f"Error getting users storage stats: {e}")
         raise HTTPException(
@@ -354,75 +299,33 @@ async def get_users_storage_stats(
             detail="Failed to get users storage statistics"
         )
 
-@router.get("/groups/activity", response_model=List[GroupStats])
+@router.get("/groups/activity", response_model=GroupStatsPage)
 async def get_groups_activity_stats(
-    limit: Optional[int] = 50,
+    limit: int = 50,
+    sort: str = "activity",  # activity, storage, chats, messages, members
+    order: str = "desc",  # asc, desc
+    cursor: Optional[str] = None,  # next_cursor of the previous page
     user=Depends(get_admin_user)
 ):
-    """Get activity statistics for all groups"""
-    try:
+    """Get a page of activity statistics for groups"""
+    validate_page_params(limit, sort, GROUP_SORTS, order)
+
+    def compute():
         with get_db() as db:
-            groups = Groups.get_groups()
-            group_stats = []
-            
-            for group in groups:
-                member_count = len(group.user_ids) if group.user_ids else 0
-                group_chats = 0
-                group_files = 0
-                group_images = 0
-                group_knowledge = 0
-                group_messages = 0
-                group_storage_mb = 0
-                
-                if group.user_ids:
-                    for user_id in group.user_ids:
-                        user_chats = db.query(Chat).filter(Chat.user_id == user_id).count()
-                        user_files = db.query(File).filter(File.user_id == user_id).count()
-                        
-                        # Count user images
-                        user_file_list = db.query(File).filter(File.user_id == user_id).all()
-                        user_images_count = 0
-                        for file in user_file_list:
-                            if file.meta and isinstance(file.meta, dict):
-                                content_type = file.meta.get('content_type', '')
-                                if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                                    user_images_count += 1
-                        
-                        user_knowledge = db.query(Knowledge).filter(Knowledge.user_id == user_id).count()
-                        user_messages = db.query(Message).filter(Message.user_id == user_id).count()
-                        
-                        group_chats += user_chats
-                        group_files += user_files
-                        group_images += user_images_count
-                        group_knowledge += user_knowledge
-                        group_messages += user_messages
-                        
-                        # Calculate group storage - FIXED: Include all content types
-                        for file in user_file_list:
-                            if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                                group_storage_mb += file.meta['size'] / (1024 * 1024)
-                        
-                        # Add storage estimates for other content types
-                        group_storage_mb += user_knowledge * 1  # Estimate 1MB per knowledge base
-                        group_storage_mb += user_chats * 0.1  # Estimate 0.1MB per chat
-                        group_storage_mb += user_messages * 0.01  # Estimate 0.01MB per message
-                
-                group_stats.append(GroupStats(
-                    group_id=group.id,
-                    group_name=group.name,
-                    member_count=member_count,
-                    total_chats=group_chats,
-                    total_files=group_files,
-                    total_images=group_images,
-                    total_knowledge=group_knowledge,
-                    total_messages=group_messages,
-                    storage_usage_mb=round(group_storage_mb, 2)
-                ))
-            
-            # Sort by total activity
-            group_stats.sort(key=lambda x: x.total_chats + x.total_files + x.total_images + x.total_knowledge, reverse=True)
-            return group_stats[:limit] if limit else group_stats
-            
+            group_stats, next_cursor = get_group_content_stats_page(
+                db, sort, order, limit, cursor
+            )
+            return GroupStatsPage(
+                items=[to_group_stats(s) for s in group_stats],
+                next_cursor=next_cursor,
+            )
+
+    try:
+        return await snapshot_cache.get(
+            f"groups/activity:{sort}:{order}:{limit}:{cursor}", compute
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         log.error(f"Error getting groups activity stats: {e}")
         raise HTTPException(
@@ -433,55 +336,12 @@ async def get_groups_activity_stats(
 @router.get("/content/types", response_model=List[ContentTypeStats])
 async def get_content_type_statistics(user=Depends(get_admin_user)):
     """Get detailed content type statistics"""
-    try:
+    def compute():
         with get_db() as db:
-            # Get counts
-            total_chats = db.query(Chat).count()
-            total_files = db.query(File).count()
-            total_knowledge = db.query(Knowledge).count()
-            total_messages = db.query(Message).count()
-            
-            # Count images (files with image content type)
-            total_images = 0
-            files_list = db.query(File).all()
-            for file in files_list:
-                if file.meta and isinstance(file.meta, dict):
-                    content_type = file.meta.get('content_type', '')
-                    if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                        total_images += 1
-            
-            # Calculate storage for each type
-            files_storage_mb = 0
-            for file in files_list:
-                if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                    files_storage_mb += file.meta['size'] / (1024 * 1024)
-            
-            knowledge_storage_mb = total_knowledge * 1  # Estimate 1MB per knowledge base
-            chats_storage_mb = total_chats * 0.1  # Estimate 0.1MB per chat
-            messages_storage_mb = total_messages * 0.01  # Estimate 0.01MB per message
-            
-            content_types = [
-                {"type": "chats", "count": total_chats, "storage": chats_storage_mb},
-                {"type": "files", "count": total_files, "storage": files_storage_mb},
-                {"type": "images", "count": total_images, "storage": files_storage_mb * 0.3},  # Estimate 30% of files are images
-                {"type": "knowledge", "count": total_knowledge, "storage": knowledge_storage_mb},
-                {"type": "messages", "count": total_messages, "storage": messages_storage_mb}
-            ]
-            
-            total_content = sum(ct["count"] for ct in content_types)
-            content_type_stats = []
-            
-            for ct in content_types:
-                percentage = (ct["count"] / total_content * 100) if total_content > 0 else 0
-                content_type_stats.append(ContentTypeStats(
-                    content_type=ct["type"],
-                    count=ct["count"],
-                    percentage=round(percentage, 2),
-                    total_size_mb=round(ct["storage"], 2)
-                ))
-            
-            return content_type_stats
-            
+            return get_content_type_breakdown(get_content_totals(db))
+
+    try:
+        return await snapshot_cache.get("content/types", compute)
     except Exception as e:
         log.error(f"Error getting content type statistics: {e}")
         raise HTTPException(
@@ -492,110 +352,135 @@ async def get_content_type_statistics(user=Depends(get_admin_user)):
 @router.get("/time-series", response_model=List[TimeRangeStats])
 async def get_time_series_statistics(
     period: str = "7d",  # 7d, 30d, 90d
+    start: Optional[int] = None,  # epoch seconds, overrides period
+    end: Optional[int] = None,  # epoch seconds, defaults to now
+    granularity: str = "day",  # hour, day, week
+    timezone: str = "UTC",  # IANA timezone used to align buckets
     user=Depends(get_admin_user)
 ):
     """Get time series statistics for content generation"""
     try:
+        tz = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid timezone: {timezone}"
+        )
+
+    if granularity not in TIME_SERIES_GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid granularity. Use hour, day, or week"
+        )
+
+    days = {"7d": 7, "30d": 30, "90d": 90}.get(period)
+    if start is None and days is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid period. Use 7d, 30d, or 90d"
+        )
+
+    if start is not None and start >= (end if end is not None else int(time.time())):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid range. start must be before end"
+        )
+
+    def compute():
+        # Resolved here so that open-ended ranges move with each refresh
+        range_end = end if end is not None else int(time.time())
+        range_start = start
+        if range_start is None:
+            # The last `days` local days, including the current one
+            range_start = int(
+                datetime.combine(
+                    datetime.fromtimestamp(range_end, tz).date() - timedelta(days=days - 1),
+                    datetime.min.time(),
+                    tzinfo=tz,
+                ).timestamp()
+            )
+
         with get_db() as db:
-            now = int(time.time())
-            
-            if period == "7d":
-                days = 7
-            elif period == "30d":
-                days = 30
-            elif period == "90d":
-                days = 90
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid period. Use 7d, 30d, or 90d"
-                )
-            
-            start_time = now - (days * 24 * 60 * 60)
-            time_series_data = []
-            
-            # Debug: Check total counts
-            total_chats = db.query(Chat).count()
-            total_files = db.query(File).count()
-            total_messages = db.query(Message).count()
-            total_knowledge = db.query(Knowledge).count()
-            
-            log.info(f"Total counts - Chats: {total_chats}, Files: {total_files}, Messages: {total_messages}, Knowledge: {total_knowledge}")
-            
-            # Debug: Check some message timestamps
-            sample_messages = db.query(Message).limit(5).all()
-            for msg in sample_messages:
-                log.info(f"Message {msg.id}: created_at = {msg.created_at} (type: {type(msg.created_at)})")
-            
-            for i in range(days):
-                period_start = start_time + (i * 24 * 60 * 60)
-                period_end = period_start + (24 * 60 * 60)
-                
-                # Count content created in this period
-                chats_created = db.query(Chat).filter(
-                    and_(Chat.created_at >= period_start, Chat.created_at < period_end)
-                ).count()
-                
-                files_uploaded = db.query(File).filter(
-                    and_(File.created_at >= period_start, File.created_at < period_end)
-                ).count()
-                
-                # Count images generated in this period
-                images_generated = 0
-                period_files = db.query(File).filter(
-                    and_(File.created_at >= period_start, File.created_at < period_end)
-                ).all()
-                for file in period_files:
-                    if file.meta and isinstance(file.meta, dict):
-                        content_type = file.meta.get('content_type', '')
-                        if content_type in ['image/png', 'image/jpeg', 'image/gif', 'image/webp']:
-                            images_generated += 1
-                
-                knowledge_created = db.query(Knowledge).filter(
-                    and_(Knowledge.created_at >= period_start, Knowledge.created_at < period_end)
-                ).count()
-                
-                # FIXED: Messages use nanoseconds, so convert our time range to nanoseconds
-                period_start_ns = period_start * 1_000_000_000  # Convert seconds to nanoseconds
-                period_end_ns = period_end * 1_000_000_000      # Convert seconds to nanoseconds
-                
-                messages_sent = db.query(Message).filter(
-                    and_(Message.created_at >= period_start_ns, Message.created_at < period_end_ns)
-                ).count()
-                
-                # Debug: Log the first few days to see what's happening
-                if i < 3:
-                    log.info(f"Period {datetime.fromtimestamp(period_start).strftime('%Y-%m-%d')}: "
-                           f"chats={chats_created}, files={files_uploaded}, messages={messages_sent}, "
-                           f"period_start_ns={period_start_ns}, period_end_ns={period_end_ns}")
-                
-                # Calculate storage for this period - FIXED: Include all content types
-                storage_used_mb = 0
-                
-                # File storage
-                for file in period_files:
-                    if file.meta and isinstance(file.meta, dict) and 'size' in file.meta:
-                        storage_used_mb += file.meta['size'] / (1024 * 1024)
-                
-                # Add storage estimates for other content types (same as other endpoints)
-                storage_used_mb += knowledge_created * 1  # Estimate 1MB per knowledge base
-                storage_used_mb += chats_created * 0.1  # Estimate 0.1MB per chat
-                storage_used_mb += messages_sent * 0.01  # Estimate 0.01MB per message
-                
-                time_series_data.append(TimeRangeStats(
-                    period=datetime.fromtimestamp(period_start).strftime("%Y-%m-%d"),
-                    chats_created=chats_created,
-                    files_uploaded=files_uploaded,
-                    images_generated=images_generated,
-                    messages_sent=messages_sent,
-                    storage_used_mb=round(storage_used_mb, 2)
-                ))
-            
-            return time_series_data
-            
+            series = get_time_series(db, range_start, range_end, granularity, tz)
+
+        label_format = "%Y-%m-%d %H:00" if granularity == "hour" else "%Y-%m-%d"
+        return [
+            TimeRangeStats(
+                period=datetime.fromtimestamp(bucket_start, tz).strftime(label_format),
+                timestamp=bucket_start,
+                chats_created=stats.chats,
+                files_uploaded=stats.files,
+                images_generated=stats.images,
+                messages_sent=stats.messages,
+                storage_used_mb=round(stats.storage_mb, 2)
+            )
+            for bucket_start, stats in series
+        ]
+
+    key = f"time-series:{period if start is None else start}:{'now' if end is None else end}:{granularity}:{timezone}"
+    try:
+        return await snapshot_cache.get(key, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         log.error(f"Error getting time series statistics: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get time series statistics"
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/export/{report}")
+async def export_usage(
+    report: str,  # users, groups, days
+    format: str = "csv",  # csv, arrow, parquet
+    start: Optional[int] = None,  # epoch seconds, defaults to all time
+    end: Optional[int] = None,  # epoch seconds, defaults to all time
+    user=Depends(get_admin_user)
+):
+    """Stream usage per user, per group or per user and day over a date range"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid format. Use csv, arrow, or parquet"
+        )
+    if format != "csv" and not has_pyarrow():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Exporting {format} requires the pyarrow package"
+        )
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid range. start must be before end"
+        )
+
+    if report == "users":
+        columns, rows = USER_EXPORT_COLUMNS, iter_user_usage_rows(start, end)
+    elif report == "groups":
+        columns, rows = GROUP_EXPORT_COLUMNS, iter_group_usage_rows(Groups.get_groups(), start, end)
+    elif report == "days":
+        columns, rows = DAY_EXPORT_COLUMNS, iter_daily_usage_rows(start, end)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND
+        )
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        iter_export(format, columns, rows),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="usage-{report}.{extension}"'},
+    )
+
+@router.post("/usage/rebuild")
+async def rebuild_usage_rollups(user=Depends(get_admin_user)):
+    """Rebuild the daily usage rollups from the source tables"""
+    # A full table scan, kept off the event loop
+    if not await run_in_threadpool(Usage.rebuild_usage):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to rebuild usage rollups"
+        )
+    await snapshot_cache.clear()
+    return {"status": True}
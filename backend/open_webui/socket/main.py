@@ -20,6 +20,7 @@ from open_webui.env import (
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_CHAT_SNAPSHOT_INTERVAL,
 )
 from open_webui.utils.auth import decode_token
 from open_webui.socket.utils import RedisDict, RedisLock
@@ -87,6 +88,11 @@ if WEBSOCKET_MANAGER == "redis":
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
+    DELTA_SESSION_POOL = RedisDict(
+        "open-webui:delta_session_pool",
+        redis_url=WEBSOCKET_REDIS_URL,
+        redis_sentinels=redis_sentinels,
+    )
 
     clean_up_lock = RedisLock(
         redis_url=WEBSOCKET_REDIS_URL,
@@ -101,6 +107,7 @@ else:
     SESSION_POOL = {}
     USER_POOL = {}
     USAGE_POOL = {}
+    DELTA_SESSION_POOL = {}
     aquire_func = release_func = renew_func = lambda: True
 
 
@@ -173,6 +180,15 @@ async def usage(sid, data):
     await sio.emit("usage", {"models": get_models_in_use()})
 
 
+def set_session_chat_completion_mode(sid, auth):
+    # Clients that send "chat_completion_mode": "delta" receive the content of
+    # chat:completion events as deltas, others receive the full content
+    if auth.get("chat_completion_mode") == "delta":
+        DELTA_SESSION_POOL[sid] = True
+    elif sid in DELTA_SESSION_POOL:
+        del DELTA_SESSION_POOL[sid]
+
+
 @sio.event
 async def connect(sid, environ, auth):
     user = None
@@ -184,6 +200,7 @@ async def connect(sid, environ, auth):
 
         if user:
             SESSION_POOL[sid] = user.model_dump()
+            set_session_chat_completion_mode(sid, auth)
             if user.id in USER_POOL:
                 USER_POOL[user.id] = USER_POOL[user.id] + [sid]
             else:
@@ -210,6 +227,7 @@ async def user_join(sid, data):
         return
 
     SESSION_POOL[sid] = user.model_dump()
+    set_session_chat_completion_mode(sid, auth)
     if user.id in USER_POOL:
         USER_POOL[user.id] = USER_POOL[user.id] + [sid]
     else:
@@ -283,6 +301,9 @@ async def user_list(sid):
 
 @sio.event
 async def disconnect(sid):
+    if sid in DELTA_SESSION_POOL:
+        del DELTA_SESSION_POOL[sid]
+
     if sid in SESSION_POOL:
         user = SESSION_POOL[sid]
         del SESSION_POOL[sid]
@@ -299,7 +320,81 @@ async def disconnect(sid):
         # print(f"Unknown session ID {sid} disconnected")
 
 
+def get_content_delta(previous, content):
+    """The offset up to which `content` matches `previous` and the rest of it."""
+    if content.startswith(previous):
+        offset = len(previous)
+    else:
+        # Binary search for the longest common prefix
+        low, high = 0, min(len(previous), len(content))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if content.startswith(previous[:middle]):
+                low = middle
+            else:
+                high = middle - 1
+        offset = low
+
+    return offset, content[offset:]
+
+
 def get_event_emitter(request_info, update_db=True):
+    # Whether each session receives content deltas, and for those that do the
+    # content last sent to them, its sequence number and the number of deltas
+    # sent since the last snapshot
+    delta_sessions = {}
+    sent_content = {}
+
+    def get_session_event_data(session_id, event_data):
+        data = event_data.get("data")
+        if event_data.get("type") in (
+            "message",
+            "replace",
+            "chat:message",
+            "chat:message:delta",
+        ):
+            # These change the content on the client, send snapshots next
+            sent_content.clear()
+            return event_data
+
+        if (
+            event_data.get("type") != "chat:completion"
+            or not isinstance(data, dict)
+            or not isinstance(data.get("content"), str)
+        ):
+            return event_data
+
+        if session_id not in delta_sessions:
+            delta_sessions[session_id] = session_id in DELTA_SESSION_POOL
+        if not delta_sessions[session_id]:
+            return event_data
+
+        content = data["content"]
+        previous, seq, deltas = sent_content.get(session_id, (None, 0, 0))
+        seq += 1
+        if (
+            previous is None
+            or data.get("done")
+            or deltas >= WEBSOCKET_CHAT_SNAPSHOT_INTERVAL
+        ):
+            # Send a snapshot of the full content
+            sent_content[session_id] = (content, seq, 0)
+            return {**event_data, "data": {**data, "content_seq": seq}}
+
+        offset, delta = get_content_delta(previous, content)
+        sent_content[session_id] = (content, seq, deltas + 1)
+
+        # A delta applies to the content of sequence number `seq` - 1 only. It
+        # replaces its last `remove` characters, counted in UTF-16 code units
+        # like JavaScript strings, with `content`.
+        data = {key: value for key, value in data.items() if key != "content"}
+        data["content_delta"] = {
+            "seq": seq,
+            "remove": len(previous[offset:].encode("utf-16-le")) // 2,
+            "content": delta,
+        }
+        return {**event_data, "data": data}
+
     async def __event_emitter__(event_data):
         user_id = request_info["user_id"]
 
@@ -320,7 +415,7 @@ def get_event_emitter(request_info, update_db=True):
                 {
                     "chat_id": request_info.get("chat_id", None),
                     "message_id": request_info.get("message_id", None),
-                    "data": event_data,
+                    "data": get_session_event_data(session_id, event_data),
                 },
                 to=session_id,
             )
@@ -334,23 +429,12 @@ def get_event_emitter(request_info, update_db=True):
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                Chats.append_to_message_by_id_and_message_id(
                     request_info["chat_id"],
                     request_info["message_id"],
+                    content=event_data.get("data", {}).get("content", ""),
                 )
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
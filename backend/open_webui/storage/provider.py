@@ -55,6 +55,10 @@ class StorageProvider(ABC):
     def delete_file(self, file_path: str) -> None:
         pass
 
+    @abstractmethod
+    def get_file_size(self, file_path: str) -> int:
+        pass
+
 
 class LocalStorageProvider(StorageProvider):
     @staticmethod
@@ -82,6 +86,12 @@ class LocalStorageProvider(StorageProvider):
         else:
             log.warning(f"File {file_path} not found in local storage.")
 
+    @staticmethod
+    def get_file_size(file_path: str) -> int:
+        """Returns the size in bytes of the file in local storage."""
+        filename = file_path.split("/")[-1]
+        return os.path.getsize(f"{UPLOAD_DIR}/{filename}")
+
     @staticmethod
     def delete_all_files() -> None:
         """Handles deletion of all files from local storage."""
@@ -165,6 +175,15 @@ class S3StorageProvider(StorageProvider):
         # Always delete from local storage
         LocalStorageProvider.delete_file(file_path)
 
+    def get_file_size(self, file_path: str) -> int:
+        """Returns the size in bytes of the file in S3 storage."""
+        try:
+            s3_key = self._extract_s3_key(file_path)
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return response["ContentLength"]
+        except ClientError as e:
+            raise RuntimeError(f"Error getting file size from S3: {e}")
+
     def delete_all_files(self) -> None:
         """Handles deletion of all files from S3 storage."""
         try:
@@ -241,6 +260,16 @@ class GCSStorageProvider(StorageProvider):
         # Always delete from local storage
         LocalStorageProvider.delete_file(file_path)
 
+    def get_file_size(self, file_path: str) -> int:
+        """Returns the size in bytes of the file in GCS storage."""
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        blob = self.bucket.get_blob(filename)
+        if blob is None:
+            raise RuntimeError(
+                f"Error getting file size from GCS: {filename} not found"
+            )
+        return blob.size
+
     def delete_all_files(self) -> None:
         """Handles deletion of all files from GCS storage."""
         try:
@@ -311,6 +340,15 @@ class AzureStorageProvider(StorageProvider):
         # Always delete from local storage
         LocalStorageProvider.delete_file(file_path)
 
+    def get_file_size(self, file_path: str) -> int:
+        """Returns the size in bytes of the file in Azure Blob Storage."""
+        try:
+            filename = file_path.split("/")[-1]
+            blob_client = self.container_client.get_blob_client(filename)
+            return blob_client.get_blob_properties().size
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error getting file size from Azure Blob Storage: {e}")
+
     def delete_all_files(self) -> None:
         """Handles deletion of all files from Azure Blob Storage."""
         try:
@@ -0,0 +1,192 @@
+import json
+
+from sqlalchemy import text
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+
+MESSAGES = {
+    "1": {
+        "id": "1",
+        "parentId": None,
+        "childrenIds": ["2", "3"],
+        "role": "user",
+        "content": "Hello",
+        "timestamp": 1,
+    },
+    "2": {
+        "id": "2",
+        "parentId": "1",
+        "childrenIds": [],
+        "role": "assistant",
+        "content": "Hi",
+        "model": "model1",
+        "timestamp": 2,
+    },
+    "3": {
+        "id": "3",
+        "parentId": "1",
+        "childrenIds": ["4"],
+        "role": "assistant",
+        "content": "Hi there",
+        "model": "model1",
+        "timestamp": 3,
+        "statusHistory": [{"done": True}],
+    },
+    "4": {
+        "id": "4",
+        "parentId": "3",
+        "childrenIds": [],
+        "role": "user",
+        "content": [{"type": "text", "text": "Not a string"}],
+        "timestamp": 4,
+    },
+}
+
+# `ChatModel.chat` as it was stored before the chat_message table
+CHAT = {
+    "title": "chat1",
+    "models": ["model1"],
+    "params": {},
+    "history": {"currentId": "4", "messages": MESSAGES},
+    "messages": [MESSAGES["1"], MESSAGES["3"], MESSAGES["4"]],
+}
+
+
+class TestChatMessages(AbstractSqliteTest):
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.chats import ChatForm, Chats
+
+        self.chats = Chats
+        self.chat_id = self.chats.insert_new_chat("2", ChatForm(chat=CHAT)).id
+
+    def get_rows(self) -> dict:
+        with self.engine.connect() as connection:
+            return {
+                row.id: row
+                for row in connection.execute(
+                    text("SELECT * FROM chat_message WHERE chat_id = :id"),
+                    {"id": self.chat_id},
+                )
+            }
+
+    def get_stored_chat(self) -> dict:
+        with self.engine.connect() as connection:
+            return json.loads(
+                connection.execute(
+                    text("SELECT chat FROM chat WHERE id = :id"), {"id": self.chat_id}
+                ).scalar()
+            )
+
+    def test_split_hydrate_round_trip(self):
+        from open_webui.models.chat_messages import hydrate_chat, split_chat
+
+        chat, messages = split_chat(CHAT)
+        assert messages == MESSAGES
+        assert "messages" not in chat
+        assert "messages" not in chat["history"]
+        assert hydrate_chat(chat, messages) == CHAT
+
+    def test_split_legacy_chat(self):
+        from open_webui.models.chat_messages import hydrate_chat, split_chat
+
+        legacy = {"title": "chat", "messages": [{"role": "user", "content": "Hi"}]}
+        assert split_chat(legacy) == (legacy, None)
+        assert hydrate_chat(legacy, {}) == legacy
+
+    def test_insert_stores_rows(self):
+        rows = self.get_rows()
+        assert set(rows) == set(MESSAGES)
+        assert rows["4"].content is None
+        assert "messages" not in self.get_stored_chat()["history"]
+        assert self.chats.get_chat_by_id(self.chat_id).chat == CHAT
+
+    def test_set_chat_messages(self):
+        from open_webui.internal.db import get_db
+        from open_webui.models.chat_messages import (
+            get_chat_messages,
+            set_chat_messages,
+        )
+
+        updated_at = {id: row.updated_at for id, row in self.get_rows().items()}
+        messages = {
+            "1": MESSAGES["1"],
+            "2": {**MESSAGES["2"], "content": "Hi!"},
+            "5": {"id": "5", "parentId": "2", "role": "user", "content": "New"},
+        }
+        with get_db() as db:
+            set_chat_messages(db, self.chat_id, messages)
+            db.commit()
+
+            assert get_chat_messages(db, [self.chat_id])[self.chat_id] == messages
+
+        # unchanged rows are not rewritten
+        assert self.get_rows()["1"].updated_at == updated_at["1"]
+
+    def test_set_chat_messages_partial(self):
+        from open_webui.internal.db import get_db
+        from open_webui.models.chat_messages import (
+            get_chat_messages,
+            set_chat_messages,
+        )
+
+        with get_db() as db:
+            set_chat_messages(
+                db,
+                self.chat_id,
+                {"2": {**MESSAGES["2"], "content": "Hi!"}},
+                partial=True,
+            )
+            db.commit()
+
+            assert get_chat_messages(db, [self.chat_id])[self.chat_id] == {
+                **MESSAGES,
+                "2": {**MESSAGES["2"], "content": "Hi!"},
+            }
+
+    def test_update_partial_chat(self):
+        chat = self.chats.get_chat_branch_by_id_and_user_id(self.chat_id, "2").chat
+        assert chat["history"]["partial"]
+        assert set(chat["history"]["messages"]) == {"1", "3", "4"}
+
+        chat["history"]["messages"]["4"]["content"] = "Edited"
+        self.chats.update_chat_by_id(self.chat_id, chat)
+
+        messages = self.chats.get_messages_by_chat_id(self.chat_id)
+        assert messages == {**MESSAGES, "4": {**MESSAGES["4"], "content": "Edited"}}
+        assert "partial" not in self.get_stored_chat()["history"]
+
+    def test_upsert_message(self):
+        message = self.chats.upsert_message_to_chat_by_id_and_message_id(
+            self.chat_id, "2", {"content": "Hi!"}
+        )
+        assert message == {**MESSAGES["2"], "content": "Hi!"}
+
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            self.chat_id, "5", {"parentId": "2", "role": "user", "content": "New"}
+        )
+
+        chat = self.chats.get_chat_by_id(self.chat_id).chat
+        assert chat["history"]["currentId"] == "5"
+        assert chat["history"]["messages"]["5"] == {
+            "id": "5",
+            "parentId": "2",
+            "role": "user",
+            "content": "New",
+        }
+        assert [message["id"] for message in chat["messages"]] == ["1", "2", "5"]
+
+    def test_migration(self):
+        from open_webui.internal.db import Session
+
+        Session.remove()
+
+        self.downgrade("4d8f3a6b2c15")
+        try:
+            assert self.get_stored_chat() == CHAT
+        finally:
+            self.upgrade()
+
+        assert set(self.get_rows()) == set(MESSAGES)
+        assert "messages" not in self.get_stored_chat()["history"]
+        assert self.chats.get_chat_by_id(self.chat_id).chat == CHAT
@@ -0,0 +1,153 @@
+from sqlalchemy import text
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+
+
+def make_chat(title: str, *contents: str) -> dict:
+    messages = {
+        str(i): {
+            "id": str(i),
+            "parentId": str(i - 1) if i else None,
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": content,
+            "timestamp": i + 1,
+        }
+        for i, content in enumerate(contents)
+    }
+    return {
+        "title": title,
+        "history": {"currentId": str(len(contents) - 1), "messages": messages},
+    }
+
+
+class TestChatSearch(AbstractSqliteTest):
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.chats import ChatForm, Chats
+
+        self.chats = Chats
+
+        def insert(updated_at, title, *contents):
+            id = Chats.insert_new_chat("2", ChatForm(chat=make_chat(title, *contents))).id
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text("UPDATE chat SET updated_at = :updated_at WHERE id = :id"),
+                    {"updated_at": updated_at, "id": id},
+                )
+            return id
+
+        self.title_id = insert(1000, "Kubernetes notes", "What is a pod?")
+        self.message_id = insert(
+            2000,
+            "Cluster setup",
+            "How do I install kubernetes on my servers?",
+            "Use a deployment <script>alert(1)</script> pipeline.",
+        )
+        self.other_id = insert(3000, "Recipes", "Bake the bread for an hour.")
+
+    def search(self, search_text: str, user_id: str = "2") -> list:
+        return self.chats.get_chats_by_user_id_and_search_text(user_id, search_text)
+
+    def count_indexed(self, fts: str, search_query: str) -> int:
+        with self.engine.connect() as connection:
+            return connection.execute(
+                text(f"SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH :query"),
+                {"query": search_query},
+            ).scalar()
+
+    def test_prefix(self):
+        assert [chat.id for chat in self.search("deploy")] == [self.message_id]
+        assert [chat.id for chat in self.search("PIPE depl")] == [self.message_id]
+        assert [chat.id for chat in self.search("bread")] == [self.other_id]
+
+    def test_every_word(self):
+        assert self.search("deployment bread") == []
+        assert self.search("nothing") == []
+
+    def test_other_users(self):
+        assert self.search("kubernetes", user_id="3") == []
+
+    def test_title_ranks_above_message(self):
+        assert [chat.id for chat in self.search("kubernetes")] == [
+            self.title_id,
+            self.message_id,
+        ]
+
+    def test_snippet(self):
+        (chat,) = self.search("deploy")
+        assert chat.snippet == (
+            "Use a <mark>deployment</mark> &lt;script&gt;alert(1)&lt;/script&gt; "
+            "pipeline."
+        )
+
+        # title matches have no snippet
+        assert self.search("notes")[0].snippet is None
+
+    def test_without_text(self):
+        assert [chat.id for chat in self.search("")] == [
+            self.other_id,
+            self.message_id,
+            self.title_id,
+        ]
+        assert [chat.snippet for chat in self.search("")] == [None, None, None]
+
+    def test_tags(self):
+        self.chats.add_chat_tag_by_id_and_user_id_and_tag_name(
+            self.message_id, "2", "Work"
+        )
+        self.chats.add_chat_tag_by_id_and_user_id_and_tag_name(
+            self.title_id, "2", "Later"
+        )
+
+        assert [chat.id for chat in self.search("tag:work")] == [self.message_id]
+        assert [chat.id for chat in self.search("tag:work kubernetes")] == [
+            self.message_id
+        ]
+        assert self.search("tag:work bread") == []
+        assert self.search("tag:work tag:later") == []
+        assert [chat.id for chat in self.search("tag:none")] == [self.other_id]
+
+    def test_index_follows_message_update(self):
+        chat = self.chats.get_chat_by_id(self.message_id).chat
+        chat["history"]["messages"]["1"]["content"] = "Use a helm chart."
+        self.chats.update_chat_by_id(self.message_id, chat)
+
+        assert self.search("deploy") == []
+        assert [chat.id for chat in self.search("helm")] == [self.message_id]
+        assert self.count_indexed("chat_message_fts", '"deploy"*') == 0
+
+    def test_index_follows_message_delete(self):
+        chat = self.chats.get_chat_by_id(self.message_id).chat
+        del chat["history"]["messages"]["1"]
+        chat["history"]["currentId"] = "0"
+        self.chats.update_chat_by_id(self.message_id, chat)
+
+        assert self.search("deploy") == []
+        assert self.count_indexed("chat_message_fts", '"deploy"*') == 0
+
+    def test_index_follows_title_update(self):
+        self.chats.update_chat_title_by_id(self.title_id, "Container notes")
+
+        assert [chat.id for chat in self.search("kubernetes")] == [self.message_id]
+        assert [chat.id for chat in self.search("container")] == [self.title_id]
+
+    def test_index_follows_chat_delete(self):
+        self.chats.delete_chat_by_id(self.message_id)
+
+        assert self.count_indexed("chat_message_fts", '"deploy"*') == 0
+        assert self.count_indexed("chat_title_fts", '"cluster"*') == 0
+
+    def test_migration(self):
+        from open_webui.internal.db import Session
+
+        Session.remove()
+
+        # the index is built from the existing chats
+        self.downgrade("9a3e7c5d1f80")
+        self.upgrade()
+
+        assert [chat.id for chat in self.search("kubernetes")] == [
+            self.title_id,
+            self.message_id,
+        ]
+        assert self.count_indexed("chat_message_fts", '"deploy"*') == 1
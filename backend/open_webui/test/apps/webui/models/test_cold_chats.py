@@ -0,0 +1,233 @@
+import time
+
+from sqlalchemy import text
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+
+
+def make_chat(title="chat1"):
+    return {
+        "title": title,
+        "models": ["model1"],
+        "history": {
+            "currentId": "3",
+            "messages": {
+                "1": {
+                    "id": "1",
+                    "parentId": None,
+                    "childrenIds": ["2", "3"],
+                    "role": "user",
+                    "content": "Hello",
+                    "timestamp": 1,
+                },
+                "2": {
+                    "id": "2",
+                    "parentId": "1",
+                    "childrenIds": [],
+                    "role": "assistant",
+                    "content": "Hi",
+                    "model": "model1",
+                    "timestamp": 2,
+                },
+                "3": {
+                    "id": "3",
+                    "parentId": "1",
+                    "childrenIds": [],
+                    "role": "assistant",
+                    "content": "Hi there",
+                    "model": "model1",
+                    "timestamp": 3,
+                },
+            },
+        },
+    }
+
+
+class TestColdChats(AbstractSqliteTest):
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.chats import ChatForm, Chats
+
+        self.chats = Chats
+        self.chat_id = self.chats.insert_new_chat("2", ChatForm(chat=make_chat())).id
+        self.expected = self.chats.get_chat_by_id(self.chat_id).chat
+
+    def freeze(self):
+        assert self.chats.move_chats_to_cold_storage(int(time.time()) + 1) == 1
+
+    def is_cold(self) -> bool:
+        from open_webui.internal.db import get_db
+        from open_webui.models.cold_chats import ColdChat
+
+        with get_db() as db:
+            return db.get(ColdChat, self.chat_id) is not None
+
+    def count_messages(self) -> int:
+        with self.engine.connect() as connection:
+            return connection.execute(
+                text("SELECT COUNT(*) FROM chat_message WHERE chat_id = :id"),
+                {"id": self.chat_id},
+            ).scalar()
+
+    def test_freeze(self):
+        self.freeze()
+        assert self.is_cold()
+        assert self.count_messages() == 0
+        # chats already in cold storage are skipped
+        assert self.chats.move_chats_to_cold_storage(int(time.time()) + 1) == 0
+
+    def test_freeze_skips_recent_and_pinned_chats(self):
+        from open_webui.models.chats import ChatForm
+
+        assert self.chats.move_chats_to_cold_storage(0) == 0
+
+        pinned = self.chats.insert_new_chat("2", ChatForm(chat=make_chat("chat2")))
+        self.chats.toggle_chat_pinned_by_id(pinned.id)
+        self.freeze()
+        assert self.chats.get_chat_by_id(pinned.id).pinned
+
+    def test_reads_do_not_thaw(self):
+        self.freeze()
+
+        assert self.chats.get_chat_by_id(self.chat_id).chat == self.expected
+        assert (
+            self.chats.get_chat_by_id_and_user_id(self.chat_id, "2").chat
+            == self.expected
+        )
+        assert (
+            self.chats.get_chat_branch_by_id_and_user_id(self.chat_id, "2").chat
+            == self.expected
+        )
+        assert (
+            self.chats.get_messages_by_chat_id(self.chat_id)
+            == self.expected["history"]["messages"]
+        )
+        assert (
+            self.chats.get_message_by_id_and_message_id(self.chat_id, "2")
+            == self.expected["history"]["messages"]["2"]
+        )
+        assert self.chats.get_message_by_id_and_message_id(self.chat_id, "4") == {}
+
+        assert self.is_cold()
+        assert self.count_messages() == 0
+
+    def test_write_thaws(self):
+        self.freeze()
+
+        chat = self.chats.update_chat_title_by_id(self.chat_id, "renamed")
+        assert chat.chat == {**self.expected, "title": "renamed"}
+        assert not self.is_cold()
+        assert self.count_messages() == 3
+
+    def test_upsert_message_thaws(self):
+        self.freeze()
+
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            self.chat_id, "2", {"content": "Hi!"}
+        )
+        messages = self.chats.get_messages_by_chat_id(self.chat_id)
+        assert messages["2"]["content"] == "Hi!"
+        assert messages["3"] == self.expected["history"]["messages"]["3"]
+        assert not self.is_cold()
+
+    def test_append_thaws(self):
+        self.freeze()
+
+        assert self.chats.append_to_message_by_id_and_message_id(
+            self.chat_id, "3", " you"
+        )
+        assert self.chats.add_message_status_to_chat_by_id_and_message_id(
+            self.chat_id, "3", {"done": True}
+        )
+        message = self.chats.get_message_by_id_and_message_id(self.chat_id, "3")
+        assert message["content"] == "Hi there you"
+        assert message["statusHistory"] == [{"done": True}]
+        assert not self.is_cold()
+
+        assert not self.chats.append_to_message_by_id_and_message_id(
+            self.chat_id, "4", "lost"
+        )
+
+    def test_thaw_after_concurrent_thaw(self):
+        from open_webui.internal.db import get_db
+        from open_webui.models.chats import Chat
+        from open_webui.models.cold_chats import thaw_chat
+
+        self.freeze()
+
+        with get_db() as db:
+            # read while cold, then moved back by another session
+            chat = db.get(Chat, self.chat_id)
+            assert chat.chat["cold"]
+            self.chats.update_chat_title_by_id(self.chat_id, "renamed")
+
+            thaw_chat(db, chat)
+            db.commit()
+            assert chat.chat["title"] == "renamed"
+            assert "cold" not in chat.chat
+
+        assert self.count_messages() == 3
+
+    def test_search(self):
+        self.freeze()
+
+        (chat,) = self.chats.get_chats_by_user_id_and_search_text("2", "there")
+        assert chat.id == self.chat_id
+        # all of its messages are indexed as one text
+        assert "Hi <mark>there</mark>" in chat.snippet
+
+        # found once, from the hot tables, after a thaw
+        self.chats.update_chat_title_by_id(self.chat_id, "renamed")
+        assert [
+            chat.id
+            for chat in self.chats.get_chats_by_user_id_and_search_text("2", "hello")
+        ] == [self.chat_id]
+
+    def test_search_after_delete(self):
+        self.freeze()
+        self.chats.delete_chat_by_id(self.chat_id)
+
+        with self.engine.connect() as connection:
+            assert (
+                connection.execute(
+                    text(
+                        "SELECT COUNT(*) FROM cold_chat_fts "
+                        "WHERE cold_chat_fts MATCH 'hello'"
+                    )
+                ).scalar()
+                == 0
+            )
+
+    def test_search_index_migration(self):
+        from open_webui.internal.db import Session
+
+        self.freeze()
+        Session.remove()
+
+        # the message text of chats frozen before the index is filled in
+        self.downgrade("a4c8e2f6b913")
+        self.upgrade()
+
+        assert [
+            chat.id
+            for chat in self.chats.get_chats_by_user_id_and_search_text("2", "hello")
+        ] == [self.chat_id]
+
+    def test_downgrade(self):
+        from open_webui.internal.db import Session
+
+        self.freeze()
+        Session.remove()
+
+        self.downgrade("7b1e5c9a2d46")
+        try:
+            assert self.count_messages() == 3
+            with self.engine.connect() as connection:
+                assert "cold" not in connection.execute(
+                    text("SELECT chat FROM chat WHERE id = :id"),
+                    {"id": self.chat_id},
+                ).scalar()
+        finally:
+            self.upgrade()
+
+        assert self.chats.get_chat_by_id(self.chat_id).chat == self.expected
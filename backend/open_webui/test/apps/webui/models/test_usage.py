@@ -0,0 +1,132 @@
+import time
+
+import pytest
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+
+
+class TestUsage(AbstractSqliteTest):
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.files import FileForm, Files
+        from open_webui.models.knowledge import KnowledgeForm, Knowledges
+        from open_webui.models.usage import Usage
+
+        self.usage = Usage
+        self.files = Files
+        self.knowledges = Knowledges
+
+        for i, (user_id, content_type) in enumerate(
+            [("2", "image/png"), ("2", "text/plain"), ("3", "image/jpeg")]
+        ):
+            Files.insert_new_file(
+                user_id,
+                FileForm(
+                    id=f"file{i}",
+                    filename=f"file{i}",
+                    path=f"/tmp/file{i}",
+                    meta={"content_type": content_type, "size": 100 * (i + 1)},
+                ),
+            )
+        for user_id in ["2", "3", "3"]:
+            Knowledges.insert_new_knowledge(
+                user_id, KnowledgeForm(name="knowledge", description="")
+            )
+
+    def get_totals(self) -> dict:
+        from open_webui.internal.db import get_db
+        from open_webui.models.usage import USAGE_COUNTERS, UsageTotal
+
+        with get_db() as db:
+            return {
+                total.user_id: {c: getattr(total, c) for c in USAGE_COUNTERS}
+                for total in db.query(UsageTotal).all()
+            }
+
+    def get_daily(self) -> list:
+        return [
+            usage.model_dump(exclude={"updated_at"}) for usage in self.usage.get_usage()
+        ]
+
+    def assert_rebuilt(self):
+        """The rollups equal what rebuilding them from the source tables gives."""
+        totals, daily = self.get_totals(), self.get_daily()
+        assert self.usage.rebuild_usage()
+        assert self.get_totals() == totals
+        assert self.get_daily() == daily
+
+    def test_record(self):
+        assert self.get_totals()["2"]["files_uploaded"] == 2
+        assert self.get_totals()["2"]["images_uploaded"] == 1
+        assert self.get_totals()["2"]["bytes_stored"] == 300
+        assert self.get_totals()["3"]["knowledge_created"] == 2
+        self.assert_rebuilt()
+
+    def test_record_usages(self):
+        now = int(time.time())
+        assert self.usage.record_usages(
+            [
+                ("2", now, {"messages_sent": 1}),
+                ("2", now, {"messages_sent": 2}),
+                ("2", now - 2 * 24 * 60 * 60, {"messages_sent": 4}),
+                ("", now, {"messages_sent": 8}),
+                ("3", now, {}),
+            ]
+        )
+        assert self.get_totals()["2"]["messages_sent"] == 7
+        assert self.get_totals()["3"]["messages_sent"] == 0
+        assert [usage.messages_sent for usage in self.usage.get_usage(user_id="2")] == [
+            4,
+            3,
+        ]
+
+    def test_delete_all_files(self):
+        assert self.files.delete_all_files()
+        for user_id in ["2", "3"]:
+            totals = self.get_totals()[user_id]
+            assert totals["files_uploaded"] == 0
+            assert totals["images_uploaded"] == 0
+            assert totals["bytes_stored"] == 0
+        assert self.get_totals()["3"]["knowledge_created"] == 2
+        self.assert_rebuilt()
+
+    def test_delete_all_knowledge(self):
+        assert self.knowledges.delete_all_knowledge()
+        assert self.get_totals()["2"]["knowledge_created"] == 0
+        assert self.get_totals()["3"]["knowledge_created"] == 0
+        assert self.get_totals()["2"]["files_uploaded"] == 2
+        self.assert_rebuilt()
+
+    @pytest.fixture
+    def without_upsert(self, monkeypatch):
+        from open_webui.models import usage
+
+        monkeypatch.setattr(usage, "_insert", lambda db, table: None)
+
+    def test_record_without_upsert(self, without_upsert):
+        from open_webui.models.knowledge import KnowledgeForm
+
+        self.knowledges.insert_new_knowledge(
+            "4", KnowledgeForm(name="knowledge", description="")
+        )
+        self.knowledges.insert_new_knowledge(
+            "2", KnowledgeForm(name="knowledge", description="")
+        )
+        assert self.get_totals()["4"]["knowledge_created"] == 1
+        assert self.get_totals()["2"]["knowledge_created"] == 2
+        self.assert_rebuilt()
+
+    def test_storage_usage_without_upsert(self, without_upsert):
+        from open_webui.models.usage import StorageUsageModel
+
+        for file_bytes in [100, 200]:
+            assert self.usage.upsert_storage_usage(
+                [
+                    StorageUsageModel(
+                        user_id="2", file_bytes=file_bytes, measured_at=file_bytes
+                    )
+                ]
+            )
+        (usage,) = self.usage.get_storage_usage(["2"])
+        assert usage.file_bytes == 200
+        assert usage.measured_at == 200
@@ -0,0 +1,111 @@
+import gzip
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+from test.util.mock_user import mock_user
+
+
+class TestChatExport(AbstractSqliteTest):
+    ROUTER = "chats"
+    BASE_PATH = "/api/v1/chats"
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.chats import ChatForm, Chats
+
+        self.chats = Chats
+        for i, user_id in enumerate(["2", "2", "2", "3"]):
+            chat = {
+                "title": f"chat{i}",
+                "history": {
+                    "currentId": "1",
+                    "messages": {
+                        "1": {"id": "1", "parentId": None, "content": f"Hi {i}"}
+                    },
+                },
+            }
+            id = Chats.insert_new_chat(user_id, ChatForm(chat=chat)).id
+            if i == 1:
+                Chats.toggle_chat_archive_by_id(id)
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text("UPDATE chat SET updated_at = :updated_at WHERE id = :id"),
+                    {"updated_at": 1000 + i, "id": id},
+                )
+
+    def get_expected(self, path: str) -> list:
+        """The response of `path` before it was streamed."""
+        from open_webui.models.chats import ChatResponse
+
+        chats = {
+            "/all": lambda: self.chats.get_chats_by_user_id("2"),
+            "/all/archived": lambda: self.chats.get_archived_chats_by_user_id("2"),
+            "/all/db": lambda: self.chats.get_chats(),
+        }[path]()
+        return jsonable_encoder([ChatResponse(**chat.model_dump()) for chat in chats])
+
+    def export(self, path: str, **params):
+        with mock_user(self.app, id="2", role="admin"):
+            response = self.fast_api_client.get(
+                f"{self.BASE_PATH}{path}", params=params
+            )
+        assert response.status_code == 200
+        return response
+
+    @pytest.mark.parametrize("path", ["/all", "/all/archived", "/all/db"])
+    def test_json(self, path):
+        response = self.export(path)
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == self.get_expected(path)
+
+    @pytest.mark.parametrize("path", ["/all", "/all/archived", "/all/db"])
+    def test_ndjson(self, path):
+        response = self.export(path, format="ndjson")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [
+            json.loads(line) for line in response.text.splitlines()
+        ] == self.get_expected(path)
+
+    @pytest.mark.parametrize("format", ["json", "ndjson"])
+    def test_gzip(self, format):
+        response = self.export("/all", format=format, gzip="true")
+        assert response.headers["content-type"] == "application/gzip"
+        assert f'.{format}.gz"' in response.headers["content-disposition"]
+
+        # the body is sent as is, without a content-encoding to undo
+        data = gzip.decompress(response.content).decode("utf-8")
+        if format == "json":
+            chats = json.loads(data)
+        else:
+            chats = [json.loads(line) for line in data.splitlines()]
+        assert chats == self.get_expected("/all")
+
+    def test_empty(self):
+        with mock_user(self.app, id="4"):
+            response = self.fast_api_client.get(f"{self.BASE_PATH}/all")
+        assert response.json() == []
+
+    def test_invalid_format(self):
+        with mock_user(self.app, id="2"):
+            response = self.fast_api_client.get(
+                f"{self.BASE_PATH}/all", params={"format": "xml"}
+            )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("path", ["/all", "/all/archived", "/all/db"])
+    def test_openapi(self, path):
+        content = self.app.openapi()["paths"][f"{self.BASE_PATH}{path}"]["get"][
+            "responses"
+        ]["200"]["content"]
+        assert sorted(content) == [
+            "application/gzip",
+            "application/json",
+            "application/x-ndjson",
+        ]
+        assert content["application/json"]["schema"]["items"] == {
+            "$ref": "#/components/schemas/ChatResponse"
+        }
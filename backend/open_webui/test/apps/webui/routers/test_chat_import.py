@@ -0,0 +1,139 @@
+import gzip
+import json
+
+import pytest
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+from test.util.mock_user import mock_user
+
+
+def ndjson(*lines) -> bytes:
+    return "\n".join(
+        line if isinstance(line, str) else json.dumps(line) for line in lines
+    ).encode("utf-8")
+
+
+def make_chat(title: str) -> dict:
+    return {
+        "chat": {
+            "title": title,
+            "history": {
+                "currentId": "1",
+                "messages": {
+                    "1": {"id": "1", "parentId": None, "role": "user", "content": "Hi"}
+                },
+            },
+        },
+        "meta": {"tags": ["imported"]},
+    }
+
+
+class TestChatImport(AbstractSqliteTest):
+    ROUTER = "chats"
+    BASE_PATH = "/api/v1/chats"
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.chats import Chats
+
+        self.chats = Chats
+
+    def import_chats(self, body: bytes, headers=None):
+        with mock_user(self.app, id="2"):
+            return self.fast_api_client.post(
+                f"{self.BASE_PATH}/import/bulk", content=body, headers=headers
+            )
+
+    def test_import_ndjson(self):
+        response = self.import_chats(
+            ndjson(
+                make_chat("chat1"), "", "{not json", {"meta": {}}, make_chat("chat2")
+            )
+        )
+        assert response.status_code == 200
+        report = response.json()
+
+        assert [status["line"] for status in report] == [1, 3, 4, 5]
+        assert report[0]["error"] is None and report[0]["id"]
+        assert report[1]["id"] is None and report[1]["error"]
+        assert report[2]["id"] is None and report[2]["error"]
+        assert report[3]["error"] is None and report[3]["id"]
+
+        chat = self.chats.get_chat_by_id(report[0]["id"])
+        assert chat.user_id == "2"
+        assert chat.title == "chat1"
+        assert chat.chat["history"]["messages"]["1"]["content"] == "Hi"
+        assert chat.meta == {"tags": ["imported"]}
+        assert len(self.chats.get_chats_by_user_id("2")) == 2
+
+    def test_import_gzip(self):
+        response = self.import_chats(
+            gzip.compress(ndjson(make_chat("chat1"), make_chat("chat2"))),
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert [status["error"] for status in response.json()] == [None, None]
+        assert sorted(chat.title for chat in self.chats.get_chats_by_user_id("2")) == [
+            "chat1",
+            "chat2",
+        ]
+
+    def test_import_into_folder(self):
+        from open_webui.models.folders import Folders
+
+        response = self.import_chats(
+            ndjson({**make_chat("chat1"), "folder": "Imported"}, make_chat("chat2"))
+        )
+        report = response.json()
+
+        folder = Folders.get_folder_by_parent_id_and_user_id_and_name(
+            None, "2", "imported"
+        )
+        assert self.chats.get_chat_by_id(report[0]["id"]).folder_id == folder.id
+        assert self.chats.get_chat_by_id(report[1]["id"]).folder_id is None
+
+    def test_import_into_unresolved_folder(self, monkeypatch):
+        from open_webui.models.folders import Folders
+
+        monkeypatch.setattr(Folders, "insert_new_folders", lambda user_id, names: {})
+
+        response = self.import_chats(
+            ndjson({**make_chat("chat1"), "folder": "Imported"}, make_chat("chat2"))
+        )
+        report = response.json()
+
+        assert report[0]["line"] == 1
+        assert report[0]["id"] is None and "Imported" in report[0]["error"]
+        assert report[1]["line"] == 2 and report[1]["error"] is None
+        assert [chat.title for chat in self.chats.get_chats_by_user_id("2")] == [
+            "chat2"
+        ]
+
+    @pytest.fixture
+    def max_line_size(self, monkeypatch):
+        from open_webui.routers import chats
+
+        size = len(json.dumps(make_chat("chat1")))
+        monkeypatch.setattr(chats, "CHAT_IMPORT_MAX_LINE_SIZE", size)
+        return size
+
+    def test_import_gzip_under_max_line_size(self, max_line_size):
+        # inflated a line at a time
+        response = self.import_chats(
+            gzip.compress(ndjson(*[make_chat("chat1")] * 10)),
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert [status["error"] for status in response.json()] == [None] * 10
+
+    def test_import_over_max_line_size(self, max_line_size):
+        response = self.import_chats(ndjson(make_chat("chat1"), make_chat("chat10")))
+        assert response.status_code == 413
+        assert "Line 2" in response.json()["detail"]
+
+    def test_import_gzip_over_max_line_size(self, max_line_size):
+        response = self.import_chats(
+            gzip.compress(b"a" * 1024 * 1024), headers={"Content-Encoding": "gzip"}
+        )
+        assert response.status_code == 413
+        assert "Line 1" in response.json()["detail"]
@@ -0,0 +1,95 @@
+import base64
+
+from sqlalchemy import text
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+from test.util.mock_user import mock_user
+
+
+class TestChatList(AbstractSqliteTest):
+    ROUTER = "chats"
+    BASE_PATH = "/api/v1/chats"
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.chats import ChatForm, Chats
+
+        # Seven chats, five of them updated in the same second
+        ids = [
+            Chats.insert_new_chat("2", ChatForm(chat={"title": f"chat{i}"})).id
+            for i in range(7)
+        ]
+        with self.engine.begin() as connection:
+            for i, id in enumerate(ids):
+                connection.execute(
+                    text("UPDATE chat SET updated_at = :updated_at WHERE id = :id"),
+                    {"updated_at": 2000 if i < 2 else 1000, "id": id},
+                )
+
+        # Newest first, ties broken by id
+        self.ids = sorted(ids[:2], reverse=True) + sorted(ids[2:], reverse=True)
+
+    def get_list(self, **params):
+        with mock_user(self.app, id="2", role="admin"):
+            return self.fast_api_client.get(f"{self.BASE_PATH}/list", params=params)
+
+    def get_pages(self, path: str, limit: int) -> list[list[str]]:
+        pages = []
+        params = {"limit": limit}
+        with mock_user(self.app, id="2", role="admin"):
+            while True:
+                response = self.fast_api_client.get(
+                    f"{self.BASE_PATH}{path}", params=params
+                )
+                assert response.status_code == 200
+                pages.append([chat["id"] for chat in response.json()])
+
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    return pages
+                params = {"limit": limit, "cursor": cursor}
+
+    def test_first_page(self):
+        response = self.get_list(limit=3)
+        assert response.status_code == 200
+        assert [chat["id"] for chat in response.json()] == self.ids[:3]
+        assert response.headers["X-Next-Cursor"]
+
+    def test_pages(self):
+        pages = self.get_pages("/list", 3)
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert sum(pages, []) == self.ids
+
+    def test_pages_within_ties(self):
+        pages = self.get_pages("/list", 2)
+        assert sum(pages, []) == self.ids
+
+    def test_last_full_page(self):
+        # the header is sent for a full page, the page after it is empty
+        pages = self.get_pages("/list", 7)
+        assert pages == [self.ids, []]
+
+    def test_user_chat_list(self):
+        pages = self.get_pages("/list/user/2", 3)
+        assert sum(pages, []) == self.ids
+
+    def test_malformed_cursor(self):
+        for cursor in [
+            "not a cursor",
+            base64.urlsafe_b64encode(b'["1000", 1]').decode(),
+            base64.urlsafe_b64encode(b"{}").decode(),
+        ]:
+            assert self.get_list(limit=3, cursor=cursor).status_code == 400
+
+    def test_page(self):
+        response = self.get_list(page=1)
+        assert response.status_code == 200
+        assert [chat["id"] for chat in response.json()] == self.ids
+        assert "X-Next-Cursor" not in response.headers
+
+        assert self.get_list(page=2).json() == []
+
+    def test_without_limit(self):
+        response = self.get_list()
+        assert [chat["id"] for chat in response.json()] == self.ids
+        assert "X-Next-Cursor" not in response.headers
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from open_webui.socket import main
+
+
+def completion(content: str, **data) -> dict:
+    return {"type": "chat:completion", "data": {"content": content, **data}}
+
+
+class Client:
+    """Applies the chat:completion events of one session like the frontend."""
+
+    def __init__(self):
+        self.content = None
+        self.seq = 0
+
+    def apply(self, data: dict) -> str:
+        if "content_seq" in data:
+            self.content, self.seq = data["content"], data["content_seq"]
+        else:
+            delta = data["content_delta"]
+            assert delta["seq"] == self.seq + 1
+            # `remove` counts UTF-16 code units, like JavaScript string lengths
+            units = self.content.encode("utf-16-le")
+            units = units[: len(units) - 2 * delta["remove"]]
+            self.content = units.decode("utf-16-le") + delta["content"]
+            self.seq = delta["seq"]
+        return self.content
+
+
+class TestEventEmitter:
+    @pytest.fixture(autouse=True)
+    def sessions(self, monkeypatch):
+        self.sent = []
+
+        async def emit(event, data, to=None):
+            self.sent.append((to, data["data"]))
+
+        monkeypatch.setattr(main.sio, "emit", emit)
+        monkeypatch.setattr(main, "USER_POOL", {"1": ["full", "delta"]})
+        monkeypatch.setattr(main, "DELTA_SESSION_POOL", {"delta": True})
+
+    def emit(self, *events) -> tuple[list, list]:
+        """The events the delta session and the other session received."""
+        emitter = main.get_event_emitter({"user_id": "1"}, update_db=False)
+
+        async def run():
+            for event in events:
+                await emitter(event)
+
+        asyncio.run(run())
+        received = {"delta": [], "full": []}
+        for session_id, data in self.sent:
+            received[session_id].append(data)
+        return received["delta"], received["full"]
+
+    def test_deltas(self):
+        contents = ["He", "Hello", "Hello, wor", "Hello, world!"]
+        deltas, full = self.emit(*[completion(content) for content in contents])
+
+        assert full == [completion(content) for content in contents]
+        assert deltas[0] == completion("He", content_seq=1)
+        assert deltas[1]["data"] == {
+            "content_delta": {"seq": 2, "remove": 0, "content": "llo"}
+        }
+
+        client = Client()
+        assert [client.apply(data["data"]) for data in deltas] == contents
+
+    def test_remove_counts_utf16_code_units(self):
+        contents = ["Hi 😀", "Hi 🙂!", "Hi é", "Hi 😀😀x", "Hi"]
+        deltas, _ = self.emit(*[completion(content) for content in contents])
+
+        assert [data["data"]["content_delta"]["remove"] for data in deltas[1:]] == [
+            2,
+            3,
+            1,
+            6,
+        ]
+        client = Client()
+        assert [client.apply(data["data"]) for data in deltas] == contents
+
+    def test_snapshots(self, monkeypatch):
+        monkeypatch.setattr(main, "WEBSOCKET_CHAT_SNAPSHOT_INTERVAL", 2)
+        deltas, _ = self.emit(
+            completion("a"),
+            completion("ab"),
+            completion("abc"),
+            # a snapshot after every interval deltas
+            completion("abcd"),
+            completion("abcde"),
+            # events changing the content on the client are followed by one,
+            # and the sequence starts over
+            {"type": "replace", "data": {"content": "x"}},
+            completion("xy"),
+            # and the last content is sent in full
+            completion("xyz", done=True),
+        )
+
+        assert [data["data"].get("content_seq") for data in deltas] == [
+            1,
+            None,
+            None,
+            4,
+            None,
+            None,
+            1,
+            2,
+        ]
+        assert deltas[-1]["data"] == {"content": "xyz", "done": True, "content_seq": 2}
+
+    def test_other_events(self):
+        status = {"type": "status", "data": {"description": "Searching"}}
+        deltas, full = self.emit(status, completion("a"), status)
+        assert deltas == [status, completion("a", content_seq=1), status]
+        assert full == [status, completion("a"), status]
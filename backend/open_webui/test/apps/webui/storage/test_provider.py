@@ -88,6 +88,14 @@ class TestLocalStorageProvider:
         self.Storage.delete_file(file_path)
         assert not (upload_dir / self.filename).exists()
 
+    def test_get_file_size(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        (upload_dir / self.filename).write_bytes(self.file_content)
+        file_path = str(upload_dir / self.filename)
+        assert self.Storage.get_file_size(file_path) == len(self.file_content)
+        with pytest.raises(OSError):
+            self.Storage.get_file_size(str(upload_dir / self.filename_extra))
+
     def test_delete_all_files(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         (upload_dir / self.filename).write_bytes(self.file_content)
@@ -154,6 +162,18 @@ class TestS3StorageProvider:
         assert error["Code"] == "404"
         assert error["Message"] == "Not Found"
 
+    def test_get_file_size(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        contents, s3_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename
+        )
+        assert self.Storage.get_file_size(s3_file_path) == len(self.file_content)
+        with pytest.raises(RuntimeError):
+            self.Storage.get_file_size(
+                "s3://" + self.Storage.bucket_name + "/" + self.filename_extra
+            )
+
     def test_delete_all_files(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         # create 2 files
@@ -265,6 +285,17 @@ class TestGCSStorageProvider:
         assert not (upload_dir / self.filename).exists()
         assert self.Storage.bucket.get_blob(self.filename) == None
 
+    def test_get_file_size(self, monkeypatch, tmp_path, setup):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        contents, gcs_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename
+        )
+        assert self.Storage.get_file_size(gcs_file_path) == len(self.file_content)
+        with pytest.raises(RuntimeError):
+            self.Storage.get_file_size(
+                "gs://" + self.Storage.bucket_name + "/" + self.filename_extra
+            )
+
     def test_delete_all_files(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         # create 2 files
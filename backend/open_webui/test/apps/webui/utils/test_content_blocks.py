@@ -0,0 +1,137 @@
+import random
+
+import pytest
+from open_webui.utils.content_blocks import ContentBlockRenderer, TagContentHandler
+
+REASONING_TAGS = [("think", "/think"), ("reasoning", "/reasoning")]
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+# A tool call is made and answered where the stream has a TOOL_CALL
+TOOL_CALL = "\x00"
+
+TEXTS = [
+    "Hello <think>Let me\nthink about\n> it.\n</think>The answer is 42.",
+    "<reasoning>step one\nstep two</reasoning>\n\nRun it:\n"
+    '<code_interpreter type="code" lang="python">\nprint(1)\n</code_interpreter>'
+    "It printed 1.",
+    "Looking it up.\x00<think>The tool\nsaid yes</think>Yes.\x00Bye <think></think>!",
+    "<|begin_of_solution|>x = 1<|end_of_solution|> and ```python\n"
+    "<code_interpreter>print(2)</code_interpreter>\x00",
+    "a > b <think\nhard>no closing tag\nyet",
+    "<think>\n  one\ntwo\n</think>then<think>three\nfour\n</think>done",
+]
+
+TIMING = {"started_at", "ended_at"}
+
+
+def split(text: str, sizes: list[int]) -> list[str]:
+    chunks, i = [], 0
+    while i < len(text):
+        size = sizes[len(chunks) % len(sizes)]
+        chunks.append(text[i : i + size])
+        i += size
+    return chunks
+
+
+def stream(text: str, sizes: list[int], incremental: bool) -> list[tuple]:
+    """
+    Feed `text` in chunks through the tag handlers and the renderer like the
+    middleware does, and return the content, the blocks and their renderings
+    after every step. Unless `incremental`, tags are scanned for from the start
+    of the content and all blocks are rendered on every call.
+    """
+    handler, renderer = TagContentHandler(), ContentBlockRenderer()
+    content, blocks = "", [{"type": "text", "content": ""}]
+    steps = []
+
+    def step():
+        if incremental:
+            rendered = [renderer.serialize(blocks, raw) for raw in (False, True)]
+        else:
+            rendered = [
+                ContentBlockRenderer().render(blocks, raw).strip()
+                for raw in (False, True)
+            ]
+        steps.append(
+            (
+                content,
+                [{k: v for k, v in b.items() if k not in TIMING} for b in blocks],
+                *rendered,
+            )
+        )
+
+    def handle(content_type, tags):
+        nonlocal handler, content, blocks
+        if not incremental:
+            handler = TagContentHandler()
+        content, blocks, end = handler(content_type, tags, content, blocks)
+        return end
+
+    for chunk in split(text, sizes):
+        for i, value in enumerate(chunk.split(TOOL_CALL)):
+            if i:
+                tool_call = {"id": "1", "function": {"name": "search"}}
+                blocks.append({"type": "tool_calls", "content": [tool_call]})
+                step()
+                blocks[-1]["results"] = [{"tool_call_id": "1", "content": "yes"}]
+                blocks.append({"type": "text", "content": ""})
+                step()
+            if not value:
+                continue
+
+            content = f"{content}{value}"
+            blocks[-1]["content"] = blocks[-1]["content"] + value
+
+            handle("reasoning", REASONING_TAGS)
+            if handle("code_interpreter", CODE_INTERPRETER_TAGS):
+                blocks[-1]["output"] = {"stdout": "1\n"}
+                blocks.append({"type": "text", "content": ""})
+            handle("solution", SOLUTION_TAGS)
+            step()
+
+    return steps
+
+
+def get_chunk_sizes(seed: int) -> list[int]:
+    rng = random.Random(seed)
+    return [rng.randint(1, 12) for _ in range(64)]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_matches_full(text, seed):
+    sizes = get_chunk_sizes(seed)
+    assert stream(text, sizes, incremental=True) == stream(
+        text, sizes, incremental=False
+    )
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_tags_split_everywhere(text):
+    # every tag is split across chunks
+    assert stream(text, [1], incremental=True) == stream(text, [1], incremental=False)
+
+
+def test_renders_full_output():
+    steps = stream(TEXTS[0], [3], incremental=True)
+    content, blocks, serialized, raw = steps[-1]
+
+    assert [block["type"] for block in blocks] == ["text", "reasoning", "text"]
+    assert "> Let me\n> think about\n> it." in serialized
+    assert raw.startswith("Hello\n\n<think>Let me")
+
+
+def test_serialize_after_blocks_replaced():
+    renderer = ContentBlockRenderer()
+    blocks = [
+        {"type": "text", "content": "first"},
+        {"type": "text", "content": "second"},
+    ]
+    assert renderer.serialize(blocks) == "first\nsecond"
+
+    # a rendered block is replaced rather than appended to
+    blocks[0] = {"type": "text", "content": "replaced"}
+    assert renderer.serialize(blocks) == "replaced\nsecond"
+    blocks.pop(0)
+    assert renderer.serialize(blocks) == "second"
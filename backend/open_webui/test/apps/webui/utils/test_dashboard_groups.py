@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from test.util.abstract_sqlite_test import AbstractSqliteTest
+
+
+def get_sort_value(stats, sort: str) -> float:
+    return {
+        "activity": stats.activity,
+        "storage": stats.storage_mb,
+        "chats": stats.chats,
+        "messages": stats.messages,
+        "members": stats.member_count,
+    }[sort]
+
+
+class TestGroupContentStatsPage(AbstractSqliteTest):
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.groups import GroupForm, GroupUpdateForm, Groups
+        from open_webui.models.usage import StorageUsageModel, Usage
+
+        for name, user_ids in [
+            ("a", ["2", "3"]),
+            ("b", ["3"]),
+            ("c", []),
+            ("d", ["4"]),
+        ]:
+            group = Groups.insert_new_group("1", GroupForm(name=name, description=""))
+            Groups.update_group_by_id(
+                group.id, GroupUpdateForm(name=name, description="", user_ids=user_ids)
+            )
+
+        now = int(time.time())
+        Usage.record_usages(
+            [
+                ("2", now, {"chats_created": 5, "files_uploaded": 1}),
+                ("3", now, {"chats_created": 1, "messages_sent": 10}),
+                ("4", now, {"knowledge_created": 6, "bytes_stored": 1024}),
+            ]
+        )
+        Usage.upsert_storage_usage(
+            [
+                StorageUsageModel(user_id="2", file_bytes=1024 * 1024, measured_at=now),
+                StorageUsageModel(
+                    user_id="3", chat_bytes=3 * 1024 * 1024, measured_at=now
+                ),
+            ]
+        )
+
+    def get_pages(self, sort: str, order: str, limit: int) -> list:
+        from open_webui.internal.db import get_db
+        from open_webui.utils.dashboard import get_group_content_stats_page
+
+        pages, cursor = [], None
+        with get_db() as db:
+            while True:
+                page, cursor = get_group_content_stats_page(
+                    db, sort, order, limit, cursor
+                )
+                pages.append(page)
+                if cursor is None:
+                    return pages
+
+    @pytest.mark.parametrize(
+        "sort", ["activity", "storage", "chats", "messages", "members"]
+    )
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_pages(self, sort, order):
+        pages = self.get_pages(sort, order, limit=1)
+        stats = [s for page in pages for s in page]
+        assert [len(page) for page in pages[:4]] == [1, 1, 1, 1]
+
+        # ordered in SQL like the stats computed in memory
+        assert [s.group_id for s in stats] == [
+            s.group_id
+            for s in sorted(
+                stats,
+                key=lambda s: (get_sort_value(s, sort), s.group_id),
+                reverse=order == "desc",
+            )
+        ]
+
+    def test_stats(self):
+        (page,) = self.get_pages("storage", "desc", limit=10)
+        stats = {s.name: s for s in page}
+
+        assert [s.name for s in page] == ["d", "a", "b", "c"]
+        assert stats["a"].member_count == 2
+        assert stats["a"].chats == 6
+        assert stats["a"].measured
+        assert stats["a"].storage_mb == 4
+        assert not stats["d"].measured
+        assert stats["c"].member_count == 0
@@ -0,0 +1,162 @@
+import asyncio
+
+from open_webui.utils.event_coalescer import EventCoalescer
+
+
+def snapshot(content: str) -> dict:
+    return {"type": "chat:completion", "data": {"content": content}}
+
+
+def delta(content: str) -> dict:
+    return {
+        "type": "chat:completion",
+        "data": {"choices": [{"delta": {"content": content}, "finish_reason": None}]},
+    }
+
+
+def get_delta(event: dict) -> str:
+    return event["data"]["choices"][0]["delta"]["content"]
+
+
+class Emitter:
+    def __init__(self):
+        self.events = []
+
+    async def __call__(self, event: dict):
+        self.events.append(event)
+
+
+def test_merges_deltas():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=60, size=100)
+        for content in ["Hel", "lo", " world"]:
+            await coalescer.emit(delta(content))
+        assert emitter.events == []
+        await coalescer.flush()
+
+    asyncio.run(run())
+    assert [get_delta(event) for event in emitter.events] == ["Hello world"]
+
+
+def test_keeps_last_snapshot():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=60, size=100)
+        for content in ["H", "He", "Hello"]:
+            await coalescer.emit(snapshot(content))
+        await coalescer.flush()
+
+    asyncio.run(run())
+    assert emitter.events == [snapshot("Hello")]
+
+
+def test_order():
+    emitter = Emitter()
+    status = {"type": "status", "data": {"description": "Searching"}}
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=60, size=100)
+        await coalescer.emit(delta("a"))
+        await coalescer.emit(delta("b"))
+        # other events flush what is held before them
+        await coalescer.emit(status)
+        await coalescer.emit(delta("c"))
+        # so do events of the other kind of chat:completion
+        await coalescer.emit(snapshot("abcd"))
+        await coalescer.emit(delta("e"))
+        await coalescer.flush()
+
+    asyncio.run(run())
+    assert get_delta(emitter.events[0]) == "ab"
+    assert emitter.events[1:] == [status, delta("c"), snapshot("abcd"), delta("e")]
+
+
+def test_flush_on_size():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=60, size=5)
+        for content in ["abc", "def", "g"]:
+            await coalescer.emit(delta(content))
+        assert [get_delta(event) for event in emitter.events] == ["abcdef"]
+
+        # snapshots count the content added since the last one sent
+        coalescer = EventCoalescer(emitter, interval=60, size=5)
+        for content in ["abcdefg", "abcdefgh", "abcdefghijkl"]:
+            await coalescer.emit(snapshot(content))
+        await coalescer.emit(snapshot("abcdefghijklm"))
+        assert emitter.events[1:] == [snapshot("abcdefg"), snapshot("abcdefghijkl")]
+
+    asyncio.run(run())
+
+
+def test_flush_on_interval():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=0.01, size=100)
+        await coalescer.emit(delta("a"))
+        await coalescer.emit(delta("b"))
+        await asyncio.sleep(0.05)
+        assert [get_delta(event) for event in emitter.events] == ["ab"]
+        assert coalescer.timer is None
+
+    asyncio.run(run())
+
+
+def test_flush_on_completion():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=60, size=100)
+        await coalescer.emit(delta("a"))
+        await coalescer.flush()
+        # nothing is held anymore, and the timer is stopped
+        await coalescer.flush()
+        assert coalescer.timer is None
+
+    asyncio.run(run())
+    assert [get_delta(event) for event in emitter.events] == ["a"]
+
+
+def test_flush_on_cancel():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=0.01, size=100)
+
+        # like the response handler: flush when the task is cancelled
+        async def respond():
+            try:
+                await coalescer.emit(delta("a"))
+                await coalescer.emit(delta("b"))
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                await coalescer.flush()
+                await emitter({"type": "task-cancelled"})
+
+        task = asyncio.create_task(respond())
+        await asyncio.sleep(0)
+        task.cancel()
+        await task
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert get_delta(emitter.events[0]) == "ab"
+    # the held event is sent once, before the cancellation
+    assert emitter.events[1:] == [{"type": "task-cancelled"}]
+
+
+def test_disabled():
+    emitter = Emitter()
+
+    async def run():
+        coalescer = EventCoalescer(emitter, interval=0, size=100)
+        await coalescer.emit(delta("a"))
+        await coalescer.emit(delta("b"))
+
+    asyncio.run(run())
+    assert emitter.events == [delta("a"), delta("b")]
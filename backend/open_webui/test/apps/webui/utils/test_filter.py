@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils.filter import FilterPipeline
+
+
+def make_request(**modules):
+    """A request whose app has the filter `modules` loaded already."""
+    return SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(FUNCTIONS=modules))
+    )
+
+
+def make_pipeline(request, filter_type="stream", extra_params=None):
+    return FilterPipeline(
+        request,
+        [SimpleNamespace(id=id) for id in request.app.state.FUNCTIONS],
+        filter_type,
+        extra_params or {},
+    )
+
+
+def test_handlers_run_in_order():
+    calls = []
+
+    def first(event, __id__):
+        calls.append(__id__)
+        return {**event, "first": True}
+
+    async def second(event, __id__):
+        calls.append(__id__)
+        return {**event, "second": True}
+
+    request = make_request(
+        a=SimpleNamespace(stream=first),
+        b=SimpleNamespace(inlet=first),
+        c=SimpleNamespace(stream=second),
+    )
+    pipeline = make_pipeline(request)
+
+    # filters without a handler of the type are left out
+    assert [filter_id for filter_id, *_ in pipeline.handlers] == ["a", "c"]
+    assert asyncio.run(pipeline.process({"n": 1})) == {
+        "n": 1,
+        "first": True,
+        "second": True,
+    }
+    assert calls == ["a", "c"]
+
+
+def test_body_and_params():
+    def inlet(body, __user__, __metadata__=None):
+        __user__["seen"] = True
+        return {**body, "user": __user__["id"], "metadata": __metadata__}
+
+    request = make_request(a=SimpleNamespace(inlet=inlet))
+    user = {"id": "1"}
+    pipeline = make_pipeline(
+        request, "inlet", {"__user__": user, "__metadata__": {"chat_id": "2"}}
+    )
+
+    assert asyncio.run(pipeline.process({})) == {
+        "user": "1",
+        "metadata": {"chat_id": "2"},
+    }
+    # each handler gets its own user
+    assert user == {"id": "1"}
+
+
+@pytest.mark.parametrize("is_coroutine", [False, True])
+def test_error_propagation(is_coroutine):
+    calls = []
+
+    def ok(event, __id__):
+        calls.append(__id__)
+        return event
+
+    def fail(event, __id__):
+        calls.append(__id__)
+        if event.get("bad"):
+            raise ValueError(f"{__id__} failed")
+        return event
+
+    async def fail_async(event, __id__):
+        return fail(event, __id__)
+
+    request = make_request(
+        a=SimpleNamespace(stream=ok),
+        b=SimpleNamespace(stream=fail_async if is_coroutine else fail),
+        c=SimpleNamespace(stream=ok),
+    )
+    pipeline = make_pipeline(request)
+
+    # the error of the failing filter is raised as is, and the filters after it
+    # do not run
+    with pytest.raises(ValueError, match="b failed"):
+        asyncio.run(pipeline.process({"bad": True}))
+    assert calls == ["a", "b"]
+
+    # the next chunk goes through all of them
+    calls.clear()
+    assert asyncio.run(pipeline.process({"n": 1})) == {"n": 1}
+    assert calls == ["a", "b", "c"]
@@ -0,0 +1,86 @@
+import asyncio
+import fnmatch
+
+from open_webui.utils.dashboard import SnapshotCache
+
+
+class FakeRedis:
+    """The part of the async Redis client the cache uses, shared by "workers"."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def scan_iter(self, pattern):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, pattern):
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def make_cache(redis=None, **kwargs) -> SnapshotCache:
+    cache = SnapshotCache(60, 600, **kwargs)
+    cache.redis = redis
+    return cache
+
+
+def test_computes_once_while_fresh():
+    cache = make_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"count": len(calls)}
+
+    async def run():
+        return [await cache.get("key", compute) for _ in range(3)]
+
+    assert asyncio.run(run()) == [{"count": 1}] * 3
+    assert calls == [1]
+
+
+def test_evicts_least_recently_used():
+    cache = make_cache(max_snapshots=2)
+
+    async def run():
+        await cache.get("a", lambda: "a")
+        await cache.get("b", lambda: "b")
+        await cache.get("a", lambda: "recomputed")
+        await cache.get("c", lambda: "c")
+
+    asyncio.run(run())
+    assert list(cache.snapshots) == ["a", "c"]
+
+
+def test_evicts_expired_snapshots():
+    cache = make_cache()
+    cache.snapshots["key"] = (0, "expired")
+
+    assert asyncio.run(cache.get("key", lambda: "new")) == "new"
+    assert cache.snapshots["key"][1] == "new"
+
+
+def test_shared_through_redis():
+    redis = FakeRedis()
+    first, second = make_cache(redis), make_cache(redis)
+
+    async def run():
+        await first.get("key", lambda: {"value": 1})
+        return await second.get("key", lambda: {"value": 2})
+
+    assert asyncio.run(run()) == {"value": 1}
+
+    asyncio.run(first.clear())
+    assert redis.data == {}
+    assert first.snapshots == {}
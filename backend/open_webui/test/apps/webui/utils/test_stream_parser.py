@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+from open_webui.utils import stream_parser
+from open_webui.utils.stream_parser import StreamParser, parse_stream
+
+
+def feed_all(parser, chunks):
+    values = []
+    for chunk in chunks:
+        values.extend(parser.feed(chunk))
+    return values + parser.close()
+
+
+def chunk_body(body, size):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+EVENTS = [
+    {"choices": [{"delta": {"content": "Hé"}}]},
+    {"choices": [{"delta": {"content": "llo 👋"}}]},
+    {"choices": [{"delta": {}, "finish_reason": "stop"}]},
+]
+
+SSE_BODY = (
+    "".join(f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in EVENTS)
+    + "data: [DONE]\n\n"
+).encode("utf-8")
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(SSE_BODY)])
+def test_sse_split_anywhere(size):
+    parser = StreamParser()
+    assert feed_all(parser, chunk_body(SSE_BODY, size)) == EVENTS
+    assert parser.done
+
+
+def test_sse_line_breaks():
+    body = SSE_BODY.decode("utf-8")
+    for line_break in ("\r\n", "\r"):
+        parser = StreamParser()
+        chunks = chunk_body(body.replace("\n", line_break), 1)
+        assert feed_all(parser, chunks) == EVENTS
+
+
+def test_sse_multi_line_event():
+    parser = StreamParser()
+    body = 'data: {"a":\ndata: 1,\ndata: "b": [2]}\n\n'
+    assert feed_all(parser, [body]) == [{"a": 1, "b": [2]}]
+
+
+def test_sse_without_blank_lines():
+    parser = StreamParser()
+    body = 'data: {"a": 1}\ndata: {"a": 2}\n'
+    assert feed_all(parser, [body]) == [{"a": 1}, {"a": 2}]
+
+
+def test_sse_ignores_other_fields_and_invalid_payloads():
+    parser = StreamParser()
+    body = (
+        ": keep-alive\n\n"
+        "event: message\nid: 1\nretry: 10\n"
+        'data: {"a": 1}\n\n'
+        "data: not json\n\n"
+        'data:{"a": 2}\n\n'
+    )
+    assert feed_all(parser, [body]) == [{"a": 1}, {"a": 2}]
+    assert not parser.done
+
+
+def test_sse_trailing_event_without_line_break():
+    parser = StreamParser()
+    assert feed_all(parser, ['data: {"a": 1}']) == [{"a": 1}]
+
+
+def test_ndjson():
+    parser = StreamParser("ndjson")
+    body = b'{"a": 1}\n\n{"b": "\xc3\xa9"}\n{"c": 3}'
+    assert feed_all(parser, chunk_body(body, 2)) == [{"a": 1}, {"b": "é"}, {"c": 3}]
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        StreamParser("xml")
+
+
+def test_json_fallback(monkeypatch):
+    monkeypatch.setattr(stream_parser, "orjson", None)
+    assert stream_parser.loads('{"a": NaN}')["a"] != 0
+
+
+def test_parse_stream():
+    async def body_iterator():
+        for chunk in chunk_body(SSE_BODY, 5):
+            yield chunk
+
+    async def collect():
+        return [value async for value in parse_stream(body_iterator())]
+
+    assert asyncio.run(collect()) == EVENTS
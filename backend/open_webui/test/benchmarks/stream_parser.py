@@ -0,0 +1,168 @@
+"""
+Benchmark of the upstream stream parsing in `stream_body_handler`: the former
+line loop against `parse_stream`, both merging tool call deltas.
+
+Run from backend/open_webui, optionally with recorded SSE response bodies:
+
+    python -m test.benchmarks.stream_parser [recording.sse ...]
+
+Without recordings, a generated stream of short content deltas followed by
+streamed tool calls is used. Bodies are replayed one line per chunk, like
+aiohttp yields them.
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from open_webui.utils.stream_parser import parse_stream
+
+
+def generate_recording(deltas=20000, tool_calls=64, argument_deltas=64):
+    events = [
+        {"choices": [{"delta": {"content": "ab"[: i % 2 + 1]}}]} for i in range(deltas)
+    ]
+    for index in range(tool_calls):
+        events.append(
+            {
+                "choices": [
+                    {
+                        "delta": {
+                            "tool_calls": [
+                                {
+                                    "index": index,
+                                    "id": f"call_{index}",
+                                    "function": {"name": "tool", "arguments": ""},
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        )
+        for _ in range(argument_deltas):
+            events.append(
+                {
+                    "choices": [
+                        {
+                            "delta": {
+                                "tool_calls": [
+                                    {"index": index, "function": {"arguments": "{}"}}
+                                ]
+                            }
+                        }
+                    ]
+                }
+            )
+
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+    return f"{body}data: [DONE]\n\n".encode("utf-8")
+
+
+async def replay(body):
+    for line in body.splitlines(keepends=True):
+        yield line
+
+
+def merge_tool_call(response_tool_calls, current_response_tool_call, delta_tool_call):
+    if current_response_tool_call is None:
+        response_tool_calls.append(delta_tool_call)
+    else:
+        function = delta_tool_call.get("function", {})
+        if function.get("name"):
+            current_response_tool_call["function"]["name"] += function["name"]
+        if function.get("arguments"):
+            current_response_tool_call["function"]["arguments"] += function["arguments"]
+
+
+async def line_loop(body):
+    """The loop `stream_body_handler` used before `parse_stream`."""
+    response_tool_calls = []
+    events = 0
+
+    async for line in replay(body):
+        line = line.decode("utf-8") if isinstance(line, bytes) else line
+        data = line
+
+        if not data.strip():
+            continue
+
+        if not data.startswith("data:"):
+            continue
+
+        data = data[len("data:") :].strip()
+
+        try:
+            data = json.loads(data)
+            events += 1
+
+            delta = data["choices"][0].get("delta", {})
+            for delta_tool_call in delta.get("tool_calls", None) or []:
+                current_response_tool_call = None
+                for response_tool_call in response_tool_calls:
+                    if response_tool_call.get("index") == delta_tool_call["index"]:
+                        current_response_tool_call = response_tool_call
+                        break
+                merge_tool_call(
+                    response_tool_calls, current_response_tool_call, delta_tool_call
+                )
+        except Exception:
+            if "data: [DONE]" not in line:
+                continue
+
+    return events, response_tool_calls
+
+
+async def parser_loop(body):
+    response_tool_calls = []
+    response_tool_calls_by_index = {}
+    events = 0
+
+    async for data in parse_stream(replay(body)):
+        events += 1
+
+        delta = data["choices"][0].get("delta", {})
+        for delta_tool_call in delta.get("tool_calls", None) or []:
+            current_response_tool_call = response_tool_calls_by_index.get(
+                delta_tool_call["index"]
+            )
+            if current_response_tool_call is None:
+                response_tool_calls_by_index[delta_tool_call["index"]] = delta_tool_call
+            merge_tool_call(
+                response_tool_calls, current_response_tool_call, delta_tool_call
+            )
+
+    return events, response_tool_calls
+
+
+def measure(loop, body, rounds=5):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = asyncio.run(loop(body))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(paths):
+    recordings = [(path, open(path, "rb").read()) for path in paths] or [
+        ("generated", generate_recording())
+    ]
+
+    for name, body in recordings:
+        line_time, line_result = measure(line_loop, body)
+        parser_time, parser_result = measure(parser_loop, body)
+        assert line_result == parser_result, f"{name}: results differ"
+
+        print(
+            f"{name}: {line_result[0]} events, {len(line_result[1])} tool calls\n"
+            f"  line loop:    {line_time * 1000:8.1f} ms\n"
+            f"  parse_stream: {parser_time * 1000:8.1f} ms "
+            f"({line_time / parser_time:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
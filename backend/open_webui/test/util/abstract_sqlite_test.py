@@ -0,0 +1,91 @@
+import tempfile
+from importlib import import_module
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+
+
+class AbstractSqliteTest:
+    """
+    Runs the migrations on a temporary SQLite database and points the models at
+    it for the tests of the class. `upgrade` and `downgrade` move it to another
+    revision.
+
+    With ROUTER set, `fast_api_client` serves that module of open_webui.routers
+    under BASE_PATH, and `app` takes the dependency overrides of `mock_user`.
+    """
+
+    ROUTER: Optional[str] = None
+    BASE_PATH = ""
+
+    @classmethod
+    def setup_class(cls):
+        from open_webui import env
+        from open_webui.internal import db
+
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.database_url = f"sqlite:///{cls.directory.name}/webui.db"
+        cls.engine = create_engine(
+            cls.database_url, connect_args={"check_same_thread": False}
+        )
+
+        cls.original_database_url = env.DATABASE_URL
+        cls.original_engine = db.SessionLocal.kw["bind"]
+        env.DATABASE_URL = cls.database_url
+
+        cls.upgrade()
+        db.Session.remove()
+        db.SessionLocal.configure(bind=cls.engine)
+
+        if cls.ROUTER:
+            cls.app = FastAPI()
+            cls.app.include_router(
+                import_module(f"open_webui.routers.{cls.ROUTER}").router,
+                prefix=cls.BASE_PATH,
+            )
+            cls.fast_api_client = TestClient(cls.app)
+
+    @classmethod
+    def teardown_class(cls):
+        from open_webui import env
+        from open_webui.internal import db
+
+        db.Session.remove()
+        db.SessionLocal.configure(bind=cls.original_engine)
+        env.DATABASE_URL = cls.original_database_url
+
+        cls.engine.dispose()
+        cls.directory.cleanup()
+
+    @classmethod
+    def alembic_config(cls) -> Config:
+        from open_webui.env import OPEN_WEBUI_DIR
+
+        config = Config(OPEN_WEBUI_DIR / "alembic.ini")
+        config.set_main_option("script_location", str(OPEN_WEBUI_DIR / "migrations"))
+        return config
+
+    @classmethod
+    def upgrade(cls, revision: str = "head"):
+        command.upgrade(cls.alembic_config(), revision)
+
+    @classmethod
+    def downgrade(cls, revision: str):
+        command.downgrade(cls.alembic_config(), revision)
+
+    def setup_method(self):
+        pass
+
+    def teardown_method(self):
+        from open_webui.internal.db import Base
+
+        # empty every table of the models
+        tables = set(inspect(self.engine).get_table_names())
+        with self.engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                if table.name in tables:
+                    connection.execute(table.delete())
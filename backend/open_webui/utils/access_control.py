@@ -1,12 +1,33 @@
 from typing import Optional, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
-from open_webui.models.groups import Groups
+from open_webui.models.groups import Groups, member_group_ids
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
 import json
 
 
+class AccessControlMiddleware:
+    """
+    ASGI middleware that memoizes group memberships for the duration of each HTTP
+    request, so that checking access to N resources costs one group query per user
+    instead of N. Group updates clear the memoized memberships.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = member_group_ids.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            member_group_ids.reset(token)
+
+
 def fill_missing_permissions(
     permissions: Dict[str, Any], default_permissions: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -115,8 +136,7 @@ def has_access(
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
+    user_group_ids = Groups.get_group_ids_by_member_id(user_id)
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    CHAT_COLD_STORAGE_DAYS,
+    CHAT_COLD_STORAGE_INTERVAL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def run_chat_cold_storage(days: int = CHAT_COLD_STORAGE_DAYS) -> int:
+    """
+    Move the chats not updated for `days` days to cold storage. Returns the
+    number of chats moved.
+    """
+    count = Chats.move_chats_to_cold_storage(int(time.time()) - days * 86400)
+    log.info(f"Moved {count} chats to cold storage")
+    return count
+
+
+async def periodic_chat_cold_storage():
+    """
+    Run `run_chat_cold_storage` every CHAT_COLD_STORAGE_INTERVAL seconds when
+    CHAT_COLD_STORAGE_DAYS is set. With Redis configured, a lock held for one
+    interval lets only one worker run each pass.
+    """
+    if CHAT_COLD_STORAGE_DAYS <= 0 or CHAT_COLD_STORAGE_INTERVAL <= 0:
+        return
+
+    lock = None
+    if REDIS_URL:
+        from open_webui.socket.utils import RedisLock
+        from open_webui.utils.redis import get_sentinels_from_env
+
+        lock = RedisLock(
+            redis_url=REDIS_URL,
+            lock_name="open-webui:chat_cold_storage_lock",
+            timeout_secs=CHAT_COLD_STORAGE_INTERVAL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+        )
+
+    while True:
+        try:
+            if lock is None or lock.aquire_lock():
+                await asyncio.to_thread(run_chat_cold_storage)
+        except Exception as e:
+            log.exception(f"Error moving chats to cold storage: {e}")
+
+        await asyncio.sleep(CHAT_COLD_STORAGE_INTERVAL)
@@ -0,0 +1,355 @@
+import html
+import json
+import re
+import time
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def quote_lines(content):
+    return "\n".join(
+        (f"> {line}" if not line.startswith(">") else line)
+        for line in content.splitlines()
+    )
+
+
+class ContentBlockRenderer:
+    """
+    Renders the content blocks of a streamed response into its message content.
+
+    While a response streams only its last block changes, so the blocks before
+    it are rendered once and only the last one is re-rendered. Reasoning only
+    grows, so only the lines added since the previous call are quoted.
+    """
+
+    def __init__(self):
+        # The last reasoning block quoted, its content up to the last line
+        # break, and those lines quoted
+        self.quoted_reasoning = [None, "", ""]
+        # The blocks before the last one rendered so far and their rendering,
+        # per `raw` mode
+        self.rendered_blocks = {}
+
+    def quote_reasoning(self, block):
+        content = block["content"]
+        quoted_block, source, quoted = self.quoted_reasoning
+        if quoted_block is not block or not content.startswith(source):
+            source, quoted = "", ""
+
+        # Line breaks end lines, so the lines before the last one are complete
+        end = content.rfind("\n") + 1
+        if end > len(source):
+            lines = quote_lines(content[len(source) : end])
+            quoted = f"{quoted}\n{lines}" if quoted and lines else quoted or lines
+            source = content[:end]
+            self.quoted_reasoning = [block, source, quoted]
+
+        tail = quote_lines(content[len(source) :])
+        return f"{quoted}\n{tail}" if quoted and tail else quoted or tail
+
+    def render(self, content_blocks, raw=False, content=""):
+        """`content` followed by the rendering of `content_blocks`."""
+        for block in content_blocks:
+            if block["type"] == "text":
+                content = f"{content}{block['content'].strip()}\n"
+            elif block["type"] == "tool_calls":
+                attributes = block.get("attributes", {})
+
+                tool_calls = block.get("content", [])
+                results = block.get("results", [])
+
+                if results:
+
+                    tool_calls_display_content = ""
+                    for tool_call in tool_calls:
+
+                        tool_call_id = tool_call.get("id", "")
+                        tool_name = tool_call.get("function", {}).get("name", "")
+                        tool_arguments = tool_call.get("function", {}).get(
+                            "arguments", ""
+                        )
+
+                        tool_result = None
+                        tool_result_files = None
+                        for result in results:
+                            if tool_call_id == result.get("tool_call_id", ""):
+                                tool_result = result.get("content", None)
+                                tool_result_files = result.get("files", None)
+                                break
+
+                        if tool_result:
+                            tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                        else:
+                            tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+                    if not raw:
+                        content = f"{content}\n{tool_calls_display_content}\n\n"
+                else:
+                    tool_calls_display_content = ""
+
+                    for tool_call in tool_calls:
+                        tool_call_id = tool_call.get("id", "")
+                        tool_name = tool_call.get("function", {}).get("name", "")
+                        tool_arguments = tool_call.get("function", {}).get(
+                            "arguments", ""
+                        )
+
+                        tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+                    if not raw:
+                        content = f"{content}\n{tool_calls_display_content}\n\n"
+
+            elif block["type"] == "reasoning":
+                reasoning_display_content = (
+                    self.quote_reasoning(block) if not raw else ""
+                )
+
+                reasoning_duration = block.get("duration", None)
+
+                if reasoning_duration is not None:
+                    if raw:
+                        content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                    else:
+                        content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+                else:
+                    if raw:
+                        content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                    else:
+                        content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+            elif block["type"] == "code_interpreter":
+                attributes = block.get("attributes", {})
+                output = block.get("output", None)
+                lang = attributes.get("lang", "")
+
+                content_stripped, original_whitespace = split_content_and_whitespace(
+                    content
+                )
+                if is_opening_code_block(content_stripped):
+                    # Remove trailing backticks that would open a new block
+                    content = (
+                        content_stripped.rstrip("`").rstrip() + original_whitespace
+                    )
+                else:
+                    # Keep content as is - either closing backticks or no backticks
+                    content = content_stripped + original_whitespace
+
+                if output:
+                    output = html.escape(json.dumps(output))
+
+                    if raw:
+                        content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                    else:
+                        content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+                else:
+                    if raw:
+                        content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+                    else:
+                        content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+            else:
+                block_content = str(block["content"]).strip()
+                content = f"{content}{block['type']}: {block_content}\n"
+
+        return content
+
+    def serialize(self, content_blocks, raw=False):
+        blocks, content = self.rendered_blocks.get(raw, ([], ""))
+        closed_blocks = content_blocks[:-1]
+        if len(blocks) > len(closed_blocks) or any(
+            block is not closed_block
+            for block, closed_block in zip(blocks, closed_blocks)
+        ):
+            # A rendered block was removed or replaced, start over
+            blocks, content = [], ""
+
+        if len(blocks) < len(closed_blocks):
+            content = self.render(closed_blocks[len(blocks) :], raw, content)
+            blocks = closed_blocks
+            self.rendered_blocks[raw] = (blocks, content)
+
+        return self.render(content_blocks[-1:], raw, content).strip()
+
+
+class TagContentHandler:
+    """
+    Moves the tagged parts of the streamed text (reasoning, code interpreter,
+    solution) from the last text block into blocks of their own. Calling it
+    returns the updated `content` and `content_blocks`, and whether an end tag
+    was found.
+    """
+
+    def __init__(self):
+        # Offsets up to which `content` is known not to contain the start tags
+        # of a content type or an end tag. Between calls `content` is only
+        # appended to, so scans resume from there. They start over when a
+        # tagged block is removed from `content`.
+        self.scan_offsets = {}
+
+    def __call__(self, content_type, tags, content, content_blocks):
+        end_flag = False
+
+        def extract_attributes(tag_content):
+            """Extract attributes from a tag if they exist."""
+            attributes = {}
+            if not tag_content:  # Ensure tag_content is not None
+                return attributes
+            # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+            matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+            for key, value in matches:
+                attributes[key] = value
+            return attributes
+
+        if content_blocks[-1]["type"] == "text":
+            # A start tag ends at its first ">" and spans at most one line
+            # break, so one ending past the scanned offset starts after
+            # the last ">" and the second to last line break before it
+            offset = self.scan_offsets.pop(("start", content_type), 0)
+            line_break = content.rfind("\n", 0, offset)
+            if line_break > 0:
+                line_break = content.rfind("\n", 0, line_break)
+            scan_start = max(content.rfind(">", 0, offset), line_break) + 1
+
+            for start_tag, end_tag in tags:
+                # Match start tag e.g., <tag> or <tag attr="value">
+                start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
+                match = re.compile(start_tag_pattern).search(content, scan_start)
+                if match:
+                    attr_content = (
+                        match.group(1) if match.group(1) else ""
+                    )  # Ensure it's not None
+                    attributes = extract_attributes(
+                        attr_content
+                    )  # Extract attributes safely
+
+                    # Capture everything before and after the matched tag
+                    before_tag = content[: match.start()]  # Content before opening tag
+                    after_tag = content[match.end() :]  # Content after opening tag
+
+                    # Remove the start tag and after from the currently handling text block
+                    content_blocks[-1]["content"] = content_blocks[-1][
+                        "content"
+                    ].replace(match.group(0) + after_tag, "")
+
+                    if before_tag:
+                        content_blocks[-1]["content"] = before_tag
+
+                    if not content_blocks[-1]["content"]:
+                        content_blocks.pop()
+
+                    # Append the new block
+                    content_blocks.append(
+                        {
+                            "type": content_type,
+                            "start_tag": start_tag,
+                            "end_tag": end_tag,
+                            "attributes": attributes,
+                            "content": "",
+                            "started_at": time.time(),
+                        }
+                    )
+
+                    if after_tag:
+                        content_blocks[-1]["content"] = after_tag
+
+                    break
+            else:
+                self.scan_offsets[("start", content_type)] = len(content)
+        elif content_blocks[-1]["type"] == content_type:
+            start_tag = content_blocks[-1]["start_tag"]
+            end_tag = content_blocks[-1]["end_tag"]
+            # Match end tag e.g., </tag>
+            end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+            # Check if the content has the end tag, scanning only what
+            # could complete one past the scanned offset
+            offset = self.scan_offsets.get(("end", end_tag), 0)
+            scan_start = max(offset - len(end_tag) - 1, 0)
+            if re.compile(end_tag_pattern).search(content, scan_start):
+                end_flag = True
+
+                block_content = content_blocks[-1]["content"]
+                # Strip start and end tags from the content
+                start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+                block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+                end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+                split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+                # Content inside the tag
+                block_content = split_content[0].strip() if split_content else ""
+
+                # Leftover content (everything after `</tag>`)
+                leftover_content = (
+                    split_content[1].strip() if len(split_content) > 1 else ""
+                )
+
+                if block_content:
+                    content_blocks[-1]["content"] = block_content
+                    content_blocks[-1]["ended_at"] = time.time()
+                    content_blocks[-1]["duration"] = int(
+                        content_blocks[-1]["ended_at"]
+                        - content_blocks[-1]["started_at"]
+                    )
+
+                    # Reset the content_blocks by appending a new text block
+                    if content_type != "code_interpreter":
+                        if leftover_content:
+
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": leftover_content,
+                                }
+                            )
+                        else:
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": "",
+                                }
+                            )
+
+                else:
+                    # Remove the block if content is empty
+                    content_blocks.pop()
+
+                    if leftover_content:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+                # Clean processed content
+                content = re.sub(
+                    rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                    "",
+                    content,
+                    flags=re.DOTALL,
+                )
+                self.scan_offsets.clear()
+            else:
+                self.scan_offsets[("end", end_tag)] = len(content)
+
+        return content, content_blocks, end_flag
@@ -0,0 +1,841 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, Float, and_, case, cast, func, tuple_
+from sqlalchemy.orm import Session
+
+from open_webui.internal.db import get_db
+from open_webui.models.chats import Chat
+from open_webui.models.files import File
+from open_webui.models.groups import Group, GroupMember, GroupModel
+from open_webui.models.knowledge import Knowledge
+from open_webui.models.messages import Message
+from open_webui.models.usage import (
+    DAY,
+    IMAGE_CONTENT_TYPES,
+    STORAGE_MEASURES,
+    USAGE_COUNTERS,
+    StorageUsage,
+    UsageDaily,
+    UsageTotal,
+    get_day,
+)
+from open_webui.models.users import User
+from open_webui.utils.misc import decode_cursor, encode_cursor
+from open_webui.utils.redis import get_async_redis_connection
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Storage estimates (in MB) for content that has not been measured yet, see
+# `open_webui.utils.storage_usage`
+KNOWLEDGE_STORAGE_MB = 1
+CHAT_STORAGE_MB = 0.1
+MESSAGE_STORAGE_MB = 0.01
+
+MB = 1024 * 1024
+
+
+class ContentStats(BaseModel):
+    chats: int = 0
+    files: int = 0
+    images: int = 0
+    knowledge: int = 0
+    messages: int = 0
+    file_bytes: float = 0
+
+    # Measured by the storage accounting job, when `measured` is set
+    chat_bytes: float = 0
+    message_bytes: float = 0
+    vector_bytes: float = 0
+    measured: bool = False
+
+    @property
+    def files_storage_mb(self) -> float:
+        return self.file_bytes / MB
+
+    @property
+    def chats_storage_mb(self) -> float:
+        if self.measured:
+            return self.chat_bytes / MB
+        return self.chats * CHAT_STORAGE_MB
+
+    @property
+    def messages_storage_mb(self) -> float:
+        if self.measured:
+            return self.message_bytes / MB
+        return self.messages * MESSAGE_STORAGE_MB
+
+    @property
+    def knowledge_storage_mb(self) -> float:
+        if self.measured:
+            return self.vector_bytes / MB
+        return self.knowledge * KNOWLEDGE_STORAGE_MB
+
+    @property
+    def storage_mb(self) -> float:
+        return (
+            self.files_storage_mb
+            + self.knowledge_storage_mb
+            + self.chats_storage_mb
+            + self.messages_storage_mb
+        )
+
+    @property
+    def activity(self) -> int:
+        return self.chats + self.files + self.images + self.knowledge
+
+    def add(self, other: "ContentStats") -> "ContentStats":
+        for field in ContentStats.model_fields:
+            if field == "measured":
+                self.measured = self.measured or other.measured
+            else:
+                setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+
+    def set_storage(self, row) -> "ContentStats":
+        """Replace the estimates with the measured `STORAGE_MEASURES` in `row`."""
+        chat_bytes, message_bytes, file_bytes, vector_bytes = row
+        self.chat_bytes = chat_bytes or 0
+        self.message_bytes = message_bytes or 0
+        self.file_bytes = file_bytes or 0
+        self.vector_bytes = vector_bytes or 0
+        self.measured = True
+        return self
+
+
+class UserContentStats(ContentStats):
+    user_id: str
+    name: str = ""
+    email: str = ""
+    last_active_at: int = 0
+
+
+class GroupContentStats(ContentStats):
+    group_id: str
+    name: str
+    member_count: int = 0
+
+
+####################
+# Queries
+#
+# Every function below issues a constant number of statements regardless of
+# the number of users or groups. Counts are read from the `usage_total` rollups
+# (see `open_webui.models.usage`), storage from the `storage_usage` totals (see
+# `open_webui.utils.storage_usage`) and per-user numbers are joined in memory.
+####################
+
+
+def _usage_sums(table=UsageTotal):
+    return [
+        func.coalesce(func.sum(getattr(table, counter)), 0)
+        for counter in USAGE_COUNTERS
+    ]
+
+
+def _to_content_stats(row) -> ContentStats:
+    chats, files, images, knowledge, messages, file_bytes = row
+    return ContentStats(
+        chats=chats or 0,
+        files=files or 0,
+        images=images or 0,
+        knowledge=knowledge or 0,
+        messages=messages or 0,
+        file_bytes=file_bytes or 0,
+    )
+
+
+def _storage_sums():
+    return [
+        func.coalesce(func.sum(getattr(StorageUsage, measure)), 0)
+        for measure in STORAGE_MEASURES
+    ]
+
+
+def get_content_totals(db: Session) -> ContentStats:
+    totals = _to_content_stats(db.query(*_usage_sums()).one())
+
+    count, *storage = db.query(func.count(StorageUsage.user_id), *_storage_sums()).one()
+    if count:
+        totals.set_storage(storage)
+    return totals
+
+
+def get_content_stats_by_user_id(
+    db: Session, user_ids: Optional[list[str]] = None
+) -> dict[str, ContentStats]:
+    """
+    Per-user content counts keyed by user id. Users without any content are absent
+    from the result; callers should fall back to an empty `ContentStats`.
+    """
+    query = db.query(
+        UsageTotal.user_id, *[getattr(UsageTotal, c) for c in USAGE_COUNTERS]
+    )
+    storage_query = db.query(
+        StorageUsage.user_id, *[getattr(StorageUsage, m) for m in STORAGE_MEASURES]
+    )
+    if user_ids is not None:
+        query = query.filter(UsageTotal.user_id.in_(user_ids))
+        storage_query = storage_query.filter(StorageUsage.user_id.in_(user_ids))
+
+    stats = {user_id: _to_content_stats(values) for user_id, *values in query.all()}
+    for user_id, *storage in storage_query.all():
+        stats.setdefault(user_id, ContentStats()).set_storage(storage)
+    return stats
+
+
+def get_user_content_stats(
+    db: Session,
+    user_ids: Optional[list[str]] = None,
+    stats: Optional[dict[str, ContentStats]] = None,
+) -> list[UserContentStats]:
+    query = db.query(User.id, User.name, User.email, User.last_active_at)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+
+    if stats is None:
+        stats = get_content_stats_by_user_id(db, user_ids)
+    return [
+        UserContentStats(
+            **stats.get(id, ContentStats()).model_dump(),
+            user_id=id,
+            name=name or "",
+            email=email or "",
+            last_active_at=last_active_at or 0,
+        )
+        for id, name, email, last_active_at in query.all()
+    ]
+
+
+####################
+# Pagination
+#
+# Listings are paginated by keyset: the cursor holds the sort value and id of
+# the last row returned, and the next page starts strictly after it.
+####################
+
+USER_SORTS = ["storage", "chats", "messages", "last_active"]
+GROUP_SORTS = ["activity", "storage", "chats", "messages", "members"]
+
+
+def _get_user_sort_columns(db: Session, sort: str):
+    if sort == "storage":
+        if db.query(StorageUsage.user_id).first() is None:
+            # Nothing measured yet, rank by the recorded upload sizes instead
+            return UsageTotal.bytes_stored, UsageTotal.user_id
+        return StorageUsage.total_bytes, StorageUsage.user_id
+    elif sort == "chats":
+        return UsageTotal.chats_created, UsageTotal.user_id
+    elif sort == "messages":
+        return UsageTotal.messages_sent, UsageTotal.user_id
+    elif sort == "last_active":
+        return User.last_active_at, User.id
+    raise ValueError(f"Invalid sort: {sort}")
+
+
+def get_user_content_stats_page(
+    db: Session,
+    sort: str = "storage",
+    order: str = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> tuple[list[UserContentStats], Optional[str]]:
+    """
+    One page of users ordered by `sort`, and the cursor of the next page. The
+    page is read through the index on the sort column, so only the returned
+    rows are touched. Sorting by storage lists measured users only and sorting
+    by chats or messages lists users with recorded content only.
+    """
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Invalid order: {order}")
+
+    column, id_column = _get_user_sort_columns(db, sort)
+    query = db.query(id_column, column)
+    if id_column is not User.id:
+        query = query.join(User, User.id == id_column)
+
+    if cursor:
+        key, after = tuple_(column, id_column), tuple_(*decode_cursor(cursor))
+        query = query.filter(key < after if order == "desc" else key > after)
+
+    if order == "desc":
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+    rows = query.limit(limit).all()
+
+    user_ids = [id for id, _ in rows]
+    stats = {s.user_id: s for s in get_user_content_stats(db, user_ids)}
+    next_cursor = (
+        encode_cursor(rows[-1][1], rows[-1][0]) if rows and len(rows) == limit else None
+    )
+    return [stats[id] for id in user_ids if id in stats], next_cursor
+
+
+def get_group_content_stats(
+    db: Session, groups: list[GroupModel]
+) -> list[GroupContentStats]:
+    """
+    Sum the stats of each group's members with one `GROUP BY group_id` query per
+    rollup table, joined through `group_member`.
+    """
+    group_ids = [group.id for group in groups]
+
+    usage = {
+        group_id: (member_count, _to_content_stats(values))
+        for group_id, member_count, *values in db.query(
+            GroupMember.group_id, func.count(GroupMember.user_id), *_usage_sums()
+        )
+        .outerjoin(UsageTotal, UsageTotal.user_id == GroupMember.user_id)
+        .filter(GroupMember.group_id.in_(group_ids))
+        .group_by(GroupMember.group_id)
+        .all()
+    }
+    storage = {
+        group_id: storage
+        for group_id, measured, *storage in db.query(
+            GroupMember.group_id, func.count(StorageUsage.user_id), *_storage_sums()
+        )
+        .join(StorageUsage, StorageUsage.user_id == GroupMember.user_id)
+        .filter(GroupMember.group_id.in_(group_ids))
+        .group_by(GroupMember.group_id)
+        .all()
+        if measured
+    }
+
+    group_stats = []
+    for group in groups:
+        member_count, stats = usage.get(group.id, (0, ContentStats()))
+        if group.id in storage:
+            stats.set_storage(storage[group.id])
+        group_stats.append(
+            GroupContentStats(
+                **stats.model_dump(),
+                group_id=group.id,
+                name=group.name,
+                member_count=member_count,
+            )
+        )
+    return group_stats
+
+
+def _get_group_sort_column(sort: str):
+    """
+    The sort value of a group, aggregated over its members in a query grouped
+    by `Group.id` with `UsageTotal` and `StorageUsage` joined per member.
+    """
+    usage = {
+        counter: func.coalesce(func.sum(getattr(UsageTotal, counter)), 0)
+        for counter in USAGE_COUNTERS
+    }
+    if sort == "activity":
+        column = (
+            usage["chats_created"]
+            + usage["files_uploaded"]
+            + usage["images_uploaded"]
+            + usage["knowledge_created"]
+        )
+    elif sort == "storage":
+        # In bytes, ranked like `ContentStats.storage_mb`
+        estimate = (
+            usage["bytes_stored"]
+            + usage["knowledge_created"] * KNOWLEDGE_STORAGE_MB * MB
+            + usage["chats_created"] * CHAT_STORAGE_MB * MB
+            + usage["messages_sent"] * MESSAGE_STORAGE_MB * MB
+        )
+        return cast(
+            case(
+                (
+                    func.count(StorageUsage.user_id) > 0,
+                    func.coalesce(func.sum(StorageUsage.total_bytes), 0),
+                ),
+                else_=estimate,
+            ),
+            Float,
+        )
+    elif sort == "chats":
+        column = usage["chats_created"]
+    elif sort == "messages":
+        column = usage["messages_sent"]
+    elif sort == "members":
+        column = func.count(GroupMember.user_id)
+    else:
+        raise ValueError(f"Invalid sort: {sort}")
+    return cast(column, BigInteger)
+
+
+def get_group_content_stats_page(
+    db: Session,
+    sort: str = "activity",
+    order: str = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> tuple[list[GroupContentStats], Optional[str]]:
+    """
+    One page of groups ordered by `sort`, and the cursor of the next page. The
+    sort values are aggregated and ordered in SQL, and only the groups of the
+    page are read.
+    """
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Invalid order: {order}")
+
+    groups = (
+        db.query(Group.id.label("id"), _get_group_sort_column(sort).label("value"))
+        .outerjoin(GroupMember, GroupMember.group_id == Group.id)
+        .outerjoin(UsageTotal, UsageTotal.user_id == GroupMember.user_id)
+        .outerjoin(StorageUsage, StorageUsage.user_id == GroupMember.user_id)
+        .group_by(Group.id)
+        .subquery()
+    )
+    column, id_column = groups.c.value, groups.c.id
+    query = db.query(id_column, column)
+
+    if cursor:
+        key, after = tuple_(column, id_column), tuple_(*decode_cursor(cursor))
+        query = query.filter(key < after if order == "desc" else key > after)
+
+    if order == "desc":
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+    rows = query.limit(limit).all()
+
+    group_ids = [id for id, _ in rows]
+    stats = {
+        s.group_id: s
+        for s in get_group_content_stats(
+            db,
+            [
+                GroupModel.model_validate(group)
+                for group in db.query(Group).filter(Group.id.in_(group_ids)).all()
+            ],
+        )
+    }
+    next_cursor = (
+        encode_cursor(rows[-1][1], rows[-1][0]) if rows and len(rows) == limit else None
+    )
+    return [stats[id] for id in group_ids if id in stats], next_cursor
+
+
+####################
+# Time series
+#
+# Buckets are aligned to the local calendar of `timezone`. Rows are counted per
+# 15 minute base bucket in SQL (every real-world UTC offset is a multiple of
+# 15 minutes, so a base bucket never straddles a local boundary) and folded
+# into the requested buckets in memory.
+####################
+
+TIME_SERIES_GRANULARITIES = ["hour", "day", "week"]
+TIME_SERIES_MAX_BUCKETS = 5000
+
+BASE_BUCKET = 15 * 60
+
+
+def _floor_local(dt: datetime, granularity: str) -> datetime:
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    if granularity in ("day", "week"):
+        dt = dt.replace(hour=0)
+    if granularity == "week":
+        dt = dt - timedelta(days=dt.weekday())
+    return dt
+
+
+def get_bucket_starts(
+    start: int, end: int, granularity: str = "day", tz: tzinfo = timezone.utc
+) -> list[int]:
+    """Epoch starts of the local `granularity` buckets covering [start, end)."""
+    if granularity not in TIME_SERIES_GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}")
+
+    dt = _floor_local(datetime.fromtimestamp(start, tz), granularity)
+    bucket_starts = []
+    while (ts := int(dt.timestamp())) < end:
+        if len(bucket_starts) >= TIME_SERIES_MAX_BUCKETS:
+            raise ValueError(
+                f"Time range spans more than {TIME_SERIES_MAX_BUCKETS} buckets"
+            )
+        if not bucket_starts or ts > bucket_starts[-1]:
+            bucket_starts.append(ts)
+
+        if granularity == "hour":
+            # Step in absolute time so DST transitions neither skip nor repeat hours
+            dt = datetime.fromtimestamp(ts + 3600, tz)
+        else:
+            # Step in wall-clock time so DST days are 23 or 25 hours long
+            dt = dt + timedelta(days=7 if granularity == "week" else 1)
+    return bucket_starts
+
+
+def get_time_series(
+    db: Session,
+    start: int,
+    end: int,
+    granularity: str = "day",
+    tz: tzinfo = timezone.utc,
+) -> list[tuple[int, ContentStats]]:
+    """
+    Content created per bucket between `start` and `end` (epoch seconds), as
+    `(bucket_start, stats)` pairs. Whole UTC days are served from the
+    `usage_daily` rollups; any other bucketing runs one `GROUP BY` query per
+    table over the source rows.
+    """
+    bucket_starts = get_bucket_starts(start, end, granularity, tz)
+    if not bucket_starts:
+        return []
+
+    series = [ContentStats() for _ in bucket_starts]
+
+    def fold(ts: int) -> Optional[ContentStats]:
+        idx = bisect.bisect_right(bucket_starts, ts) - 1
+        return series[idx] if idx >= 0 and ts < end else None
+
+    range_start = bucket_starts[0]
+    if granularity != "hour" and all(ts % DAY == 0 for ts in bucket_starts):
+        for day, *values in (
+            db.query(UsageDaily.day, *_usage_sums(UsageDaily))
+            .filter(UsageDaily.day >= range_start, UsageDaily.day < end)
+            .group_by(UsageDaily.day)
+            .all()
+        ):
+            if entry := fold(day):
+                entry.add(_to_content_stats(values))
+        return list(zip(bucket_starts, series))
+
+    def grouped(columns, created_at, scale: int = 1, *filters):
+        seconds = created_at // scale if scale > 1 else created_at
+        bucket = (seconds // BASE_BUCKET * BASE_BUCKET).label("bucket")
+        return (
+            db.query(bucket, *columns)
+            .filter(
+                created_at >= range_start * scale,
+                created_at < end * scale,
+                *filters,
+            )
+            .group_by(bucket)
+            .all()
+        )
+
+    for bucket, count in grouped(
+        [func.count(Chat.id)],
+        Chat.created_at,
+        1,
+        ~Chat.user_id.like("shared-%"),
+    ):
+        if entry := fold(bucket):
+            entry.chats += count
+
+    for bucket, count, images, file_bytes in grouped(
+        [
+            func.count(File.id),
+            func.sum(case((File.content_type.in_(IMAGE_CONTENT_TYPES), 1), else_=0)),
+            func.sum(File.size),
+        ],
+        File.created_at,
+    ):
+        if entry := fold(bucket):
+            entry.files += count
+            entry.images += images or 0
+            entry.file_bytes += file_bytes or 0
+
+    for bucket, count in grouped(
+        [func.count(Knowledge.id)],
+        Knowledge.created_at,
+    ):
+        if entry := fold(bucket):
+            entry.knowledge += count
+
+    # Message timestamps are in nanoseconds
+    for bucket, count in grouped(
+        [func.count(Message.id)],
+        Message.created_at,
+        scale=1_000_000_000,
+    ):
+        if entry := fold(bucket):
+            entry.messages += count
+
+    return list(zip(bucket_starts, series))
+
+
+####################
+# Export
+#
+# Row generators for the streaming exports in `open_webui.utils.export`. Each
+# opens its own session and reads the `usage_daily` rollups of the UTC days
+# overlapping [start, end) through a server-side cursor, so rows are fetched in
+# batches while the export is written.
+####################
+
+EXPORT_BATCH_SIZE = 1000
+
+USAGE_EXPORT_COLUMNS = [(counter, "int") for counter in USAGE_COUNTERS]
+USER_EXPORT_COLUMNS = [
+    ("user_id", "string"),
+    ("name", "string"),
+    ("email", "string"),
+    *USAGE_EXPORT_COLUMNS,
+]
+GROUP_EXPORT_COLUMNS = [
+    ("group_id", "string"),
+    ("name", "string"),
+    ("member_count", "int"),
+    *USAGE_EXPORT_COLUMNS,
+]
+DAY_EXPORT_COLUMNS = [
+    ("day", "string"),
+    ("user_id", "string"),
+    *USAGE_EXPORT_COLUMNS,
+]
+
+
+def _get_day_filters(start: Optional[int], end: Optional[int]) -> list:
+    filters = []
+    if start is not None:
+        filters.append(UsageDaily.day >= get_day(start))
+    if end is not None:
+        filters.append(UsageDaily.day < end)
+    return filters
+
+
+def iter_user_usage_rows(start: Optional[int] = None, end: Optional[int] = None):
+    """One row per user, including users without usage in the range."""
+    with get_db() as db:
+        query = (
+            db.query(User.id, User.name, User.email, *_usage_sums(UsageDaily))
+            .outerjoin(
+                UsageDaily,
+                and_(UsageDaily.user_id == User.id, *_get_day_filters(start, end)),
+            )
+            .group_by(User.id, User.name, User.email)
+            .order_by(User.id)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for id, name, email, *values in query:
+            yield (id, name or "", email or "", *[int(v) for v in values])
+
+
+def iter_group_usage_rows(
+    groups: list[GroupModel],
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    """One row per group, summing the usage of its members in the range."""
+    with get_db() as db:
+        member_counts = dict(
+            db.query(GroupMember.group_id, func.count(GroupMember.user_id))
+            .group_by(GroupMember.group_id)
+            .all()
+        )
+        usage = {
+            group_id: values
+            for group_id, *values in db.query(
+                GroupMember.group_id, *_usage_sums(UsageDaily)
+            )
+            .join(UsageDaily, UsageDaily.user_id == GroupMember.user_id)
+            .filter(*_get_day_filters(start, end))
+            .group_by(GroupMember.group_id)
+            .yield_per(EXPORT_BATCH_SIZE)
+        }
+
+    for group in groups:
+        yield (
+            group.id,
+            group.name,
+            member_counts.get(group.id, 0),
+            *[int(v) for v in usage.get(group.id, [0] * len(USAGE_COUNTERS))],
+        )
+
+
+def iter_daily_usage_rows(start: Optional[int] = None, end: Optional[int] = None):
+    """One row per user and UTC day with any usage in the range."""
+    with get_db() as db:
+        query = (
+            db.query(
+                UsageDaily.day,
+                UsageDaily.user_id,
+                *[getattr(UsageDaily, counter) for counter in USAGE_COUNTERS],
+            )
+            .filter(*_get_day_filters(start, end))
+            .order_by(UsageDaily.day, UsageDaily.user_id)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for day, user_id, *values in query:
+            yield (
+                datetime.fromtimestamp(day, timezone.utc).strftime("%Y-%m-%d"),
+                user_id,
+                *values,
+            )
+
+
+####################
+# Snapshot cache
+####################
+
+
+class SnapshotCache:
+    """
+    Caches computed dashboard responses in process and, when a Redis URL is
+    configured, in Redis so that all workers share them.
+
+    A snapshot is fresh for `ttl` seconds. For `stale_ttl` seconds after that it
+    is still served while one background task recomputes it; the Redis lock
+    (held for `ttl` seconds) limits recomputation to one per interval across
+    workers. At most `max_snapshots` are kept in process, the least recently
+    used are dropped first.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        stale_ttl: int,
+        redis_url: str = "",
+        redis_sentinels: Optional[list] = None,
+        prefix: str = "open-webui:dashboard",
+        wait_timeout: float = 10,
+        max_snapshots: int = 1000,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self.wait_timeout = wait_timeout
+        self.max_snapshots = max_snapshots
+        self.redis = (
+            get_async_redis_connection(
+                redis_url, redis_sentinels or [], decode_responses=True
+            )
+            if redis_url
+            else None
+        )
+
+        self.snapshots: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    def _get_local(self, key: str) -> Optional[tuple[float, Any]]:
+        snapshot = self.snapshots.get(key)
+        if snapshot is None:
+            return None
+        if time.time() - snapshot[0] >= self.ttl + self.stale_ttl:
+            del self.snapshots[key]
+            return None
+
+        self.snapshots.move_to_end(key)
+        return snapshot
+
+    def _set_local(self, key: str, snapshot: tuple[float, Any]):
+        self.snapshots[key] = snapshot
+        self.snapshots.move_to_end(key)
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+
+    async def _read(self, key: str) -> Optional[tuple[float, Any]]:
+        snapshot = self._get_local(key)
+        if self.redis is None or (snapshot and time.time() - snapshot[0] < self.ttl):
+            return snapshot
+
+        try:
+            data = await self.redis.get(f"{self.prefix}:{key}")
+            if data:
+                data = json.loads(data)
+                if snapshot is None or data["computed_at"] > snapshot[0]:
+                    snapshot = (data["computed_at"], data["value"])
+                    self._set_local(key, snapshot)
+        except Exception as e:
+            log.warning(f"Failed to read dashboard snapshot {key} from Redis: {e}")
+        return snapshot
+
+    async def _write(self, key: str, value: Any):
+        computed_at = time.time()
+        self._set_local(key, (computed_at, value))
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    f"{self.prefix}:{key}",
+                    json.dumps({"computed_at": computed_at, "value": value}),
+                    ex=self.ttl + self.stale_ttl,
+                )
+            except Exception as e:
+                log.warning(f"Failed to write dashboard snapshot {key} to Redis: {e}")
+
+    async def _acquire(self, key: str) -> bool:
+        if self.redis is None:
+            return True
+
+        try:
+            return bool(
+                await self.redis.set(
+                    f"{self.prefix}:lock:{key}", 1, nx=True, ex=self.ttl
+                )
+            )
+        except Exception as e:
+            log.warning(f"Failed to acquire dashboard lock {key}: {e}")
+            return True
+
+    def _refresh(self, key: str, compute: Callable[[], Any]) -> asyncio.Task:
+        task = self.tasks.get(key)
+        if task is None or task.done():
+
+            async def refresh():
+                value = jsonable_encoder(await asyncio.to_thread(compute))
+                await self._write(key, value)
+                return value
+
+            def done(task: asyncio.Task):
+                self.tasks.pop(key, None)
+                if not task.cancelled() and task.exception():
+                    log.error(
+                        f"Failed to refresh dashboard snapshot {key}: {task.exception()}"
+                    )
+
+            task = asyncio.create_task(refresh())
+            task.add_done_callback(done)
+            self.tasks[key] = task
+        return task
+
+    async def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the snapshot for `key`, computing it with `compute` if needed."""
+        if self.ttl <= 0:
+            return jsonable_encoder(await asyncio.to_thread(compute))
+
+        snapshot = await self._read(key)
+        if snapshot:
+            age = time.time() - snapshot[0]
+            if age < self.ttl:
+                return snapshot[1]
+            if age < self.ttl + self.stale_ttl:
+                if key not in self.tasks and await self._acquire(key):
+                    self._refresh(key, compute)
+                return snapshot[1]
+
+        if key in self.tasks or await self._acquire(key):
+            return await asyncio.shield(self._refresh(key, compute))
+
+        # Another worker is computing this snapshot; wait for it to be published
+        started_at = time.time()
+        while time.time() - started_at < self.wait_timeout:
+            await asyncio.sleep(0.25)
+            snapshot = await self._read(key)
+            if snapshot and snapshot[0] >= started_at - self.ttl:
+                return snapshot[1]
+
+        return await asyncio.shield(self._refresh(key, compute))
+
+    async def clear(self):
+        self.snapshots.clear()
+        if self.redis is not None:
+            try:
+                keys = [key async for key in self.redis.scan_iter(f"{self.prefix}:*")]
+                if keys:
+                    await self.redis.delete(*keys)
+            except Exception as e:
+                log.warning(f"Failed to clear dashboard snapshots from Redis: {e}")
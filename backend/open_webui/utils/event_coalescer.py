@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from open_webui.env import (
+    WEBSOCKET_EVENT_COALESCE_INTERVAL,
+    WEBSOCKET_EVENT_COALESCE_SIZE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
+
+def get_content_snapshot(event: dict) -> Optional[str]:
+    """The content of a chat:completion event that only carries the full content."""
+    data = event.get("data")
+    if (
+        event.get("type") == "chat:completion"
+        and isinstance(data, dict)
+        and data.keys() == {"content"}
+        and isinstance(data["content"], str)
+    ):
+        return data["content"]
+    return None
+
+
+def get_content_delta(event: dict) -> Optional[str]:
+    """The content of a chat:completion event that only carries a content delta."""
+    data = event.get("data")
+    if event.get("type") != "chat:completion" or not isinstance(data, dict):
+        return None
+
+    choices = data.get("choices")
+    if not isinstance(choices, list) or len(choices) != 1:
+        return None
+
+    choice = choices[0]
+    delta = choice.get("delta")
+    if (
+        choice.get("finish_reason") is None
+        and isinstance(delta, dict)
+        and delta.keys() <= {"role", "content"}
+        and isinstance(delta.get("content"), str)
+    ):
+        return delta["content"]
+    return None
+
+
+class EventCoalescer:
+    """
+    Coalesces the chat:completion events of one streamed response.
+
+    Events carrying the full content replace the pending one, and events
+    carrying only a content delta are merged into the pending one. The pending
+    event is emitted once `interval` seconds have passed since it was first
+    held or `size` characters of content were added to it, before any other
+    event, and whenever `flush` is called (at the end of each stream, so on
+    completion and before tool calls run). An `interval` of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        event_emitter: Callable,
+        interval: float = WEBSOCKET_EVENT_COALESCE_INTERVAL,
+        size: int = WEBSOCKET_EVENT_COALESCE_SIZE,
+    ):
+        self.event_emitter = event_emitter
+        self.interval = interval
+        self.size = size
+
+        # Events are emitted one at a time, so that they arrive in order
+        self.lock = asyncio.Lock()
+        self.pending: Optional[dict] = None
+        self.pending_size = 0
+        self.emitted_size = 0
+        self.timer: Optional[asyncio.Task] = None
+
+    async def emit(self, event: dict):
+        if self.interval <= 0:
+            await self.event_emitter(event)
+            return
+
+        snapshot = get_content_snapshot(event)
+        delta = get_content_delta(event) if snapshot is None else None
+
+        if snapshot is not None:
+            if self.pending is not None and get_content_snapshot(self.pending) is None:
+                await self.flush()
+            self.pending = event
+            self.pending_size = abs(len(snapshot) - self.emitted_size)
+        elif delta is not None:
+            if self.pending is not None and get_content_delta(self.pending) is None:
+                await self.flush()
+            if self.pending is None:
+                self.pending = event
+                self.pending_size = len(delta)
+            else:
+                pending_delta = get_content_delta(self.pending)
+                self.pending = {
+                    **event,
+                    "data": {
+                        **event["data"],
+                        "choices": [
+                            {
+                                **event["data"]["choices"][0],
+                                "delta": {
+                                    **self.pending["data"]["choices"][0]["delta"],
+                                    "content": f"{pending_delta}{delta}",
+                                },
+                            }
+                        ],
+                    },
+                }
+                self.pending_size += len(delta)
+        else:
+            await self.flush()
+            async with self.lock:
+                await self.event_emitter(event)
+            return
+
+        if self.pending_size >= self.size:
+            await self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(self.interval)
+        self.timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            log.exception(f"Error emitting coalesced event: {e}")
+
+    async def flush(self):
+        """Emit the pending event, if any."""
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = None
+
+        event, self.pending = self.pending, None
+        if event is None:
+            return
+
+        snapshot = get_content_snapshot(event)
+        self.emitted_size = len(snapshot) if snapshot is not None else 0
+        self.pending_size = 0
+
+        async with self.lock:
+            await self.event_emitter(event)
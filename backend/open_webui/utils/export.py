@@ -0,0 +1,197 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator
+
+####################
+# Streaming tabular exports
+#
+# Rows are consumed lazily from an iterator and written out in batches, so an
+# export holds at most one batch in memory regardless of its size. Arrow and
+# Parquet output requires the optional `pyarrow` package.
+####################
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Column types: "string" or "int"
+Columns = list[tuple[str, str]]
+
+
+def _batches(rows: Iterable[tuple], batch_size: int) -> Iterator[list[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _ChunkSink:
+    """Write-only file object whose written bytes are drained after each batch."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_csv(
+    columns: Columns, rows: Iterable[tuple], batch_size: int = 1000
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([name for name, _ in columns])
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _get_arrow_schema(columns: Columns):
+    import pyarrow as pa
+
+    types = {"string": pa.string(), "int": pa.int64()}
+    return pa.schema([(name, types[type]) for name, type in columns])
+
+
+def _iter_arrow_writer(
+    open_writer, columns: Columns, rows: Iterable[tuple], batch_size: int
+) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    schema = _get_arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = open_writer(sink, schema)
+    try:
+        for batch in _batches(rows, batch_size):
+            writer.write_batch(
+                pa.RecordBatch.from_arrays(
+                    [
+                        pa.array([row[i] for row in batch], type=field.type)
+                        for i, field in enumerate(schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_arrow(
+    columns: Columns, rows: Iterable[tuple], batch_size: int = 10000
+) -> Iterator[bytes]:
+    """Arrow IPC stream, one record batch per `batch_size` rows."""
+    import pyarrow as pa
+
+    yield from _iter_arrow_writer(pa.ipc.new_stream, columns, rows, batch_size)
+
+
+def iter_parquet(
+    columns: Columns, rows: Iterable[tuple], batch_size: int = 10000
+) -> Iterator[bytes]:
+    """Parquet file, one row group per `batch_size` rows."""
+    import pyarrow.parquet as pq
+
+    yield from _iter_arrow_writer(pq.ParquetWriter, columns, rows, batch_size)
+
+
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        return False
+    return True
+
+
+def iter_export(
+    format: str, columns: Columns, rows: Iterable[tuple]
+) -> Iterator[bytes]:
+    if format == "csv":
+        return iter_csv(columns, rows)
+    elif format == "arrow":
+        return iter_arrow(columns, rows)
+    elif format == "parquet":
+        return iter_parquet(columns, rows)
+    raise ValueError(f"Invalid format: {format}")
+
+
+####################
+# Streaming document exports
+#
+# JSON documents are serialized a batch at a time, either as a single JSON
+# array or as newline-delimited JSON (one document per line), and can be
+# gzip-compressed on the fly.
+####################
+
+DOCUMENT_EXPORT_FORMATS = {
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def iter_json(documents: Iterable[dict], batch_size: int = 100) -> Iterator[bytes]:
+    yield b"["
+    for i, batch in enumerate(_batches(documents, batch_size)):
+        data = ",".join(json.dumps(document) for document in batch)
+        yield (("," if i else "") + data).encode("utf-8")
+    yield b"]"
+
+
+def iter_ndjson(documents: Iterable[dict], batch_size: int = 100) -> Iterator[bytes]:
+    for batch in _batches(documents, batch_size):
+        yield "".join(json.dumps(document) + "\n" for document in batch).encode("utf-8")
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_document_export(
+    format: str, documents: Iterable[dict], gzip: bool = False
+) -> Iterator[bytes]:
+    if format == "json":
+        chunks = iter_json(documents)
+    elif format == "ndjson":
+        chunks = iter_ndjson(documents)
+    else:
+        raise ValueError(f"Invalid format: {format}")
+    return iter_gzip(chunks) if gzip else chunks
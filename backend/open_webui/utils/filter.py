@@ -32,6 +32,49 @@ def get_sorted_filter_ids(model: dict):
     return filter_ids
 
 
+def get_filter_function_module(request, filter_id):
+    if filter_id in request.app.state.FUNCTIONS:
+        function_module = request.app.state.FUNCTIONS[filter_id]
+    else:
+        function_module, _, _ = load_function_module_by_id(filter_id)
+        request.app.state.FUNCTIONS[filter_id] = function_module
+    return function_module
+
+
+def apply_filter_valves(function_module, filter_id):
+    if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
+        valves = Functions.get_function_valves_by_id(filter_id)
+        function_module.valves = function_module.Valves(**(valves if valves else {}))
+
+
+def get_filter_handler_params(function_module, filter_id, handler, extra_params):
+    """The parameters `handler` takes from `extra_params`, besides the form data."""
+    sig = inspect.signature(handler)
+
+    params = {
+        k: v
+        for k, v in {
+            **extra_params,
+            "__id__": filter_id,
+        }.items()
+        if k in sig.parameters
+    }
+
+    # Handle user parameters
+    if "__user__" in sig.parameters:
+        if hasattr(function_module, "UserValves"):
+            try:
+                params["__user__"]["valves"] = function_module.UserValves(
+                    **Functions.get_user_valves_by_id_and_user_id(
+                        filter_id, params["__user__"]["id"]
+                    )
+                )
+            except Exception as e:
+                log.exception(f"Failed to get user values: {e}")
+
+    return params
+
+
 async def process_filter_functions(
     request, filter_functions, filter_type, form_data, extra_params
 ):
@@ -43,11 +86,7 @@ async def process_filter_functions(
         if not filter:
             continue
 
-        if filter_id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[filter_id]
-        else:
-            function_module, _, _ = load_function_module_by_id(filter_id)
-            request.app.state.FUNCTIONS[filter_id] = function_module
+        function_module = get_filter_function_module(request, filter_id)
 
         # Prepare handler function
         handler = getattr(function_module, filter_type, None)
@@ -59,40 +98,17 @@ async def process_filter_functions(
             skip_files = function_module.file_handler
 
         # Apply valves to the function
-        if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
-            )
+        apply_filter_valves(function_module, filter_id)
 
         try:
             # Prepare parameters
-            sig = inspect.signature(handler)
-
             params = {"body": form_data}
             if filter_type == "stream":
                 params = {"event": form_data}
 
-            params = params | {
-                k: v
-                for k, v in {
-                    **extra_params,
-                    "__id__": filter_id,
-                }.items()
-                if k in sig.parameters
-            }
-
-            # Handle user parameters
-            if "__user__" in sig.parameters:
-                if hasattr(function_module, "UserValves"):
-                    try:
-                        params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
-                        )
-                    except Exception as e:
-                        log.exception(f"Failed to get user values: {e}")
+            params = params | get_filter_handler_params(
+                function_module, filter_id, handler, extra_params
+            )
 
             # Execute handler
             if inspect.iscoroutinefunction(handler):
@@ -110,3 +126,63 @@ async def process_filter_functions(
         del form_data["metadata"]["files"]
 
     return form_data, {}
+
+
+class FilterPipeline:
+    """
+    The `filter_type` handlers of `filter_functions`, resolved once.
+
+    Modules are loaded, valves applied and handler parameters bound when the
+    pipeline is built, and filters without a `filter_type` handler are left
+    out, so that processing the chunks of a stream only calls the handlers.
+    """
+
+    def __init__(self, request, filter_functions, filter_type, extra_params):
+        self.filter_type = filter_type
+        self.handlers = []
+
+        for function in filter_functions:
+            if not function:
+                continue
+
+            filter_id = function.id
+            function_module = get_filter_function_module(request, filter_id)
+
+            handler = getattr(function_module, filter_type, None)
+            if not handler:
+                continue
+
+            apply_filter_valves(function_module, filter_id)
+
+            # Each handler gets its own user, which holds its user valves
+            if "__user__" in extra_params:
+                extra_params = {
+                    **extra_params,
+                    "__user__": {**extra_params["__user__"]},
+                }
+
+            self.handlers.append(
+                (
+                    filter_id,
+                    handler,
+                    inspect.iscoroutinefunction(handler),
+                    get_filter_handler_params(
+                        function_module, filter_id, handler, extra_params
+                    ),
+                )
+            )
+
+    async def process(self, form_data):
+        key = "event" if self.filter_type == "stream" else "body"
+
+        for filter_id, handler, is_coroutine, params in self.handlers:
+            try:
+                if is_coroutine:
+                    form_data = await handler(**{key: form_data}, **params)
+                else:
+                    form_data = handler(**{key: form_data}, **params)
+            except Exception as e:
+                log.debug(f"Error in {self.filter_type} handler {filter_id}: {e}")
+                raise e
+
+        return form_data
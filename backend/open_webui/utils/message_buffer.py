@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    ENABLE_REALTIME_CHAT_SAVE,
+    REALTIME_CHAT_SAVE_INTERVAL,
+    REALTIME_CHAT_SAVE_MAX_UPDATES,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class MessageBuffer:
+    """
+    Write-behind buffer for streamed message updates.
+
+    Updates to the same (chat_id, message_id) are merged in memory and saved
+    with a single upsert once `interval` seconds have passed since the first
+    buffered update or `max_updates` updates were merged, and whenever `flush`
+    is called (on stream completion, periodically and on shutdown).
+    """
+
+    def __init__(self, interval: float, max_updates: int):
+        self.interval = interval
+        self.max_updates = max_updates
+
+        self.lock = threading.Lock()
+        self.pending: dict[tuple[str, str], dict] = {}
+
+    def update(self, chat_id: str, message_id: str, message: dict):
+        key = (chat_id, message_id)
+        with self.lock:
+            entry = self.pending.setdefault(
+                key, {"message": {}, "updates": 0, "since": time.monotonic()}
+            )
+            entry["message"].update(message)
+            entry["updates"] += 1
+
+            due = (
+                entry["updates"] >= self.max_updates
+                or time.monotonic() - entry["since"] >= self.interval
+            )
+
+        if due:
+            self.flush(chat_id, message_id)
+
+    def flush(
+        self,
+        chat_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        older_than: Optional[float] = None,
+    ) -> int:
+        """
+        Save the buffered updates matching `chat_id` and `message_id` (all of
+        them by default), optionally only those buffered at least `older_than`
+        seconds ago. Returns the number of messages saved.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entries = [
+                (key, self.pending.pop(key))
+                for key, entry in list(self.pending.items())
+                if (chat_id is None or key[0] == chat_id)
+                and (message_id is None or key[1] == message_id)
+                and (older_than is None or now - entry["since"] >= older_than)
+            ]
+
+        for (chat_id, message_id), entry in entries:
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_id, message_id, entry["message"]
+            )
+        return len(entries)
+
+
+message_buffer = MessageBuffer(
+    interval=REALTIME_CHAT_SAVE_INTERVAL,
+    max_updates=REALTIME_CHAT_SAVE_MAX_UPDATES,
+)
+
+
+async def periodic_message_buffer_flush():
+    """Save messages whose stream stalled before reaching a flush threshold."""
+    if not ENABLE_REALTIME_CHAT_SAVE:
+        return
+
+    while True:
+        await asyncio.sleep(message_buffer.interval)
+        try:
+            message_buffer.flush(older_than=message_buffer.interval)
+        except Exception as e:
+            log.exception(f"Error flushing message buffer: {e}")
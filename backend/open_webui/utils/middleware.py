@@ -70,9 +70,14 @@ from open_webui.utils.misc import (
 )
 from open_webui.utils.tools import get_tools
 from open_webui.utils.plugin import load_function_module_by_id
+from open_webui.utils.message_buffer import message_buffer
+from open_webui.utils.content_blocks import ContentBlockRenderer, TagContentHandler
+from open_webui.utils.event_coalescer import EventCoalescer
+from open_webui.utils.stream_parser import parse_stream
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
     process_filter_functions,
+    FilterPipeline,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
 
@@ -1174,6 +1179,10 @@ async def process_chat_response(
         Functions.get_function_by_id(filter_id)
         for filter_id in get_sorted_filter_ids(model)
     ]
+    # Resolved once, as the stream filters run on every chunk
+    stream_filter_pipeline = FilterPipeline(
+        request, filter_functions, "stream", extra_params
+    )
 
     # Streaming response
     if event_emitter and event_caller:
@@ -1188,134 +1197,12 @@ async def process_chat_response(
             },
         )
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        content = f"{content}{block['content'].strip()}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        content = f"{content}{block['type']}: {block_content}\n"
-
-                return content.strip()
+            renderer = ContentBlockRenderer()
+            render_content_blocks = renderer.render
+            serialize_content_blocks = renderer.serialize
+            tag_content_handler = TagContentHandler()
 
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
@@ -1326,7 +1213,7 @@ async def process_chat_response(
                         messages.append(
                             {
                                 "role": "assistant",
-                                "content": serialize_content_blocks(temp_blocks),
+                                "content": render_content_blocks(temp_blocks).strip(),
                                 "tool_calls": block.get("content"),
                             }
                         )
@@ -1346,7 +1233,7 @@ async def process_chat_response(
                         temp_blocks.append(block)
 
                 if temp_blocks:
-                    content = serialize_content_blocks(temp_blocks)
+                    content = render_content_blocks(temp_blocks).strip()
                     if content:
                         messages.append(
                             {
@@ -1357,153 +1244,6 @@ async def process_chat_response(
 
                 return messages
 
-            def tag_content_handler(content_type, tags, content, content_blocks):
-                end_flag = False
-
-                def extract_attributes(tag_content):
-                    """Extract attributes from a tag if they exist."""
-                    attributes = {}
-                    if not tag_content:  # Ensure tag_content is not None
-                        return attributes
-                    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
-                    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
-                    for key, value in matches:
-                        attributes[key] = value
-                    return attributes
-
-                if content_blocks[-1]["type"] == "text":
-                    for start_tag, end_tag in tags:
-                        # Match start tag e.g., <tag> or <tag attr="value">
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
-                        match = re.search(start_tag_pattern, content)
-                        if match:
-                            attr_content = (
-                                match.group(1) if match.group(1) else ""
-                            )  # Ensure it's not None
-                            attributes = extract_attributes(
-                                attr_content
-                            )  # Extract attributes safely
-
-                            # Capture everything before and after the matched tag
-                            before_tag = content[
-                                : match.start()
-                            ]  # Content before opening tag
-                            after_tag = content[
-                                match.end() :
-                            ]  # Content after opening tag
-
-                            # Remove the start tag and after from the currently handling text block
-                            content_blocks[-1]["content"] = content_blocks[-1][
-                                "content"
-                            ].replace(match.group(0) + after_tag, "")
-
-                            if before_tag:
-                                content_blocks[-1]["content"] = before_tag
-
-                            if not content_blocks[-1]["content"]:
-                                content_blocks.pop()
-
-                            # Append the new block
-                            content_blocks.append(
-                                {
-                                    "type": content_type,
-                                    "start_tag": start_tag,
-                                    "end_tag": end_tag,
-                                    "attributes": attributes,
-                                    "content": "",
-                                    "started_at": time.time(),
-                                }
-                            )
-
-                            if after_tag:
-                                content_blocks[-1]["content"] = after_tag
-
-                            break
-                elif content_blocks[-1]["type"] == content_type:
-                    start_tag = content_blocks[-1]["start_tag"]
-                    end_tag = content_blocks[-1]["end_tag"]
-                    # Match end tag e.g., </tag>
-                    end_tag_pattern = rf"<{re.escape(end_tag)}>"
-
-                    # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
-                        end_flag = True
-
-                        block_content = content_blocks[-1]["content"]
-                        # Strip start and end tags from the content
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
-                        block_content = re.sub(
-                            start_tag_pattern, "", block_content
-                        ).strip()
-
-                        end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
-                        split_content = end_tag_regex.split(block_content, maxsplit=1)
-
-                        # Content inside the tag
-                        block_content = (
-                            split_content[0].strip() if split_content else ""
-                        )
-
-                        # Leftover content (everything after `</tag>`)
-                        leftover_content = (
-                            split_content[1].strip() if len(split_content) > 1 else ""
-                        )
-
-                        if block_content:
-                            content_blocks[-1]["content"] = block_content
-                            content_blocks[-1]["ended_at"] = time.time()
-                            content_blocks[-1]["duration"] = int(
-                                content_blocks[-1]["ended_at"]
-                                - content_blocks[-1]["started_at"]
-                            )
-
-                            # Reset the content_blocks by appending a new text block
-                            if content_type != "code_interpreter":
-                                if leftover_content:
-
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": leftover_content,
-                                        }
-                                    )
-                                else:
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": "",
-                                        }
-                                    )
-
-                        else:
-                            # Remove the block if content is empty
-                            content_blocks.pop()
-
-                            if leftover_content:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": leftover_content,
-                                    }
-                                )
-                            else:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": "",
-                                    }
-                                )
-
-                        # Clean processed content
-                        content = re.sub(
-                            rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
-                            "",
-                            content,
-                            flags=re.DOTALL,
-                        )
-
-                return content, content_blocks, end_flag
-
             message = Chats.get_message_by_id_and_message_id(
                 metadata["chat_id"], metadata["message_id"]
             )
@@ -1553,6 +1293,9 @@ async def process_chat_response(
 
             solution_tags = [("|begin_of_solution|", "|end_of_solution|")]
 
+            # Streamed chunks are coalesced before they are sent
+            event_coalescer = EventCoalescer(event_emitter)
+
             try:
                 for event in events:
                     await event_emitter(
@@ -1576,36 +1319,16 @@ async def process_chat_response(
                     nonlocal content_blocks
 
                     response_tool_calls = []
+                    # The tool calls above by their index in the stream
+                    response_tool_calls_by_index = {}
 
-                    async for line in response.body_iterator:
-                        line = line.decode("utf-8") if isinstance(line, bytes) else line
-                        data = line
-
-                        # Skip empty lines
-                        if not data.strip():
-                            continue
-
-                        # "data:" is the prefix for each event
-                        if not data.startswith("data:"):
-                            continue
-
-                        # Remove the prefix
-                        data = data[len("data:") :].strip()
-
+                    async for data in parse_stream(response.body_iterator):
                         try:
-                            data = json.loads(data)
-
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params=extra_params,
-                            )
+                            data = await stream_filter_pipeline.process(data)
 
                             if data:
                                 if "event" in data:
-                                    await event_emitter(data.get("event", {}))
+                                    await event_coalescer.emit(data.get("event", {}))
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
@@ -1621,7 +1344,7 @@ async def process_chat_response(
                                     if not choices:
                                         error = data.get("error", {})
                                         if error:
-                                            await event_emitter(
+                                            await event_coalescer.emit(
                                                 {
                                                     "type": "chat:completion",
                                                     "data": {
@@ -1631,7 +1354,7 @@ async def process_chat_response(
                                             )
                                         usage = data.get("usage", {})
                                         if usage:
-                                            await event_emitter(
+                                            await event_coalescer.emit(
                                                 {
                                                     "type": "chat:completion",
                                                     "data": {
@@ -1652,24 +1375,20 @@ async def process_chat_response(
 
                                             if tool_call_index is not None:
                                                 # Check if the tool call already exists
-                                                current_response_tool_call = None
-                                                for (
-                                                    response_tool_call
-                                                ) in response_tool_calls:
-                                                    if (
-                                                        response_tool_call.get("index")
-                                                        == tool_call_index
-                                                    ):
-                                                        current_response_tool_call = (
-                                                            response_tool_call
-                                                        )
-                                                        break
+                                                current_response_tool_call = (
+                                                    response_tool_calls_by_index.get(
+                                                        tool_call_index
+                                                    )
+                                                )
 
                                                 if current_response_tool_call is None:
                                                     # Add the new tool call
                                                     response_tool_calls.append(
                                                         delta_tool_call
                                                     )
+                                                    response_tool_calls_by_index[
+                                                        tool_call_index
+                                                    ] = delta_tool_call
                                                 else:
                                                     # Update the existing tool call
                                                     delta_name = delta_tool_call.get(
@@ -1796,8 +1515,8 @@ async def process_chat_response(
                                             )
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Buffer the message, it is saved in batches
+                                            message_buffer.update(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
@@ -1813,19 +1532,15 @@ async def process_chat_response(
                                                 ),
                                             }
 
-                                await event_emitter(
+                                await event_coalescer.emit(
                                     {
                                         "type": "chat:completion",
                                         "data": data,
                                     }
                                 )
                         except Exception as e:
-                            done = "data: [DONE]" in line
-                            if done:
-                                pass
-                            else:
-                                log.debug("Error: ", e)
-                                continue
+                            log.debug("Error: ", e)
+                            continue
 
                     if content_blocks:
                         # Clean up the last text block
@@ -1845,6 +1560,10 @@ async def process_chat_response(
                                         }
                                     )
 
+                    # The stream ended, send what is held before tool calls run
+                    # or the response completes
+                    await event_coalescer.flush()
+
                     if response_tool_calls:
                         tool_calls.append(response_tool_calls)
 
@@ -2200,7 +1919,10 @@ async def process_chat_response(
                     "title": title,
                 }
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
+                if ENABLE_REALTIME_CHAT_SAVE:
+                    # Save the updates still held in the buffer
+                    message_buffer.flush(metadata["chat_id"], metadata["message_id"])
+                else:
                     # Save message in the database
                     Chats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
@@ -2236,9 +1958,13 @@ async def process_chat_response(
                 await background_tasks_handler()
             except asyncio.CancelledError:
                 log.warning("Task was cancelled!")
+                await event_coalescer.flush()
                 await event_emitter({"type": "task-cancelled"})
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
+                if ENABLE_REALTIME_CHAT_SAVE:
+                    # Save the updates still held in the buffer
+                    message_buffer.flush(metadata["chat_id"], metadata["message_id"])
+                else:
                     # Save message in the database
                     Chats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
@@ -2264,25 +1990,13 @@ async def process_chat_response(
                 return f"data: {item}\n\n"
 
             for event in events:
-                event, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=event,
-                    extra_params=extra_params,
-                )
+                event = await stream_filter_pipeline.process(event)
 
                 if event:
                     yield wrap_item(json.dumps(event))
 
             async for data in original_generator:
-                data, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=data,
-                    extra_params=extra_params,
-                )
+                data = await stream_filter_pipeline.process(data)
 
                 if data:
                     yield data
@@ -1,3 +1,4 @@
+import base64
 import hashlib
 import re
 import time
@@ -25,6 +26,21 @@ def deep_update(d, u):
     return d
 
 
+def encode_cursor(value, id: str) -> str:
+    """Opaque keyset pagination cursor for the row after (value, id)."""
+    return base64.urlsafe_b64encode(json.dumps([value, id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        value, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(value, (int, float)) or not isinstance(id, str):
+            raise ValueError
+        return value, id
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
 def get_message_list(messages, message_id):
     """
     Reconstructs a list of messages in order up to the specified message_id.
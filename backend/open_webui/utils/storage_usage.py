@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import LargeBinary, Text, cast, func
+from sqlalchemy.orm import Session
+
+from open_webui.internal.db import get_db
+from open_webui.models.chat_messages import ChatMessage
+from open_webui.models.chats import Chat
+from open_webui.models.cold_chats import ColdChat
+from open_webui.models.files import File
+from open_webui.models.knowledge import Knowledge
+from open_webui.models.memories import Memory
+from open_webui.models.messages import Message
+from open_webui.models.usage import StorageUsageModel, Usage, UsageDaily
+from open_webui.models.users import User
+from open_webui.env import (
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+    STORAGE_ACCOUNTING_INTERVAL,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Users measured per round of queries
+BATCH_SIZE = 100
+
+
+####################
+# Measurements
+#
+# Chat (with their history messages) and message sizes are the byte length of
+# their stored columns, compressed for cold chats. File sizes come from the
+# storage provider and vector sizes are the bytes of the chunk text and metadata
+# held in each collection (embeddings are not returned by the vector DB clients
+# and are not counted).
+####################
+
+
+def _byte_length(db: Session, column):
+    if db.bind.dialect.name == "sqlite":
+        return func.coalesce(func.length(cast(column, LargeBinary)), 0)
+    elif db.bind.dialect.name == "postgresql":
+        return func.coalesce(func.octet_length(cast(column, Text)), 0)
+    else:
+        raise NotImplementedError(f"Unsupported dialect: {db.bind.dialect.name}")
+
+
+def get_file_bytes(path: Optional[str], size: Optional[int]) -> int:
+    """Size of a stored file, falling back to its recorded upload size."""
+    from open_webui.storage.provider import Storage
+
+    if path:
+        try:
+            return Storage.get_file_size(path)
+        except Exception as e:
+            log.debug(f"Failed to get size of {path}: {e}")
+    return size or 0
+
+
+def get_collection_bytes(collection_name: str) -> int:
+    from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+
+    try:
+        if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            return 0
+        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    except Exception as e:
+        log.debug(f"Failed to get vector collection {collection_name}: {e}")
+        return 0
+
+    if not result:
+        return 0
+
+    size = 0
+    for document in (result.documents or [[]])[0]:
+        size += len((document or "").encode("utf-8"))
+    for metadata in (result.metadatas or [[]])[0]:
+        size += len(json.dumps(metadata, default=str).encode("utf-8"))
+    return size
+
+
+def measure_storage(user_ids: list[str], measured_at: int) -> list[StorageUsageModel]:
+    usage = {
+        user_id: StorageUsageModel(user_id=user_id, measured_at=measured_at)
+        for user_id in user_ids
+    }
+    collections: dict[str, list[str]] = {
+        user_id: [f"user-memory-{user_id}"] for user_id in user_ids
+    }
+
+    with get_db() as db:
+        for user_id, chat_bytes in (
+            db.query(Chat.user_id, func.sum(_byte_length(db, Chat.chat)))
+            .filter(Chat.user_id.in_(user_ids))
+            .group_by(Chat.user_id)
+            .all()
+        ):
+            usage[user_id].chat_bytes = int(chat_bytes or 0)
+
+        for user_id, message_bytes in (
+            db.query(
+                Chat.user_id,
+                func.sum(
+                    _byte_length(db, ChatMessage.content)
+                    + _byte_length(db, ChatMessage.data)
+                ),
+            )
+            .join(Chat, Chat.id == ChatMessage.chat_id)
+            .filter(Chat.user_id.in_(user_ids))
+            .group_by(Chat.user_id)
+            .all()
+        ):
+            usage[user_id].chat_bytes += int(message_bytes or 0)
+
+        for user_id, cold_bytes in (
+            db.query(Chat.user_id, func.sum(func.length(ColdChat.data)))
+            .join(ColdChat, ColdChat.chat_id == Chat.id)
+            .filter(Chat.user_id.in_(user_ids))
+            .group_by(Chat.user_id)
+            .all()
+        ):
+            usage[user_id].chat_bytes += int(cold_bytes or 0)
+
+        for user_id, message_bytes in (
+            db.query(
+                Message.user_id,
+                func.sum(
+                    _byte_length(db, Message.content)
+                    + _byte_length(db, Message.data)
+                    + _byte_length(db, Message.meta)
+                ),
+            )
+            .filter(Message.user_id.in_(user_ids))
+            .group_by(Message.user_id)
+            .all()
+        ):
+            usage[user_id].message_bytes = int(message_bytes or 0)
+
+        for user_id, id, path, size in (
+            db.query(File.user_id, File.id, File.path, File.size)
+            .filter(File.user_id.in_(user_ids))
+            .all()
+        ):
+            usage[user_id].file_bytes += get_file_bytes(path, size)
+            collections[user_id].append(f"file-{id}")
+
+        for user_id, id in (
+            db.query(Knowledge.user_id, Knowledge.id)
+            .filter(Knowledge.user_id.in_(user_ids))
+            .all()
+        ):
+            collections[user_id].append(id)
+
+    for user_id, collection_names in collections.items():
+        usage[user_id].vector_bytes = sum(
+            get_collection_bytes(collection_name)
+            for collection_name in collection_names
+        )
+
+    return list(usage.values())
+
+
+def get_changed_user_ids(since: int) -> set[str]:
+    """Ids of users whose content was created, updated or deleted since `since`."""
+    with get_db() as db:
+        queries = [
+            db.query(Chat.user_id).filter(Chat.updated_at >= since),
+            db.query(Chat.user_id)
+            .join(ChatMessage, ChatMessage.chat_id == Chat.id)
+            .filter(ChatMessage.updated_at >= since),
+            db.query(File.user_id).filter(File.updated_at >= since),
+            db.query(Knowledge.user_id).filter(Knowledge.updated_at >= since),
+            db.query(Memory.user_id).filter(Memory.updated_at >= since),
+            # Message timestamps are in nanoseconds
+            db.query(Message.user_id).filter(
+                Message.updated_at >= since * 1_000_000_000
+            ),
+            # Deletes are only visible through the usage rollups they update
+            db.query(UsageDaily.user_id).filter(UsageDaily.updated_at >= since),
+        ]
+        return {
+            user_id
+            for query in queries
+            for (user_id,) in query.distinct().all()
+            if user_id
+        }
+
+
+def run_storage_accounting(full: bool = False) -> int:
+    """
+    Measure the storage of every user whose content changed since the previous
+    pass, or of all users when `full` is set or no pass has run yet. Returns the
+    number of users measured.
+    """
+    measured_at = int(time.time())
+    since = None if full else Usage.get_storage_measured_at()
+
+    with get_db() as db:
+        query = db.query(User.id)
+        if since is not None:
+            changed_user_ids = get_changed_user_ids(since)
+            if not changed_user_ids:
+                return 0
+            query = query.filter(User.id.in_(changed_user_ids))
+        user_ids = [user_id for (user_id,) in query.all()]
+
+    for i in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[i : i + BATCH_SIZE]
+        if not Usage.upsert_storage_usage(measure_storage(batch, measured_at)):
+            raise Exception("Failed to save storage usage")
+
+    log.info(f"Measured storage of {len(user_ids)} users")
+    return len(user_ids)
+
+
+async def periodic_storage_accounting():
+    """
+    Run `run_storage_accounting` every STORAGE_ACCOUNTING_INTERVAL seconds. With
+    Redis configured, a lock held for one interval lets only one worker run each
+    pass.
+    """
+    if STORAGE_ACCOUNTING_INTERVAL <= 0:
+        return
+
+    lock = None
+    if REDIS_URL:
+        from open_webui.socket.utils import RedisLock
+        from open_webui.utils.redis import get_sentinels_from_env
+
+        lock = RedisLock(
+            redis_url=REDIS_URL,
+            lock_name="open-webui:storage_accounting_lock",
+            timeout_secs=STORAGE_ACCOUNTING_INTERVAL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+        )
+
+    while True:
+        try:
+            if lock is None or lock.aquire_lock():
+                await asyncio.to_thread(run_storage_accounting)
+        except Exception as e:
+            log.exception(f"Error running storage accounting: {e}")
+
+        await asyncio.sleep(STORAGE_ACCOUNTING_INTERVAL)
@@ -0,0 +1,165 @@
+import codecs
+import json
+import logging
+from typing import Any, AsyncIterable, Callable, Union
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Events are decoded with orjson when the optional `orjson` package is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # json accepts a few things orjson does not, e.g. NaN
+            pass
+    return json.loads(data)
+
+
+class StreamParser:
+    """
+    Incremental parser for upstream SSE ("sse") and NDJSON ("ndjson") streams.
+
+    Chunks can be bytes or str and split anywhere, including inside a line or
+    a UTF-8 sequence. `feed` returns the JSON values of the events completed by
+    a chunk and `close` those of a trailing event without a final line break.
+
+    For SSE, the "data:" lines of an event are joined with line breaks and
+    decoded at the blank line ending it. A "data:" line holding a complete
+    JSON value is decoded right away, for upstreams that do not separate their
+    events with blank lines. Other fields and comments are ignored, "[DONE]"
+    sets `done`, and payloads that are not JSON are logged and skipped.
+    """
+
+    def __init__(
+        self,
+        format: str = "sse",
+        loads: Callable[[str], Any] = loads,
+    ):
+        if format not in ("sse", "ndjson"):
+            raise ValueError(f"Unsupported stream format: {format}")
+
+        self.format = format
+        self.loads = loads
+        self.done = False
+
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # The part of the last line received so far, and the data lines of the
+        # current SSE event
+        self.buffer = ""
+        self.data_lines: list[str] = []
+        # Whether the last chunk ended with "\r", which may be followed by "\n"
+        self.after_cr = False
+
+    def feed(self, chunk: Union[bytes, str]) -> list:
+        if isinstance(chunk, bytes):
+            chunk = self.decoder.decode(chunk)
+        if not chunk:
+            return []
+
+        if self.after_cr and chunk[0] == "\n":
+            chunk = chunk[1:]
+        self.after_cr = chunk.endswith("\r")
+
+        if "\r" in chunk:
+            chunk = chunk.replace("\r\n", "\n").replace("\r", "\n")
+
+        lines = chunk.split("\n")
+        if len(lines) == 1:
+            self.buffer += lines[0]
+            return []
+
+        lines[0] = self.buffer + lines[0]
+        self.buffer = lines.pop()
+
+        values = []
+        for line in lines:
+            self.parse_line(line, values)
+        return values
+
+    def close(self) -> list:
+        """Parse what is left once the stream ended."""
+        values = []
+        line = self.buffer + self.decoder.decode(b"", final=True)
+        self.buffer = ""
+        if line:
+            self.parse_line(line, values)
+        if self.data_lines:
+            self.dispatch(values)
+        return values
+
+    def parse_line(self, line: str, values: list):
+        if self.format == "ndjson":
+            if line.strip():
+                self.decode(line, values)
+            return
+
+        if not line:
+            self.dispatch(values)
+            return
+
+        if not line.startswith("data:"):
+            # Other fields ("event:", "id:", "retry:") and ":" comments
+            return
+
+        data = line[5:]
+        if data.startswith(" "):
+            data = data[1:]
+
+        if self.data_lines:
+            self.data_lines.append(data)
+            return
+
+        stripped = data.strip()
+        if stripped == "[DONE]":
+            self.done = True
+            return
+
+        # Fast path for the usual single line event
+        if stripped[:1] in ("{", "["):
+            try:
+                values.append(self.loads(stripped))
+                return
+            except ValueError:
+                pass
+
+        self.data_lines.append(data)
+
+    def dispatch(self, values: list):
+        if not self.data_lines:
+            return
+
+        data = "\n".join(self.data_lines).strip()
+        self.data_lines = []
+
+        if data == "[DONE]":
+            self.done = True
+        elif data:
+            self.decode(data, values)
+
+    def decode(self, data: str, values: list):
+        try:
+            values.append(self.loads(data))
+        except ValueError as e:
+            log.debug(f"Skipping undecodable {self.format} event: {e}")
+
+
+async def parse_stream(body_iterator: AsyncIterable, format: str = "sse"):
+    """Yield the JSON values of the events of a streamed response body."""
+    parser = StreamParser(format)
+
+    async for chunk in body_iterator:
+        for value in parser.feed(chunk):
+            yield value
+
+    for value in parser.close():
+        yield value
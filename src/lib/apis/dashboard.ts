@@ -86,7 +86,9 @@ export const getUsersStorageStats = async (token: string, limit?: number): Promi
 		throw new Error('Failed to fetch users storage stats');
 	}
 
-	return response.json();
+	// Only the first page is used; pass `next_cursor` as `cursor` for more
+	const page = await response.json();
+	return page.items;
 };
 
 export const getGroupsActivityStats = async (token: string, limit?: number): Promise<GroupStats[]> => {
@@ -104,7 +106,9 @@ export const getGroupsActivityStats = async (token: string, limit?: number): Pro
 		throw new Error('Failed to fetch groups activity stats');
 	}
 
-	return response.json();
+	// Only the first page is used; pass `next_cursor` as `cursor` for more
+	const page = await response.json();
+	return page.items;
 };
 
 export const getContentTypeStats = async (token: string): Promise<ContentTypeStats[]> => {